@@ -0,0 +1,50 @@
+"""Custo do autosave: regravar o documento inteiro x gravar o diário
+
+Para cada tamanho de documento, 50 edições (movimentos) são anotadas no
+diário e gravadas com fsync; o autosave antigo regravava o documento
+todo. A compactação (que roda fora da thread da interface) é medida à
+parte.
+
+Uso: python benchmarks/bench_autosave.py
+"""
+import os
+import tempfile
+import time
+
+from common import print_table
+
+from bench_formats import make_document
+from bpmn_editor.formats import save_document
+from bpmn_editor.formats.journal import EditJournal, journal_path
+
+SIZES = (1000, 10000, 100000)
+EDITS = 50
+
+
+def _ms(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def run():
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for count in SIZES:
+            document = make_document(count)
+            path = os.path.join(directory, f"doc{count}.bpmn")
+            full_ms = _ms(lambda: save_document(document, path))
+
+            journal = EditJournal(journal_path(path))
+            for i in range(EDITS):
+                journal.append({'op': 'move', 'id': f"e{i}", 'pos': (i * 10.0, 0.0)})
+            journal_ms = _ms(journal.flush)
+            compact_ms = _ms(lambda: journal.compact(path))
+            journal.close(remove=True)
+            rows.append((count, EDITS, f"{full_ms:.1f}", f"{journal_ms:.2f}", f"{compact_ms:.0f}"))
+    print_table(("elementos", "edições", "documento inteiro ms", "diário ms",
+                 "compactação (2º plano) ms"), rows)
+
+
+if __name__ == "__main__":
+    run()
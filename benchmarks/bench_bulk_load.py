@@ -0,0 +1,86 @@
+"""Tempo de carga de um diagrama: item a item x transação bulk_insert
+
+O documento é uma grade de tarefas, cada uma ligada à vizinha da direita
+e à de baixo. "item a item" é o caminho antigo do carregamento
+(add_element + create_connection, com caminho e cruzamentos calculados a
+cada conexão); "bulk" usa BPMNCanvas.bulk_insert. Os tempos incluem o
+processamento dos eventos pendentes depois da carga.
+
+Uso: python benchmarks/bench_bulk_load.py [conexões máximas]
+"""
+import contextlib
+import io
+import sys
+import time
+
+from common import ensure_app, print_table
+
+from PyQt5.QtCore import QPointF
+
+from bpmn_editor.views.canvas import BPMNCanvas
+
+SIZES = (100, 1000, 10000, 50000)
+
+
+def make_grid(connection_count):
+    """(elementos, conexões) numa grade com ~2 conexões por elemento"""
+    side = max(2, int((connection_count / 2) ** 0.5) + 1)
+    elements = [(f"e{i}", QPointF((i % side) * 160, (i // side) * 140))
+                for i in range(side * side)]
+    connections = []
+    for i in range(len(elements)):
+        if i % side < side - 1:
+            connections.append((f"e{i}", f"e{i + 1}"))
+        if i + side < len(elements):
+            connections.append((f"e{i}", f"e{i + side}"))
+    return elements, connections[:connection_count]
+
+
+def load_per_item(canvas, elements, connections):
+    by_id = {}
+    for element_id, pos in elements:
+        element = canvas.add_element('task', pos)
+        element.unique_id = element_id
+        by_id[element_id] = element
+    for source, target in connections:
+        canvas.create_connection(by_id[source], by_id[target])
+
+
+def load_bulk(canvas, elements, connections):
+    with canvas.bulk_insert() as bulk:
+        by_id = {element_id: bulk.add_element('task', pos, element_id=element_id)
+                 for element_id, pos in elements}
+        for source, target in connections:
+            bulk.add_connection(by_id[source], by_id[target])
+
+
+def _timed_load(app, load, elements, connections):
+    canvas = BPMNCanvas()
+    canvas.resize(1200, 800)
+    start = time.perf_counter()
+    load(canvas, elements, connections)
+    app.processEvents()
+    elapsed = (time.perf_counter() - start) * 1000
+    canvas.scene.clear()
+    canvas.deleteLater()
+    app.processEvents()
+    return elapsed
+
+
+def run(max_connections):
+    app = ensure_app()
+    rows = []
+    for count in SIZES:
+        if count > max_connections:
+            break
+        elements, connections = make_grid(count)
+        with contextlib.redirect_stdout(io.StringIO()):
+            bulk_ms = _timed_load(app, load_bulk, elements, connections)
+            item_ms = _timed_load(app, load_per_item, elements, connections)
+        rows.append((count, len(elements), f"{item_ms:.0f}", f"{bulk_ms:.0f}",
+                     f"{item_ms / bulk_ms:.1f}x"))
+    print_table(("conexões", "elementos", "item a item ms", "bulk ms", "ganho"), rows)
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else SIZES[-1])
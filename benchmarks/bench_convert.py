@@ -0,0 +1,57 @@
+"""Conversão em lote (bpmn-convert): pickle -> NDJSON com 1, 2, 4... processos
+
+Gera `arquivos` .bpmn legados (pickle) de `elementos` cada e converte o
+diretório com convert_batch em cada número de processos, medindo a
+vazão e a memória de pico por processo. A vazão só escala até o número
+de núcleos da máquina (impresso no topo).
+
+Uso: python benchmarks/bench_convert.py [arquivos] [elementos]
+"""
+import os
+import pickle
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import print_table
+
+from bench_formats import make_document
+from bpmn_editor.convert import convert_batch
+from bpmn_editor.convert.cli import collect_files
+
+
+def write_legacy(folder, files, count):
+    document = make_document(count)
+    for record in document['elements']:
+        record['pos'] = list(record['pos'])  # Como os pickles de save_project
+    for i in range(files):
+        with open(folder / f"diagrama{i}.bpmn", 'wb') as f:
+            pickle.dump(document, f, protocol=2)
+
+
+def run(files, count):
+    cores = os.cpu_count() or 1
+    print(f"{cores} núcleo(s)")
+    rows = []
+    with tempfile.TemporaryDirectory() as folder:
+        source = Path(folder) / 'legado'
+        source.mkdir()
+        write_legacy(source, files, count)
+        for jobs in sorted({1, 2, 4, cores}):
+            output = Path(folder) / f"saida{jobs}"
+            pairs = collect_files([source], output)
+            start = time.perf_counter()
+            results = list(convert_batch(pairs, 'ndjson', jobs=jobs, max_tasks_per_worker=50))
+            elapsed = time.perf_counter() - start
+            assert all(r['status'] == 'ok' for r in results)
+            peak = max(r['worker_peak_mb'] or 0 for r in results)
+            rows.append((jobs, files, f"{elapsed * 1000:.0f}", f"{files / elapsed:.1f}",
+                         f"{files * count / elapsed:.0f}", f"{peak:.0f}"))
+    print_table(("processos", "arquivos", "total ms", "arquivos/s", "elementos/s",
+                 "pico por processo MB"), rows)
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 2000)
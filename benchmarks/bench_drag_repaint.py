@@ -0,0 +1,61 @@
+"""Tempo de quadro ao arrastar um elemento numa cena de 10k itens
+
+Compara o modo de repintura 'full' (viewport inteira a cada movimento)
+com o modo 'dirty' (apenas regiões antigas/novas do elemento e de suas
+conexões).
+
+Uso: python benchmarks/bench_drag_repaint.py [itens]
+"""
+import contextlib
+import io
+import sys
+
+from common import ensure_app, populate, measure, print_table
+
+from PyQt5.QtCore import QPointF
+
+from bpmn_editor.models.elements import BPMNConnection
+from bpmn_editor.models.grid import REPAINT_MODES
+from bpmn_editor.views.canvas import BPMNCanvas
+
+TICKS = 120
+
+
+def run(count):
+    app = ensure_app()
+    rows = []
+    for mode in REPAINT_MODES:
+        with contextlib.redirect_stdout(io.StringIO()):
+            canvas = BPMNCanvas(repaint_mode=mode)
+            elements, _, _ = populate(canvas.scene, count)
+            side = int(count ** 0.5)
+            index = len(elements) // 2 + side // 2
+            dragged = elements[index]
+            # Conexões com os vizinhos da grade, como num fluxo real
+            for offset in (-1, 1, -side, side):
+                canvas.scene.addItem(BPMNConnection(dragged, elements[index + offset]))
+        canvas.resize(1400, 900)
+        canvas.show()
+        canvas.scale(0.5, 0.5)
+        canvas.centerOn(dragged)
+        app.processEvents()
+
+        origin = dragged.pos()
+        step = iter(range(10 ** 9))
+
+        def tick():
+            i = next(step)
+            dragged.setPos(origin + QPointF((i % 40) * 4, (i % 40) * 3))
+            # O mesmo que BPMNElement.mouseMoveEvent faz a cada movimento
+            canvas.scene.request_full_repaint()
+            app.processEvents()
+
+        median, p95 = measure(tick, repeat=TICKS)
+        rows.append((count, mode, f"{median:.2f}", f"{p95:.2f}"))
+        canvas.close()
+        canvas.scene.clear()
+    print_table(("itens", "modo", "quadro ms", "p95 ms"), rows)
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
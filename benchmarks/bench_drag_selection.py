@@ -0,0 +1,73 @@
+"""Arrasto de uma seleção de 500 elementos conectados
+
+Cada quadro recebe alguns eventos de movimento do mouse (mouses comuns
+reportam a 125-1000 Hz, bem acima dos 60 Hz da tela). No modo 'imediato'
+cada movimento de cada elemento recalcula na hora as suas conexões; no
+modo 'agrupado' o GeometryDispatcher da cena junta os movimentos do quadro
+e recalcula cada conexão uma única vez.
+
+Uso: python benchmarks/bench_drag_selection.py [elementos] [movimentos/quadro]
+"""
+import contextlib
+import io
+import sys
+
+from common import ensure_app, populate, measure, print_table
+
+from bpmn_editor.models.elements import BPMNConnection
+from bpmn_editor.models.grid import GridScene
+
+FRAMES = 60
+
+
+def run(count, moves_per_frame):
+    app = ensure_app()
+    calls = [0]
+    update_position = BPMNConnection.update_position
+
+    def counted(self):
+        calls[0] += 1
+        update_position(self)
+
+    BPMNConnection.update_position = counted
+
+    rows = []
+    for mode in ('imediato', 'agrupado'):
+        scene = GridScene()
+        with contextlib.redirect_stdout(io.StringIO()):
+            elements, _, _ = populate(scene, count)
+            side = int(count ** 0.5)
+            # Conexões com o vizinho da direita e o de baixo
+            for i, element in enumerate(elements):
+                if (i + 1) % side and i + 1 < count:
+                    scene.addItem(BPMNConnection(element, elements[i + 1]))
+                if i + side < count:
+                    scene.addItem(BPMNConnection(element, elements[i + side]))
+        dispatcher = scene.dispatcher
+        if mode == 'agrupado':
+            dispatcher.begin()  # O que BPMNElement.mousePressEvent faz
+
+        def frame():
+            for _ in range(moves_per_frame):
+                for element in elements:
+                    element.moveBy(1, 1)
+            dispatcher.flush()  # O que o temporizador de 16 ms faz
+            app.processEvents()
+
+        calls[0] = 0
+        median, p95 = measure(frame, repeat=FRAMES)
+        per_frame = calls[0] // FRAMES
+        connections = len(scene.crossings)
+        rows.append((count, connections, mode, per_frame, f"{median:.1f}", f"{p95:.1f}"))
+        if mode == 'agrupado':
+            dispatcher.end()
+        scene.clear()
+
+    BPMNConnection.update_position = update_position
+    print_table(("elementos", "conexões", "modo", "recálculos/quadro", "quadro ms",
+                 "p95 ms"), rows)
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 4)
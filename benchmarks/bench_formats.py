@@ -0,0 +1,77 @@
+"""Gravação e leitura de documentos: pickle (legado) x NDJSON x binário x BPMN 2.0 XML
+
+Mede tempo total, memória Python de pico (tracemalloc) e, na leitura, o
+tempo até o primeiro registro. O pickle precisa ler o arquivo inteiro
+antes de entregar qualquer coisa. Para o binário, "abre mmap" é o tempo
+de abrir com BinaryDocument (só geometria, textos sob demanda).
+
+Uso: python benchmarks/bench_formats.py [elementos]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from common import print_table
+
+from bpmn_editor.formats import (FORMATS, BinaryDocument, iter_records, load_document,
+                                 save_document)
+
+
+def make_document(count):
+    elements = [{'id': f"e{i}", 'type': 'task', 'pos': (float(i % 150) * 160, float(i // 150) * 140),
+                 'name': f"Tarefa {i}", 'connections': [], 'description': "", 'actions': {}}
+                for i in range(count)]
+    connections = [{'id': f"c{i}", 'source_id': f"e{i}", 'target_id': f"e{i + 1}"}
+                   for i in range(count - 1)]
+    return {'elements': elements, 'connections': connections}
+
+
+def _profile(fn):
+    """(ms, MB de pico); o tempo é medido sem o tracemalloc, que o distorce"""
+    start = time.perf_counter()
+    fn()
+    elapsed = (time.perf_counter() - start) * 1000
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def _first_record(path):
+    records = iter_records(path)
+    next(records)
+    records.close()
+
+
+def _stream(path):
+    for _ in iter_records(path):
+        pass
+
+
+def run(count):
+    document = make_document(count)
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name in FORMATS:
+            path = os.path.join(directory, f"doc.{name}")
+            save_ms, save_mb = _profile(lambda: save_document(document, path, name))
+            load_ms, load_mb = _profile(lambda: load_document(path, name))
+            stream_ms, stream_mb = _profile(lambda: _stream(path))
+            first_ms, _ = _profile(lambda: _first_record(path))
+            if name == 'binary':
+                open_ms, open_mb = _profile(lambda: BinaryDocument(path).close())
+                opened = f"{open_ms:.0f} ms / {open_mb:.1f} MB"
+            else:
+                opened = "-"
+            rows.append((name, count, f"{os.path.getsize(path) / 2**20:.1f}",
+                         f"{save_ms:.0f}", f"{save_mb:.1f}", f"{load_ms:.0f}", f"{load_mb:.1f}",
+                         f"{stream_ms:.0f}", f"{stream_mb:.1f}", f"{first_ms:.1f}", opened))
+    print_table(("formato", "elementos", "MB", "grava ms", "grava pico MB", "lê ms",
+                 "lê pico MB", "fluxo ms", "fluxo pico MB", "1º registro ms", "abre mmap"), rows)
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,39 @@
+"""Custo de GridScene.drawBackground: ladrilho em textura x linhas em lote
+
+Uso: python benchmarks/bench_grid_background.py
+"""
+from common import ensure_app, measure, print_table
+
+from PyQt5.QtCore import QRectF
+from PyQt5.QtGui import QImage, QPainter
+
+from bpmn_editor.models.grid import GridScene
+
+VIEWPORT = (1600, 1000)
+ZOOMS = (0.1, 0.25, 0.5, 1.0, 2.0)
+
+
+def run():
+    app = ensure_app()  # noqa: F841 (mantém a QApplication viva)
+    scene = GridScene()
+    renderer = scene.grid_renderer
+    image = QImage(*VIEWPORT, QImage.Format_ARGB32_Premultiplied)
+    rows = []
+    for zoom in ZOOMS:
+        exposed = QRectF(0, 0, VIEWPORT[0] / zoom, VIEWPORT[1] / zoom)
+
+        def paint(draw):
+            painter = QPainter(image)
+            painter.scale(zoom, zoom)
+            draw(painter, exposed, scene.minor_spacing, scene.major_spacing)
+            painter.end()
+
+        tiled, _ = measure(lambda: paint(renderer.draw), repeat=50)
+        lines, _ = measure(lambda: paint(renderer.draw_lines), repeat=20)
+        count = int(exposed.width() / scene.minor_spacing + exposed.height() / scene.minor_spacing)
+        rows.append((zoom, count, f"{lines:.2f}", f"{tiled:.2f}"))
+    print_table(("zoom", "linhas", "drawLines ms", "ladrilho ms"), rows)
+
+
+if __name__ == "__main__":
+    run()
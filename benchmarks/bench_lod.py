@@ -0,0 +1,47 @@
+"""Tempo de quadro com o zoom afastado sobre 20k elementos, com e sem LOD
+
+"sem LOD" zera os limiares, forçando o nível 'full' em qualquer zoom.
+
+Uso: python benchmarks/bench_lod.py [itens]
+"""
+import contextlib
+import io
+import sys
+
+from common import ensure_app, populate, measure, print_table
+
+from bpmn_editor.models.elements import BPMNConnection
+from bpmn_editor.views.canvas import BPMNCanvas
+
+ZOOMS = (0.05, 0.1, 0.3)
+
+
+def run(count):
+    app = ensure_app()
+    with contextlib.redirect_stdout(io.StringIO()):
+        canvas = BPMNCanvas()
+        elements, width, height = populate(canvas.scene, count)
+        # Uma conexão por elemento, ligando vizinhos horizontais
+        side = int(count ** 0.5)
+        for i in range(0, count - 1, 2):
+            if (i + 1) % side:
+                canvas.scene.addItem(BPMNConnection(elements[i], elements[i + 1]))
+    canvas.resize(1600, 1000)
+    canvas.show()
+    app.processEvents()
+
+    rows = []
+    for zoom in ZOOMS:
+        canvas.resetTransform()
+        canvas.scale(zoom, zoom)
+        canvas.centerOn(width / 2, height / 2)
+        for label, thresholds in (("sem LOD", (0.0, 0.0)), ("com LOD", (0.5, 0.25))):
+            canvas.scene.set_lod_thresholds(labels=thresholds[0], shapes=thresholds[1])
+            app.processEvents()
+            median, p95 = measure(canvas.viewport().repaint, repeat=10)
+            rows.append((count, zoom, label, f"{median:.1f}", f"{p95:.1f}"))
+    print_table(("itens", "zoom", "modo", "quadro ms", "p95 ms"), rows)
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
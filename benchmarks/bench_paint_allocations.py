@@ -0,0 +1,84 @@
+"""Alocações Python (tracemalloc) e tempo por quadro no paint de elementos
+
+Cada paint de BPMNElement/BPMNConnection é envolvido por um
+tracemalloc.reset_peak(): o pico acima da memória corrente durante a
+chamada é o que aquele paint alocou (canetas, cores, polígonos criados
+na hora). A soma por quadro e o número de paints que alocaram algo
+mostram o efeito das tabelas pré-alocadas.
+
+Uso: python benchmarks/bench_paint_allocations.py [itens]
+"""
+import contextlib
+import io
+import statistics
+import sys
+import time
+import tracemalloc
+
+from common import ensure_app, populate, print_table
+
+from PyQt5.QtCore import QRectF
+from PyQt5.QtGui import QImage, QPainter
+
+from bpmn_editor.models.elements import BPMNConnection, BPMNElement
+from bpmn_editor.views.canvas import BPMNCanvas
+
+FRAMES = 10
+
+_allocations = []
+
+
+def _traced(paint):
+    def wrapper(self, painter, option, widget=None):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        paint(self, painter, option, widget)
+        _allocations.append(tracemalloc.get_traced_memory()[1] - before)
+    return wrapper
+
+
+def run(count):
+    app = ensure_app()
+    BPMNElement.paint = _traced(BPMNElement.paint)
+    BPMNConnection.paint = _traced(BPMNConnection.paint)
+    with contextlib.redirect_stdout(io.StringIO()):
+        canvas = BPMNCanvas()
+        elements, width, height = populate(canvas.scene, count)
+        for i in range(0, count - 1, 2):
+            canvas.scene.addItem(BPMNConnection(elements[i], elements[i + 1]))
+    # Parte dos elementos selecionada, para exercitar todas as canetas
+    for element in elements[::10]:
+        element.setSelected(True)
+
+    rows = []
+    for element_type in ('task', 'gateway', 'start'):
+        for element in elements:
+            element.element_type = element_type
+        image = QImage(3200, 2000, QImage.Format_ARGB32_Premultiplied)
+        source = QRectF(0, 0, 3200, 2000)  # Zoom 1:1, nível de detalhe 'full'
+
+        def frame():
+            painter = QPainter(image)
+            canvas.scene.render(painter, QRectF(image.rect()), source)
+            painter.end()
+
+        frame()  # Aquece caches (ladrilhos, tabelas de estilo)
+        times = []
+        for _ in range(FRAMES):
+            start = time.perf_counter()
+            frame()
+            times.append((time.perf_counter() - start) * 1000)
+
+        tracemalloc.start()
+        _allocations.clear()
+        frame()
+        tracemalloc.stop()
+        allocating = sum(1 for size in _allocations if size > 0)
+        rows.append((count, element_type, sum(_allocations), allocating,
+                     len(_allocations), f"{statistics.median(times):.1f}"))
+    print_table(("itens", "tipo", "bytes/quadro", "paints c/ alocação", "paints",
+                 "quadro ms"), rows)
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,83 @@
+"""Abrir um documento grande: carga de uma vez x carga progressiva
+
+"de uma vez" cria todos os itens com BPMNCanvas.bulk_insert antes de
+devolver o controle. Na progressiva mede-se o tempo até a primeira tela
+(itens visíveis criados), as pausas do laço de eventos durante a carga
+(o que o usuário sente ao rolar ou dar zoom) e o tempo total.
+
+Uso: python benchmarks/bench_progressive_load.py [elementos]
+"""
+import contextlib
+import io
+import sys
+import time
+
+from common import ensure_app, print_table
+
+from PyQt5.QtCore import QPointF
+
+from bench_formats import make_document
+from bpmn_editor.views.canvas import BPMNCanvas
+from bpmn_editor.formats.progressive_loader import ProgressiveLoader
+
+
+def _canvas():
+    canvas = BPMNCanvas()
+    canvas.resize(1200, 800)
+    return canvas
+
+
+def _dispose(app, canvas):
+    canvas.scene.clear()
+    canvas.deleteLater()
+    app.processEvents()
+
+
+def load_at_once(app, document):
+    canvas = _canvas()
+    start = time.perf_counter()
+    with canvas.bulk_insert() as bulk:
+        by_id = {}
+        for record in document['elements']:
+            by_id[record['id']] = bulk.add_element(record['type'], QPointF(*record['pos']),
+                                                   name=record['name'], element_id=record['id'])
+        for record in document['connections']:
+            bulk.add_connection(by_id[record['source_id']], by_id[record['target_id']],
+                                record['id'])
+    elapsed = (time.perf_counter() - start) * 1000
+    _dispose(app, canvas)
+    return elapsed
+
+
+def load_progressively(app, document):
+    canvas = _canvas()
+    loader = ProgressiveLoader(canvas)
+    start = time.perf_counter()
+    loader.load(document)
+    first_ms = (time.perf_counter() - start) * 1000
+    pauses = []
+    while loader.loading:
+        before = time.perf_counter()
+        app.processEvents()
+        pauses.append((time.perf_counter() - before) * 1000)
+    total_ms = (time.perf_counter() - start) * 1000
+    _dispose(app, canvas)
+    pauses.sort()
+    return first_ms, pauses[int(len(pauses) * 0.99)], pauses[-1], total_ms
+
+
+def run(count):
+    app = ensure_app()
+    document = make_document(count)
+    with contextlib.redirect_stdout(io.StringIO()):
+        once_ms = load_at_once(app, document)
+        first_ms, p99_ms, longest_ms, total_ms = load_progressively(app, document)
+    print_table(("modo", "elementos", "1ª tela ms", "pausa p99 ms", "maior pausa ms", "total ms"), [
+        ("de uma vez", count, f"{once_ms:.0f}", "-", f"{once_ms:.0f}", f"{once_ms:.0f}"),
+        ("progressiva", count, f"{first_ms:.0f}", f"{p99_ms:.0f}", f"{longest_ms:.0f}",
+         f"{total_ms:.0f}"),
+    ])
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,104 @@
+"""Repositório SQLite x arquivos NDJSON (um por diagrama)
+
+- gravação completa de um diagrama novo;
+- gravação depois de mover alguns elementos (o arquivo é regravado
+  inteiro; o repositório só atualiza as linhas alteradas);
+- leitura completa;
+- leitura de uma região do tamanho de uma tela (arquivo: ler tudo e
+  filtrar; repositório: R*Tree);
+- consulta entre diagramas ("tarefas com a ação Enviar Email"), que nos
+  arquivos exige ler todos.
+
+Uso: python benchmarks/bench_repository.py [elementos] [diagramas]
+"""
+import copy
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import print_table
+
+from bench_formats import make_document
+from bpmn_editor.formats import load_document, save_document
+from bpmn_editor.repository import DiagramRepository
+
+REGION = (0.0, 0.0, 1600.0, 1000.0)  # Uma tela cheia em zoom 100%
+MOVED = 10
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def _with_actions(document, every=50):
+    for i, record in enumerate(document['elements']):
+        if i % every == 0:
+            record['actions'] = {'Enviar Email': f"destino{i}@exemplo.com"}
+    return document
+
+
+def _moved(document):
+    document = copy.deepcopy(document)
+    for record in document['elements'][::len(document['elements']) // MOVED][:MOVED]:
+        x, y = record['pos']
+        record['pos'] = (x + 20, y)
+    return document
+
+
+def _file_region(path):
+    x0, y0, x1, y1 = REGION
+    return [record for record in load_document(path)['elements']
+            if x0 <= record['pos'][0] <= x1 and y0 <= record['pos'][1] <= y1]
+
+
+def _file_query(paths):
+    return [(path.stem, record['id']) for path in paths
+            for record in load_document(path)['elements']
+            if record['type'] == 'task' and 'Enviar Email' in record['actions']]
+
+
+def run(count, diagrams):
+    document = _with_actions(make_document(count))
+    moved = _moved(document)
+    with tempfile.TemporaryDirectory() as folder:
+        folder = Path(folder)
+        paths = [folder / f"diagrama{i}.bpmn" for i in range(diagrams)]
+        repository = DiagramRepository(folder / 'diagramas.db')
+
+        file_save, _ = _timed(lambda: save_document(document, paths[0]))
+        db_save, _ = _timed(lambda: repository.save_document('diagrama0', document))
+        file_move, _ = _timed(lambda: save_document(moved, paths[0]))
+        db_move, counts = _timed(lambda: repository.save_document('diagrama0', moved))
+        assert counts['updated'] == MOVED
+        file_load, _ = _timed(lambda: load_document(paths[0]))
+        db_load, _ = _timed(lambda: repository.load_document('diagrama0'))
+        file_region, in_file = _timed(lambda: _file_region(paths[0]))
+        db_region, in_db = _timed(lambda: repository.load_region('diagrama0', REGION))
+
+        for i in range(1, diagrams):
+            save_document(document, paths[i])
+            repository.save_document(f"diagrama{i}", document)
+        file_query, found_files = _timed(lambda: _file_query(paths))
+        db_query, found_db = _timed(
+            lambda: repository.find_elements(type='task', action='Enviar Email'))
+        assert len(found_files) == len(found_db)
+        repository.close()
+
+    print_table(("operação", "elementos", "arquivo ms", "SQLite ms", "razão"), [
+        (name, size, f"{file_ms:.1f}", f"{db_ms:.1f}", f"{file_ms / db_ms:.1f}x")
+        for name, size, file_ms, db_ms in (
+            ("gravar (novo)", count, file_save, db_save),
+            (f"gravar ({MOVED} movidos)", count, file_move, db_move),
+            ("ler tudo", count, file_load, db_load),
+            ("ler região", f"{len(in_db['elements'])}", file_region, db_region),
+            (f"consulta em {diagrams} diagramas", len(found_db), file_query, db_query),
+        )
+    ])
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10)
@@ -0,0 +1,74 @@
+"""Comparação de revisões e gravação como delta
+
+Para cada tamanho, a revisão filha move, renomeia e troca ações de 1%
+dos elementos, remove 0,5% e acrescenta 0,5%. Mede o tempo de
+diff_documents (deve crescer linearmente), o de gravar a revisão como
+delta e o tamanho do delta frente ao arquivo NDJSON completo (com e sem
+gzip).
+
+Uso: python benchmarks/bench_revisions.py [elementos...]
+"""
+import copy
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import print_table
+
+from bench_formats import make_document
+from bpmn_editor.formats import save_document, save_revision, load_revision
+from bpmn_editor.formats.revisions import diff_documents
+
+
+def make_child(parent):
+    child = copy.deepcopy(parent)
+    elements = child['elements']
+    step = 100
+    for record in elements[::step]:
+        x, y = record['pos']
+        record['pos'] = (x + 40, y)
+        record['name'] += " (rev)"
+        record['actions'] = {'Enviar Email': 'revisao@exemplo.com'}
+    removed = {record['id'] for record in elements[step // 2::step * 2]}
+    child['elements'] = [record for record in elements if record['id'] not in removed]
+    child['connections'] = [record for record in child['connections']
+                            if record['source_id'] not in removed and record['target_id'] not in removed]
+    for i in range(len(removed)):
+        child['elements'].append({'id': f"n{i}", 'type': 'task', 'pos': (-200.0, i * 140.0),
+                                  'name': f"Nova {i}", 'connections': [], 'description': "",
+                                  'actions': {}})
+    return child
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def run(sizes):
+    rows = []
+    with tempfile.TemporaryDirectory() as folder:
+        folder = Path(folder)
+        for count in sizes:
+            parent = make_document(count)
+            child = make_child(parent)
+            diff_ms, diff = _timed(lambda: diff_documents(parent, child))
+            delta_path = folder / f"{count}.bpmndelta"
+            save_ms, _ = _timed(lambda: save_revision(parent, child, delta_path))
+            load_ms, rebuilt = _timed(lambda: load_revision(parent, delta_path))
+            assert diff_documents(child, rebuilt).summary() == dict.fromkeys(diff.summary(), 0)
+            full = save_document(child, folder / f"{count}.bpmn").stat().st_size
+            compressed = save_document(child, folder / f"{count}.bpmn.gz", compress=True).stat().st_size
+            delta = delta_path.stat().st_size
+            changes = sum(diff.summary().values())
+            rows.append((count, changes, f"{diff_ms:.1f}", f"{diff_ms * 1000 / count:.2f}",
+                         f"{save_ms:.0f}", f"{load_ms:.0f}", f"{full / 1024:.0f}",
+                         f"{compressed / 1024:.0f}", f"{delta / 1024:.1f}"))
+    print_table(("elementos", "mudanças", "diff ms", "µs/elem", "gravar delta ms",
+                 "abrir delta ms", "ndjson KB", "ndjson.gz KB", "delta KB"), rows)
+
+
+if __name__ == "__main__":
+    run([int(arg) for arg in sys.argv[1:]] or [10000, 50000, 100000])
@@ -0,0 +1,58 @@
+"""Tempo de interface travada ao salvar: gravação síncrona x SavePipeline
+
+"síncrono" é o caminho antigo (instantâneo + serialização + escrita na
+thread da interface); no pipeline a interface só paga o instantâneo.
+
+Uso: python benchmarks/bench_save_pipeline.py [elementos]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+from common import ensure_app, populate, print_table
+
+from bpmn_editor.formats import document_from_scene, save_document
+from bpmn_editor.formats.save_pipeline import SavePipeline
+from bpmn_editor.models.elements import BPMNConnection
+from bpmn_editor.models.grid import GridScene
+
+
+def _ms(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def run(count):
+    app = ensure_app()
+    scene = GridScene()
+    with contextlib.redirect_stdout(io.StringIO()):
+        elements, _, _ = populate(scene, count)
+        for i in range(0, count - 1, 2):
+            scene.addItem(BPMNConnection(elements[i], elements[i + 1]))
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'doc.bpmn')
+        for compress in (False, True):
+            sync_ms, _ = _ms(lambda: save_document(document_from_scene(scene), path,
+                                                   compress=compress))
+            pipeline = SavePipeline()
+            finished = []
+            pipeline.signals.finished.connect(lambda p, ms: finished.append(ms))
+            gui_ms, _ = _ms(lambda: pipeline.save(path, lambda: document_from_scene(scene),
+                                                  compress=compress))
+            while not finished:
+                pipeline.wait()
+                app.processEvents()
+            rows.append((count, "sim" if compress else "não", f"{sync_ms:.0f}", f"{gui_ms:.0f}",
+                         f"{finished[0]:.0f}", f"{os.path.getsize(path) / 2**20:.1f}"))
+    print_table(("elementos", "gzip", "síncrono ms", "interface (pipeline) ms",
+                 "worker ms", "MB"), rows)
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,44 @@
+"""Latência de hit-test e de consulta por área nos modos de índice da GridScene
+
+Uso: python benchmarks/bench_spatial_index.py [tamanhos...]
+"""
+import random
+import sys
+
+from common import ensure_app, populate, measure, print_table
+
+from PyQt5.QtCore import QPointF, QRectF, Qt
+from PyQt5.QtGui import QTransform
+
+from bpmn_editor.models.grid import GridScene, INDEX_MODES
+
+
+def run(sizes):
+    app = ensure_app()  # noqa: F841 (mantém a QApplication viva)
+    rows = []
+    for count in sizes:
+        for mode in INDEX_MODES:
+            scene = GridScene(index_mode=mode)
+            _, width, height = populate(scene, count)
+            rng = random.Random(7)
+            points = [QPointF(rng.uniform(0, width), rng.uniform(0, height)) for _ in range(256)]
+            rects = [QRectF(p.x(), p.y(), 800, 600) for p in points]
+            transform = QTransform()
+
+            # Primeira consulta constrói o índice BSP; fica fora da medição
+            scene.item_at(points[0], transform)
+
+            it = iter(range(10 ** 9))
+            hit_med, hit_p95 = measure(
+                lambda: scene.item_at(points[next(it) % 256], transform))
+            area_med, area_p95 = measure(
+                lambda: scene.items_in_area(rects[next(it) % 256], Qt.IntersectsItemShape),
+                repeat=100)
+            rows.append((count, mode, f"{hit_med:.3f}", f"{hit_p95:.3f}",
+                         f"{area_med:.3f}", f"{area_p95:.3f}"))
+            scene.clear()
+    print_table(("itens", "modo", "hit ms", "hit p95", "área ms", "área p95"), rows)
+
+
+if __name__ == "__main__":
+    run([int(a) for a in sys.argv[1:]] or [1000, 10000, 50000])
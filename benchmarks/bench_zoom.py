@@ -0,0 +1,61 @@
+"""Tempo de quadro ao atravessar zooms sobre 20k elementos, imediato x suave
+
+Cada passo aplica um zoom (como uma marca da roda do mouse) e repinta a
+viewport; o tempo do passo inclui os dois, já que no modo suave a cópia
+do quadro inicial acontece dentro de zoom_by. No modo suave o gesto termina com um redesenho completo,
+medido à parte.
+
+Uso: python benchmarks/bench_zoom.py [itens]
+"""
+import contextlib
+import io
+import statistics
+import sys
+import time
+
+from common import ensure_app, populate, print_table
+
+from bpmn_editor.models.elements import BPMNConnection
+from bpmn_editor.views.canvas import BPMNCanvas
+
+STEPS = [1 / 1.25] * 12 + [1.25] * 12  # Afasta até ~0.07x e volta
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def run(count):
+    app = ensure_app()
+    with contextlib.redirect_stdout(io.StringIO()):
+        canvas = BPMNCanvas()
+        elements, width, height = populate(canvas.scene, count)
+        side = int(count ** 0.5)
+        for i in range(0, count - 1, 2):
+            if (i + 1) % side:
+                canvas.scene.addItem(BPMNConnection(elements[i], elements[i + 1]))
+    canvas.resize(1600, 1000)
+    canvas.show()
+    app.processEvents()
+
+    rows = []
+    for mode in ('immediate', 'smooth'):
+        canvas.set_zoom_mode(mode)
+        canvas.resetTransform()
+        canvas.centerOn(width / 2, height / 2)
+        canvas.viewport().repaint()
+        frames = []
+        for factor in STEPS:
+            frames.append(_timed(lambda: (canvas.zoom_by(factor), canvas.viewport().repaint())))
+        settle = _timed(lambda: (canvas.finish_zoom(), canvas.viewport().repaint()))
+        frames.sort()
+        rows.append((count, mode, len(STEPS), f"{statistics.median(frames):.1f}",
+                     f"{frames[int(len(frames) * 0.95) - 1]:.1f}", f"{max(frames):.1f}",
+                     f"{settle:.1f}" if mode == 'smooth' else "-"))
+    print_table(("itens", "modo", "passos", "quadro ms", "p95 ms", "pior ms", "final ms"), rows)
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
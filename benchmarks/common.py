@@ -0,0 +1,54 @@
+"""Utilitários compartilhados pelos benchmarks (execução sem display)"""
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QPointF
+
+
+def ensure_app():
+    return QApplication.instance() or QApplication([])
+
+
+def populate(scene, count, seed=42, element_type='task'):
+    """Espalha `count` elementos numa grade aproximadamente quadrada"""
+    from bpmn_editor.models.elements import BPMNElement
+
+    rng = random.Random(seed)
+    side = max(1, int(count ** 0.5))
+    elements = []
+    for i in range(count):
+        pos = QPointF((i % side) * 160 + rng.uniform(-20, 20),
+                      (i // side) * 140 + rng.uniform(-20, 20))
+        element = BPMNElement(element_type, pos)
+        scene.addItem(element)
+        elements.append(element)
+    width = side * 160
+    height = (count // side + 1) * 140
+    return elements, width, height
+
+
+def measure(fn, repeat=200):
+    """Executa `fn` `repeat` vezes e devolve (mediana, p95) em milissegundos"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(c).ljust(w) for c, w in zip(row, widths)))
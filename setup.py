@@ -13,4 +13,10 @@ setup(
         'sqlalchemy>=2.0.40'
     ],
     python_requires='>=3.8',
+    entry_points={
+        'console_scripts': [
+            'bpmn-export=bpmn_editor.export.cli:main',
+            'bpmn-convert=bpmn_editor.convert.cli:main',
+        ],
+    },
 )
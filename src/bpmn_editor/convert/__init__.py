@@ -0,0 +1,3 @@
+from .batch import TARGET_FORMATS, RecordChecker, convert_file, convert_batch
+
+__all__ = ['TARGET_FORMATS', 'RecordChecker', 'convert_file', 'convert_batch']
@@ -0,0 +1,182 @@
+import multiprocessing
+import os
+import sys
+import time
+from functools import partial
+from pathlib import Path
+
+from ..formats import FORMATS, detect_format, iter_records, save_records
+from ..formats.document import ELEMENT_KEYS, CONNECTION_KEYS
+from ..models.geometry import DEFAULT_SIZES
+from ..utils.exceptions import DocumentFormatError
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Conversão e validação em lote, sem Qt: só os módulos de formats/.
+# Formatos de fluxo são lidos e gravados registro a registro, então a
+# memória de um worker depende do maior registro, não do maior arquivo
+# (exceto pickle na leitura e binário na gravação, que são inteiros).
+TARGET_FORMATS = tuple(name for name in FORMATS if name != 'pickle')
+MAX_PROBLEMS = 20  # Problemas listados por arquivo; o total é sempre contado
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def limit_memory(max_memory_mb=None):
+    """Inicializador do worker: limita o espaço de endereços do processo.
+
+    Um arquivo que estoure o limite falha com MemoryError só no seu worker.
+    """
+    if max_memory_mb and resource is not None:
+        limit = int(max_memory_mb * 2**20)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (2**20 if sys.platform == 'darwin' else 2**10), 1)  # bytes no macOS
+
+
+class RecordChecker:
+    """Confere os registros enquanto passam (ver `check`).
+
+    Além dos campos obrigatórios: ids repetidos, tipos que o editor não
+    conhece, posições não numéricas e conexões com pontas inexistentes
+    ou ligando um elemento a ele mesmo (que a cena descartaria).
+    """
+
+    def __init__(self):
+        self.element_ids = set()
+        self.connection_ids = set()
+        self.problems = []
+        self.problem_count = 0
+        self.elements = 0
+        self.connections = 0
+
+    def problem(self, message):
+        self.problem_count += 1
+        if len(self.problems) < MAX_PROBLEMS:
+            self.problems.append(message)
+
+    def _element(self, record):
+        self.elements += 1
+        missing = [key for key in ELEMENT_KEYS if key not in record]
+        if missing:
+            self.problem(f"Elemento {record.get('id')} sem os campos {missing}")
+            return
+        if record['id'] in self.element_ids:
+            self.problem(f"Elemento {record['id']} repetido")
+        self.element_ids.add(record['id'])
+        if record['type'] not in DEFAULT_SIZES:
+            self.problem(f"Elemento {record['id']} de tipo desconhecido: {record['type']}")
+        pos = record['pos']
+        if (not isinstance(pos, (list, tuple)) or len(pos) != 2
+                or not all(isinstance(v, (int, float)) for v in pos)):
+            self.problem(f"Elemento {record['id']} com posição inválida: {pos!r}")
+
+    def _connection(self, record):
+        self.connections += 1
+        missing = [key for key in CONNECTION_KEYS if key not in record]
+        if missing:
+            self.problem(f"Conexão {record.get('id')} sem os campos {missing}")
+            return
+        if record['id'] in self.connection_ids:
+            self.problem(f"Conexão {record['id']} repetida")
+        self.connection_ids.add(record['id'])
+        # Os formatos gravam todos os elementos antes das conexões
+        for end in ('source_id', 'target_id'):
+            if record[end] not in self.element_ids:
+                self.problem(f"Conexão {record['id']}: {end} {record[end]} não existe")
+        if record['source_id'] == record['target_id']:
+            self.problem(f"Conexão {record['id']} liga {record['source_id']} a ele mesmo")
+
+    def check(self, records):
+        """Repassa os (tipo, registro) válidos; no fim, se houve problemas,
+        levanta DocumentFormatError (e a gravação em curso é descartada).
+        Registros com problema não seguem: o formato de destino não os aceitaria"""
+        for kind, record in records:
+            count = self.problem_count
+            if kind == 'element':
+                self._element(record)
+            else:
+                self._connection(record)
+            if self.problem_count == count:
+                yield kind, record
+        if self.problem_count:
+            raise DocumentFormatError(f"{self.problem_count} problema(s) no documento")
+
+
+def convert_file(path, output=None, target=None, compress=False, only_from=None):
+    """Valida um arquivo e, com `target`, grava-o nesse formato em `output`.
+
+    Devolve um resumo serializável em JSON; status é 'ok', 'invalid'
+    (documento com problemas, nada gravado), 'skipped' (formato de origem
+    fora de `only_from`) ou 'error' (arquivo ilegível, falta de memória...).
+    """
+    result = {'path': str(path), 'format': None, 'output': None, 'target': target,
+              'status': 'ok', 'elements': 0, 'connections': 0, 'problems': [],
+              'problem_count': 0, 'error': None}
+    start = time.perf_counter()
+    checker = RecordChecker()
+    try:
+        source = detect_format(path)
+        result['format'] = source
+        if only_from and source not in only_from:
+            result['status'] = 'skipped'
+        elif target is None:
+            for _ in checker.check(iter_records(path, source)):
+                pass
+        else:
+            output = Path(output or path)
+            output.parent.mkdir(parents=True, exist_ok=True)
+            save_records(checker.check(iter_records(path, source)), output, target, compress)
+            result['output'] = str(output)
+    except DocumentFormatError as e:
+        result.update(status='invalid' if checker.problem_count else 'error', error=str(e))
+    except MemoryError:
+        result.update(status='error', error="MemoryError: limite de memória do worker")
+    except Exception as e:
+        logger.error(f"Falha ao converter {path}: {e}")
+        result.update(status='error', error=f"{type(e).__name__}: {e}")
+    result.update(elements=checker.elements, connections=checker.connections,
+                  problems=checker.problems, problem_count=checker.problem_count,
+                  total_ms=(time.perf_counter() - start) * 1000,
+                  worker_peak_mb=_peak_rss_mb())
+    return result
+
+
+def _convert_pair(pair, target, options):
+    path, output = pair
+    return convert_file(path, output, target, **options)
+
+
+def convert_batch(files, target=None, jobs=None, max_memory_mb=None, max_tasks_per_worker=None,
+                  **options):
+    """Converte/valida os pares (arquivo, saída) em paralelo, num pool de processos.
+
+    Gera os resultados à medida que cada arquivo termina. Com jobs=1 tudo
+    roda no processo atual. `max_memory_mb` limita cada worker e
+    `max_tasks_per_worker` recria o worker depois de N arquivos, devolvendo
+    ao sistema a memória que o alocador do Python retém.
+    """
+    files = list(files)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(files) <= 1:
+        for path, output in files:
+            yield convert_file(path, output, target, **options)
+        return
+
+    # multiprocessing.Pool e não ProcessPoolExecutor: o max_tasks_per_child
+    # do executor trava no Python 3.11 quando um worker é recriado.
+    # 'spawn': workers limpos, sem herdar o estado (e a memória) do pai
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(min(jobs, len(files)), initializer=limit_memory, initargs=(max_memory_mb,),
+                      maxtasksperchild=max_tasks_per_worker) as pool:
+        yield from pool.imap_unordered(partial(_convert_pair, target=target, options=options),
+                                       files)
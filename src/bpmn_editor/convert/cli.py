@@ -0,0 +1,118 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from ..formats import FORMATS
+from .batch import TARGET_FORMATS
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def collect_files(inputs, output_dir=None, recursive=False, pattern='*.bpmn'):
+    """Pares (arquivo, saída). A saída repete, em `output_dir`, o caminho do
+    arquivo relativo ao diretório informado; sem `output_dir` é o próprio arquivo"""
+    files = []
+    for name in inputs:
+        path = Path(name)
+        if path.is_dir():
+            found = sorted(path.glob('**/' + pattern if recursive else pattern))
+            files.extend((f, Path(output_dir) / f.relative_to(path) if output_dir else f)
+                         for f in found)
+        else:
+            files.append((path, Path(output_dir) / path.name if output_dir else path))
+    return files
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='bpmn-convert',
+        description="Valida e converte diagramas .bpmn em lote, sem interface gráfica")
+    parser.add_argument('inputs', nargs='+', help="arquivos .bpmn ou diretórios")
+    parser.add_argument('-t', '--to', choices=TARGET_FORMATS, default=None,
+                        help="formato de destino (sem ele, só valida)")
+    destination = parser.add_mutually_exclusive_group()
+    destination.add_argument('-o', '--output-dir', default=None,
+                             help="diretório de saída (mantém a estrutura dos diretórios)")
+    destination.add_argument('--in-place', action='store_true',
+                             help="substitui cada arquivo pelo convertido")
+    parser.add_argument('--from', dest='only_from', action='append', choices=tuple(FORMATS),
+                        help="converte só arquivos neste formato (pode repetir); "
+                             "os outros saem como 'skipped'")
+    parser.add_argument('-z', '--compress', action='store_true',
+                        help="grava com gzip (formatos de fluxo)")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="processos em paralelo (padrão: número de CPUs)")
+    parser.add_argument('--max-memory', type=float, default=None, metavar='MB',
+                        help="limite de memória de cada processo")
+    parser.add_argument('--max-tasks-per-worker', type=int, default=100, metavar='N',
+                        help="recria cada processo depois de N arquivos (0 = nunca)")
+    parser.add_argument('-r', '--recursive', action='store_true')
+    parser.add_argument('--pattern', default='*.bpmn', help="arquivos procurados nos diretórios")
+    parser.add_argument('--json', action='store_true',
+                        help="imprime o resumo em JSON em vez da tabela")
+    return parser
+
+
+def summarize(results, elapsed_ms, jobs):
+    """Resumo do lote, no formato impresso por --json"""
+    return {
+        'files': results,
+        'counts': dict(Counter(r['status'] for r in results)),
+        'formats': dict(Counter(r['format'] for r in results if r['format'])),
+        'elements': sum(r['elements'] for r in results),
+        'connections': sum(r['connections'] for r in results),
+        'elapsed_ms': elapsed_ms,
+        'jobs': jobs,
+    }
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.to and not (args.output_dir or args.in_place):
+        parser.error("--to exige --output-dir ou --in-place")
+    from .batch import convert_batch
+
+    files = collect_files(args.inputs, args.output_dir, args.recursive, args.pattern)
+    if not files:
+        print("Nenhum arquivo .bpmn encontrado", file=sys.stderr)
+        return 2
+
+    jobs = args.jobs or os.cpu_count() or 1
+    start = time.perf_counter()
+    results = []
+    for result in convert_batch(files, args.to, jobs=jobs, max_memory_mb=args.max_memory,
+                                max_tasks_per_worker=args.max_tasks_per_worker or None,
+                                compress=args.compress, only_from=args.only_from):
+        results.append(result)
+        if not args.json:
+            if result['status'] == 'ok':
+                target = f" -> {result['output']}" if result['output'] else ""
+                print(f"ok       {result['path']} ({result['format']}){target}  "
+                      f"{result['elements']} elementos  {result['total_ms']:.1f} ms")
+            elif result['status'] == 'skipped':
+                print(f"ignorado {result['path']} ({result['format']})")
+            else:
+                print(f"{result['status']:<8} {result['path']}: {result['error']}")
+                for problem in result['problems']:
+                    print(f"           {problem}")
+    elapsed = (time.perf_counter() - start) * 1000
+
+    summary = summarize(results, elapsed, jobs)
+    failed = summary['counts'].get('invalid', 0) + summary['counts'].get('error', 0)
+    if args.json:
+        json.dump(summary, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        counts = ", ".join(f"{count} {status}" for status, count in sorted(summary['counts'].items()))
+        print(f"{len(results)} arquivos ({counts}) em {elapsed:.0f} ms com {jobs} processo(s)")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+from PyQt5.QtWidgets import QFileDialog, QLabel
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtCore import Qt
+
+from ..thumbnails.render import THUMBNAIL_SIZE
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class ThumbnailFileDialog(QFileDialog):
+    """Seletor de arquivos .bpmn com prévia ao lado da lista.
+
+    Prévias em cache aparecem na hora; as que faltam são geradas em
+    segundo plano pelo ThumbnailService e mostradas quando ficam prontas.
+    """
+
+    def __init__(self, service, parent=None, caption="", directory="",
+                 filter="BPMN Files (*.bpmn)"):
+        super().__init__(parent, caption, directory, filter)
+        self.service = service
+        self._current = None
+        self.setOption(QFileDialog.DontUseNativeDialog, True)  # Prévia exige o diálogo do Qt
+
+        self.preview = QLabel("Sem prévia")
+        self.preview.setAlignment(Qt.AlignCenter)
+        self.preview.setFixedSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+        layout = self.layout()
+        layout.addWidget(self.preview, 0, layout.columnCount(), layout.rowCount(), 1)
+
+        self.currentChanged.connect(self.show_preview)
+        self.directoryEntered.connect(self.service.prefetch)
+        self.service.signals.ready.connect(self._on_ready)
+        if directory:
+            self.service.prefetch(directory)
+
+    def show_preview(self, path):
+        self._current = path
+        if not path.endswith('.bpmn'):
+            self.preview.setText("Sem prévia")
+            return
+        image = self.service.thumbnail(path)
+        if image is None:
+            self.preview.setText("Gerando prévia...")
+        else:
+            self.preview.setPixmap(QPixmap.fromImage(image))
+
+    def _on_ready(self, path, image):
+        if path == self._current:
+            self.preview.setPixmap(QPixmap.fromImage(image))
+
+    def done(self, result):
+        self.service.signals.ready.disconnect(self._on_ready)
+        super().done(result)
+
+    @classmethod
+    def get_open_file_name(cls, service, parent=None, caption="", directory=""):
+        """Equivalente a QFileDialog.getOpenFileName, com prévias"""
+        dialog = cls(service, parent, caption, directory)
+        dialog.setFileMode(QFileDialog.ExistingFile)
+        if dialog.exec_() == QFileDialog.Accepted and dialog.selectedFiles():
+            return dialog.selectedFiles()[0]
+        return ""
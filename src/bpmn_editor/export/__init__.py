@@ -0,0 +1,4 @@
+from .renderer import EXPORT_FORMATS, render_scene, export_rect
+from .batch import export_file, export_batch
+
+__all__ = ['EXPORT_FORMATS', 'render_scene', 'export_rect', 'export_file', 'export_batch']
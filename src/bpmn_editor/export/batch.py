@@ -0,0 +1,77 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import logging
+logger = logging.getLogger(__name__)
+
+_app = None  # QApplication do processo (uma por worker)
+
+
+def ensure_app():
+    """QApplication sem display; criada uma vez por processo"""
+    global _app
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    _app = QApplication.instance() or QApplication([])
+    return _app
+
+
+def output_path(path, output_dir, format):
+    return Path(output_dir) / (Path(path).stem + '.' + format)
+
+
+def export_file(path, output_dir, format='png', scale=1.0, margin=None, grid=False):
+    """Carrega e exporta um arquivo; devolve o resultado com os tempos em ms"""
+    ensure_app()
+    from ..formats import load_document
+    from ..formats.scene_builder import build_scene
+    from .renderer import render_scene, DEFAULT_MARGIN
+
+    result = {'path': str(path), 'output': None, 'status': 'ok', 'error': None,
+              'elements': 0, 'connections': 0}
+    start = time.perf_counter()
+    try:
+        document = load_document(path)
+        scene, elements, connections = build_scene(document)
+        loaded = time.perf_counter()
+        output = output_path(path, output_dir, format)
+        width, height = render_scene(scene, output, format, scale=scale,
+                                     margin=DEFAULT_MARGIN if margin is None else margin,
+                                     grid=grid)
+        rendered = time.perf_counter()
+        scene.clear()
+        result.update(output=str(output), elements=len(elements),
+                      connections=len(connections), width=width, height=height,
+                      load_ms=(loaded - start) * 1000, render_ms=(rendered - loaded) * 1000)
+    except Exception as e:
+        logger.error(f"Falha ao exportar {path}: {e}")
+        result.update(status='error', error=f"{type(e).__name__}: {e}")
+    result['total_ms'] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def export_batch(paths, output_dir, format='png', jobs=None, **options):
+    """Exporta vários arquivos, distribuídos num pool de processos.
+
+    Gera os resultados à medida que cada arquivo termina. Com jobs=1 tudo
+    roda no processo atual (útil para depuração).
+    """
+    paths = [Path(p) for p in paths]
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(paths) <= 1:
+        for path in paths:
+            yield export_file(path, output_dir, format, **options)
+        return
+
+    # 'spawn': cada worker sobe o próprio Qt, sem herdar estado do pai
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=min(jobs, len(paths)), mp_context=context,
+                             initializer=ensure_app) as pool:
+        futures = [pool.submit(export_file, path, output_dir, format, **options)
+                   for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,79 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from .renderer import EXPORT_FORMATS, DEFAULT_MARGIN
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def collect_files(inputs, recursive=False):
+    """Arquivos .bpmn informados diretamente ou dentro dos diretórios"""
+    files = []
+    for name in inputs:
+        path = Path(name)
+        if path.is_dir():
+            pattern = '**/*.bpmn' if recursive else '*.bpmn'
+            files.extend(sorted(path.glob(pattern)))
+        else:
+            files.append(path)
+    return files
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='bpmn-export',
+        description="Exporta diagramas .bpmn para PNG, SVG ou PDF sem display")
+    parser.add_argument('inputs', nargs='+', help="arquivos .bpmn ou diretórios")
+    parser.add_argument('-o', '--output-dir', default='.', help="diretório de saída")
+    parser.add_argument('-f', '--format', choices=EXPORT_FORMATS, default='png')
+    parser.add_argument('-s', '--scale', type=float, default=1.0,
+                        help="escala da cena (1.0 = 1 px por unidade)")
+    parser.add_argument('--margin', type=float, default=DEFAULT_MARGIN)
+    parser.add_argument('--grid', action='store_true', help="incluir a grade de fundo")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="processos em paralelo (padrão: número de CPUs)")
+    parser.add_argument('-r', '--recursive', action='store_true')
+    parser.add_argument('--json', action='store_true',
+                        help="imprime o resumo em JSON em vez da tabela")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    from .batch import export_batch
+
+    files = collect_files(args.inputs, args.recursive)
+    if not files:
+        print("Nenhum arquivo .bpmn encontrado", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    results = []
+    for result in export_batch(files, args.output_dir, args.format, jobs=args.jobs,
+                               scale=args.scale, margin=args.margin, grid=args.grid):
+        results.append(result)
+        if not args.json:
+            if result['status'] == 'ok':
+                print(f"ok     {result['path']} -> {result['output']}  "
+                      f"carga {result['load_ms']:.1f} ms  render {result['render_ms']:.1f} ms  "
+                      f"total {result['total_ms']:.1f} ms")
+            else:
+                print(f"erro   {result['path']}: {result['error']}")
+    elapsed = (time.perf_counter() - start) * 1000
+
+    failed = sum(1 for r in results if r['status'] != 'ok')
+    if args.json:
+        json.dump({'files': results, 'failed': failed, 'elapsed_ms': elapsed},
+                  sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        print(f"{len(results) - failed}/{len(results)} exportados em {elapsed:.0f} ms")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,162 @@
+import math
+import struct
+import zlib
+from contextlib import contextmanager
+
+from PyQt5.QtCore import Qt, QRectF, QSize, QSizeF, QMarginsF
+from PyQt5.QtGui import QImage, QPainter, QPdfWriter, QPageSize
+from PyQt5.QtSvg import QSvgGenerator
+
+import logging
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ('png', 'svg', 'pdf')
+DEFAULT_MARGIN = 20
+
+# Pixels por faixa renderizada do PNG (4M px = 16 MB em RGBA). Cenas
+# maiores são desenhadas em faixas horizontais e comprimidas à medida
+# que saem, então a memória não cresce com o tamanho da imagem.
+BAND_PIXELS = 4_000_000
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def export_rect(scene, margin=DEFAULT_MARGIN):
+    """Área exportada: todos os itens mais a margem"""
+    rect = scene.itemsBoundingRect()
+    if rect.isEmpty():
+        rect = QRectF(0, 0, 1, 1)
+    return rect.adjusted(-margin, -margin, margin, margin)
+
+
+@contextmanager
+def export_state(scene):
+    """Esconde a seleção durante a exportação, restaurando depois"""
+    selected = [item for item in scene.items() if item.isSelected()]
+    scene.clearSelection()
+    try:
+        yield
+    finally:
+        for item in selected:
+            item.setSelected(True)
+
+
+def _render(scene, painter, target, source, grid):
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setRenderHint(QPainter.TextAntialiasing)
+    if grid or not hasattr(scene, 'render_content'):
+        scene.render(painter, target, source, Qt.IgnoreAspectRatio)
+    else:
+        scene.render_content(painter, target, source)  # Sem a grade de fundo
+
+
+def _png_chunk(kind, data):
+    chunk = kind + data
+    return struct.pack('>I', len(data)) + chunk + struct.pack('>I', zlib.crc32(chunk))
+
+
+class PngStreamWriter:
+    """Grava um PNG RGBA linha a linha (IDAT em pedaços, memória constante)"""
+
+    def __init__(self, stream, width, height, level=6):
+        self.stream = stream
+        self.width = width
+        self._compressor = zlib.compressobj(level)
+        stream.write(PNG_SIGNATURE)
+        header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+        stream.write(_png_chunk(b'IHDR', header))
+
+    def write_image(self, image):
+        """Acrescenta as linhas de uma faixa (QImage em Format_RGBA8888)"""
+        row_bytes = self.width * 4
+        stride = image.bytesPerLine()
+        bits = image.constBits()
+        bits.setsize(image.sizeInBytes())
+        data = bytes(bits)
+        rows = b''.join(b'\x00' + data[y * stride:y * stride + row_bytes]
+                        for y in range(image.height()))
+        compressed = self._compressor.compress(rows)
+        if compressed:
+            self.stream.write(_png_chunk(b'IDAT', compressed))
+
+    def close(self):
+        self.stream.write(_png_chunk(b'IDAT', self._compressor.flush()))
+        self.stream.write(_png_chunk(b'IEND', b''))
+
+
+def render_png(scene, path, scale=1.0, margin=DEFAULT_MARGIN, grid=False,
+               band_pixels=BAND_PIXELS):
+    source = export_rect(scene, margin)
+    width = max(1, math.ceil(source.width() * scale))
+    height = max(1, math.ceil(source.height() * scale))
+    band = max(1, band_pixels // width)
+
+    if height <= band:
+        # Cabe numa faixa só: o codificador do Qt é mais rápido
+        image = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+        image.fill(Qt.white)
+        painter = QPainter(image)
+        _render(scene, painter, QRectF(0, 0, width, height), source, grid)
+        painter.end()
+        if not image.save(str(path), 'PNG'):
+            raise OSError(f"Falha ao gravar {path}")
+        return width, height
+
+    with open(path, 'wb') as f:
+        writer = PngStreamWriter(f, width, height)
+        for top in range(0, height, band):
+            rows = min(band, height - top)
+            # Mesmo formato do caminho de uma faixa, para pixels idênticos
+            image = QImage(width, rows, QImage.Format_ARGB32_Premultiplied)
+            image.fill(Qt.white)
+            painter = QPainter(image)
+            _render(scene, painter, QRectF(0, 0, width, rows),
+                    QRectF(source.left(), source.top() + top / scale,
+                           width / scale, rows / scale), grid)
+            painter.end()
+            writer.write_image(image.convertToFormat(QImage.Format_RGBA8888))
+        writer.close()
+    return width, height
+
+
+def render_svg(scene, path, scale=1.0, margin=DEFAULT_MARGIN, grid=False):
+    source = export_rect(scene, margin)
+    width = max(1, math.ceil(source.width() * scale))
+    height = max(1, math.ceil(source.height() * scale))
+    generator = QSvgGenerator()
+    generator.setFileName(str(path))
+    generator.setSize(QSize(width, height))
+    generator.setViewBox(QRectF(0, 0, width, height))
+    painter = QPainter(generator)
+    _render(scene, painter, QRectF(0, 0, width, height), source, grid)
+    painter.end()
+    return width, height
+
+
+def render_pdf(scene, path, scale=1.0, margin=DEFAULT_MARGIN, grid=False):
+    source = export_rect(scene, margin)
+    width = max(1, math.ceil(source.width() * scale))
+    height = max(1, math.ceil(source.height() * scale))
+    writer = QPdfWriter(str(path))
+    writer.setResolution(72)  # 1 unidade de cena = 1 ponto na escala 1
+    writer.setPageSize(QPageSize(QSizeF(width, height), QPageSize.Point))
+    writer.setPageMargins(QMarginsF(0, 0, 0, 0))
+    painter = QPainter(writer)
+    _render(scene, painter, QRectF(painter.viewport()), source, grid)
+    painter.end()
+    return width, height
+
+
+RENDERERS = {
+    'png': render_png,
+    'svg': render_svg,
+    'pdf': render_pdf,
+}
+
+
+def render_scene(scene, path, format=None, scale=1.0, margin=DEFAULT_MARGIN, grid=False):
+    """Exporta a cena para PNG, SVG ou PDF; devolve (largura, altura) em pixels/pontos"""
+    format = (format or str(path).rsplit('.', 1)[-1]).lower()
+    if format not in RENDERERS:
+        raise ValueError(f"Formato de exportação inválido: {format}")
+    with export_state(scene):
+        return RENDERERS[format](scene, path, scale=scale, margin=margin, grid=grid)
@@ -0,0 +1,206 @@
+import gzip
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from ..utils.exceptions import DocumentFormatError
+from .document import (SCHEMA_VERSION, document_from_scene, validate_document,
+                       iter_scene_records, iter_document_records)
+from . import ndjson_format, binary_format, pickle_format, bpmn_xml, revisions
+from .binary_format import BinaryDocument
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Nome do formato -> módulo com sniff/load/dump (e, se for de fluxo,
+# iter_records/dump_records). 'binary' é o contêiner mapeado em memória
+# para mapas grandes; 'xml' é o BPMN 2.0 das outras ferramentas; 'pickle'
+# é o formato legado, só lido para migrar.
+FORMATS = {
+    'ndjson': ndjson_format,
+    'binary': binary_format,
+    'xml': bpmn_xml,
+    'pickle': pickle_format,
+}
+DEFAULT_FORMAT = 'ndjson'
+SNIFF_BYTES = 64
+# Formatos de fluxo podem ser gravados comprimidos com gzip; a leitura
+# descomprime sozinha. O binário não: ele é lido com mmap.
+GZIP_MAGIC = b'\x1f\x8b'
+COMPRESS_LEVEL = 6
+
+
+def is_compressed(path):
+    """O arquivo foi gravado com gzip"""
+    with open(path, 'rb') as f:
+        return f.read(2) == GZIP_MAGIC
+
+
+def _open_read(path):
+    """Arquivo para leitura, descomprimindo se for gzip"""
+    return gzip.open(path, 'rb') if is_compressed(path) else open(path, 'rb')
+
+
+def detect_format(path):
+    """Formato do arquivo pelos primeiros bytes (a extensão é sempre .bpmn)"""
+    with _open_read(path) as f:
+        try:
+            head = f.read(SNIFF_BYTES)
+        except (OSError, EOFError) as e:  # gzip corrompido
+            raise DocumentFormatError(f"Arquivo comprimido inválido: {path}") from e
+    for name, module in FORMATS.items():
+        if module.sniff(head):
+            return name
+    raise DocumentFormatError(f"Formato não reconhecido: {path}")
+
+
+def load_document(path, format=None):
+    format = format or detect_format(path)
+    if format not in FORMATS:
+        raise DocumentFormatError(f"Formato desconhecido: {format}")
+    with _open_read(path) as f:
+        return FORMATS[format].load(f)
+
+
+@contextmanager
+def _replace_atomically(path):
+    """Grava num temporário, faz fsync e troca no fim: leitores (e um
+    arquivo binário aberto com mmap) nunca veem o arquivo pela metade"""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, 'wb') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    try:
+        # A troca de nome também precisa chegar ao disco
+        directory = os.open(path.parent, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(directory)
+    except OSError:
+        pass
+    finally:
+        os.close(directory)
+
+
+def _counting(records, total, progress, step):
+    for done, record in enumerate(records, start=1):
+        if done % step == 0:
+            progress(done, total)
+        yield record
+    progress(total, total)
+
+
+def save_document(document, path, format=DEFAULT_FORMAT, compress=False, progress=None):
+    """Grava o documento; `progress(feitos, total)` é chamado a cada ~1% dos registros"""
+    if format not in FORMATS:
+        raise DocumentFormatError(f"Formato desconhecido: {format}")
+    module = FORMATS[format]
+    if compress and not hasattr(module, 'dump_records'):
+        raise DocumentFormatError(f"O formato {format} não pode ser comprimido")
+    with _replace_atomically(path) as f:
+        stream = gzip.GzipFile(fileobj=f, mode='wb', compresslevel=COMPRESS_LEVEL) if compress else f
+        try:
+            if progress is not None and hasattr(module, 'dump_records'):
+                total = len(document.get('elements', [])) + len(document.get('connections', []))
+                module.dump_records(_counting(iter_document_records(document), total, progress,
+                                              max(1, total // 100)), stream)
+            else:
+                module.dump(document, stream)
+                if progress is not None:
+                    progress(1, 1)
+        finally:
+            if compress:
+                stream.close()  # Só fecha o gzip; o arquivo é fechado por _replace_atomically
+    return Path(path)
+
+
+def save_records(records, path, format=DEFAULT_FORMAT, compress=False):
+    """Grava (tipo, registro) à medida que chegam (ex.: vindos de iter_records).
+
+    Se `records` levantar uma exceção, o arquivo anterior fica intacto.
+    O binário precisa do documento inteiro: os registros são juntados antes.
+    """
+    if format not in FORMATS:
+        raise DocumentFormatError(f"Formato desconhecido: {format}")
+    module = FORMATS[format]
+    if compress and not hasattr(module, 'dump_records'):
+        raise DocumentFormatError(f"O formato {format} não pode ser comprimido")
+    with _replace_atomically(path) as f:
+        if not hasattr(module, 'dump_records'):
+            document = {'elements': [], 'connections': []}
+            for kind, record in records:
+                document[kind + 's'].append(record)
+            module.dump(document, f)
+        elif compress:
+            with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=COMPRESS_LEVEL) as stream:
+                module.dump_records(records, stream)
+        else:
+            module.dump_records(records, f)
+    return Path(path)
+
+
+def iter_records(path, format=None):
+    """Gera (tipo, registro) do arquivo; formatos de fluxo não carregam o arquivo inteiro"""
+    format = format or detect_format(path)
+    if format not in FORMATS:
+        raise DocumentFormatError(f"Formato desconhecido: {format}")
+    module = FORMATS[format]
+    with _open_read(path) as f:
+        if hasattr(module, 'iter_records'):
+            yield from module.iter_records(f)
+        else:
+            yield from iter_document_records(module.load(f))
+
+
+def save_scene(scene, path, format=DEFAULT_FORMAT):
+    """Grava a cena direto do modelo, registro a registro quando o formato permite"""
+    module = FORMATS.get(format)
+    if module is None:
+        raise DocumentFormatError(f"Formato desconhecido: {format}")
+    if not hasattr(module, 'dump_records'):
+        return save_document(document_from_scene(scene), path, format)
+    with _replace_atomically(path) as f:
+        module.dump_records(iter_scene_records(scene), f)
+    return Path(path)
+
+
+def migrate_file(path, target=None, format=DEFAULT_FORMAT):
+    """Regrava um .bpmn antigo (ex.: pickle) no formato atual; devolve o caminho gravado"""
+    target = target or path
+    document = load_document(path)
+    return save_document(document, target, format)
+
+
+def save_revision(parent, document, path):
+    """Grava `document` como delta comprimido em relação a `parent`; devolve o delta"""
+    delta = revisions.make_delta(parent, document)
+    with _replace_atomically(path) as f:
+        with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=COMPRESS_LEVEL) as stream:
+            revisions.dump_delta(delta, stream)
+    return delta
+
+
+def load_revision(parent, path):
+    """Documento de uma revisão gravada com save_revision, a partir da mãe"""
+    with _open_read(path) as f:
+        try:
+            delta = revisions.load_delta(f)
+        except (OSError, EOFError) as e:
+            raise DocumentFormatError(f"Arquivo comprimido inválido: {path}") from e
+    return revisions.apply_delta(parent, delta)
+
+
+__all__ = ['FORMATS', 'DEFAULT_FORMAT', 'SCHEMA_VERSION', 'DocumentFormatError',
+           'detect_format', 'is_compressed', 'load_document', 'save_document', 'save_records',
+           'iter_records', 'save_scene',
+           'migrate_file', 'document_from_scene', 'validate_document', 'BinaryDocument',
+           'save_revision', 'load_revision']
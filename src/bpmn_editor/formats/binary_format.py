@@ -0,0 +1,227 @@
+import io
+import json
+import mmap
+import struct
+
+from ..utils.exceptions import DocumentFormatError
+from ..models.geometry import default_size
+from .document import SCHEMA_VERSION, validate_document, migrate_record
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Contêiner binário para mapas grandes, aberto com mmap:
+#   cabeçalho | tabela de elementos | tabela de conexões | heap de strings
+# As tabelas têm registros de largura fixa (little-endian); todo texto
+# (ids, nomes, descrições, ações e listas de conexões em JSON) fica no
+# heap em UTF-8 e é referenciado por (deslocamento, tamanho) relativos
+# ao início do heap. A lista de tipos é um JSON no heap; cada elemento
+# guarda só o índice do seu tipo.
+MAGIC = b'BPMNBIN1'
+HEADER = struct.Struct('<8sHHIIIIQQQQ')
+# id, tipo, x, y, largura, altura, nome, descrição, ações, conexões
+ELEMENT = struct.Struct('<IIHxxddddIIIIIIII')
+# id, índice da origem, índice do destino
+CONNECTION = struct.Struct('<IIII')
+
+
+def sniff(head):
+    return head.startswith(MAGIC)
+
+
+class _Heap:
+    """Acumula strings UTF-8, reaproveitando as repetidas"""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+        self._refs = {'': (0, 0)}
+
+    def add(self, text):
+        ref = self._refs.get(text)
+        if ref is None:
+            data = text.encode('utf-8')
+            ref = self._refs[text] = (self.buffer.tell(), len(data))
+            self.buffer.write(data)
+        return ref
+
+    def add_json(self, value):
+        return self.add(json.dumps(value, ensure_ascii=False, separators=(',', ':')))
+
+
+def dump(document, stream):
+    heap = _Heap()
+    types = {}
+    index_of = {}
+    elements = bytearray()
+    for index, record in enumerate(document.get('elements', [])):
+        index_of[record['id']] = index
+        type_index = types.setdefault(record['type'], len(types))
+        width, height = record.get('size') or default_size(record['type'])
+        x, y = record['pos']
+        elements += ELEMENT.pack(*heap.add(record['id']), type_index, x, y, width, height,
+                                 *heap.add(record['name']),
+                                 *heap.add(record.get('description') or ""),
+                                 *heap.add_json(record.get('actions') or {}),
+                                 *heap.add_json(list(record.get('connections') or [])))
+    connections = bytearray()
+    for record in document.get('connections', []):
+        try:
+            source, target = index_of[record['source_id']], index_of[record['target_id']]
+        except KeyError as e:
+            raise DocumentFormatError(f"Conexão {record['id']} referencia o elemento {e} "
+                                      f"inexistente") from e
+        connections += CONNECTION.pack(*heap.add(record['id']), source, target)
+    type_ref = heap.add_json(list(types))
+
+    element_offset = HEADER.size
+    connection_offset = element_offset + len(elements)
+    heap_offset = connection_offset + len(connections)
+    heap_data = heap.buffer.getvalue()
+    stream.write(HEADER.pack(MAGIC, SCHEMA_VERSION, 0, len(index_of),
+                             len(connections) // CONNECTION.size, *type_ref,
+                             element_offset, connection_offset, heap_offset, len(heap_data)))
+    stream.write(elements)
+    stream.write(connections)
+    stream.write(heap_data)
+
+
+class BinaryDocument:
+    """Documento binário mapeado em memória.
+
+    A geometria (ids, tipos, posições, tamanhos e as pontas das conexões)
+    é lida na abertura; nome, descrição, ações e a lista de conexões de
+    cada elemento só são decodificados do heap quando pedidos
+    (`element_text`, `element_record`). O mapeamento fica aberto enquanto houver
+    referência ao documento ou até `close()`.
+    """
+
+    def __init__(self, file):
+        """`file` é um caminho ou um arquivo binário já aberto"""
+        self._map = None
+        if hasattr(file, 'fileno'):
+            self._map = self._open_map(file)
+        else:
+            with open(file, 'rb') as f:
+                self._map = self._open_map(f)
+        try:
+            self._read_tables()
+        except DocumentFormatError:
+            self.close()
+            raise
+        except (struct.error, ValueError, IndexError) as e:
+            self.close()
+            raise DocumentFormatError(f"Arquivo binário corrompido: {e}") from e
+
+    def _read_tables(self):
+        (magic, version, _, element_count, connection_count, types_offset, types_length,
+         self._element_offset, connection_offset, self._heap, heap_size) = \
+            HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise DocumentFormatError("Arquivo não é um documento binário BPMN")
+        if version > SCHEMA_VERSION:
+            raise DocumentFormatError(f"Versão de esquema {version} é mais nova que "
+                                      f"a suportada ({SCHEMA_VERSION})")
+        if self._heap + heap_size > len(self._map):
+            raise DocumentFormatError("Arquivo binário truncado")
+        self.version = version
+        self.types = json.loads(self._string(types_offset, types_length))
+
+        self.ids, self.element_types, self.positions, self.sizes = [], [], [], []
+        end = self._element_offset + element_count * ELEMENT.size
+        for row in ELEMENT.iter_unpack(self._map[self._element_offset:end]):
+            self.ids.append(self._string(row[0], row[1]))
+            self.element_types.append(self.types[row[2]])
+            self.positions.append((row[3], row[4]))
+            self.sizes.append((row[5], row[6]))
+
+        self.connections = []  # (id, índice da origem, índice do destino)
+        end = connection_offset + connection_count * CONNECTION.size
+        for offset, length, source, target in CONNECTION.iter_unpack(
+                self._map[connection_offset:end]):
+            if source >= element_count or target >= element_count:
+                raise DocumentFormatError("Conexão aponta para um elemento inexistente")
+            self.connections.append((self._string(offset, length), source, target))
+
+    @staticmethod
+    def _open_map(f):
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:  # Arquivo vazio
+            raise DocumentFormatError(f"Arquivo binário vazio: {f.name}") from e
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._map is not None and not self._map.closed:
+            self._map.close()
+
+    def _string(self, offset, length):
+        start = self._heap + offset
+        return self._map[start:start + length].decode('utf-8')
+
+    def _text_refs(self, index):
+        return ELEMENT.unpack_from(self._map, self._element_offset + index * ELEMENT.size)[7:]
+
+    def element_text(self, index):
+        """(nome, descrição, ações) do elemento, decodificados agora"""
+        (name_offset, name_length, description_offset, description_length,
+         actions_offset, actions_length, _, _) = self._text_refs(index)
+        return (self._string(name_offset, name_length),
+                self._string(description_offset, description_length),
+                json.loads(self._string(actions_offset, actions_length)))
+
+    def element_connections(self, index):
+        return json.loads(self._string(*self._text_refs(index)[6:]))
+
+    def element_record(self, index):
+        """Registro completo (campos de __getstate__ + texto editável) do elemento"""
+        name, description, actions = self.element_text(index)
+        record = {
+            'id': self.ids[index],
+            'type': self.element_types[index],
+            'pos': self.positions[index],
+            'name': name,
+            'connections': self.element_connections(index),
+            'description': description,
+            'actions': actions,
+        }
+        if self.sizes[index] != default_size(record['type']):
+            record['size'] = self.sizes[index]
+        return migrate_record('element', record, self.version)
+
+    def connection_record(self, index):
+        connection_id, source, target = self.connections[index]
+        record = {'id': connection_id, 'source_id': self.ids[source],
+                  'target_id': self.ids[target]}
+        return migrate_record('connection', record, self.version)
+
+    def to_document(self):
+        return {
+            'elements': [self.element_record(i) for i in range(len(self))],
+            'connections': [self.connection_record(i) for i in range(len(self.connections))],
+        }
+
+
+def load(stream):
+    """Documento completo (todos os textos decodificados); ver BinaryDocument para abrir sob demanda"""
+    document = BinaryDocument(stream)
+    try:
+        return validate_document(document.to_document())
+    finally:
+        document.close()
+
+
+def iter_records(stream):
+    """Gera (tipo, registro) decodificando um elemento por vez"""
+    with BinaryDocument(stream) as document:
+        for index in range(len(document)):
+            yield 'element', document.element_record(index)
+        for index in range(len(document.connections)):
+            yield 'connection', document.connection_record(index)
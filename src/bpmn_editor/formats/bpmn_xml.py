@@ -0,0 +1,253 @@
+import json
+import re
+import shutil
+import tempfile
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape, quoteattr
+
+from ..utils.exceptions import DocumentFormatError
+from ..models.geometry import default_size
+from .document import iter_document_records
+
+import logging
+logger = logging.getLogger(__name__)
+
+# BPMN 2.0 XML (modelo semântico + BPMNDI), para trocar modelos com
+# outras ferramentas. Só os nós de fluxo e os sequenceFlow entram no
+# documento; o resto (raias, dados, anotações...) é ignorado na leitura.
+# Na leitura as formas (BPMNShape) dão posição e tamanho; as arestas
+# (BPMNEdge) não, porque o editor traça os próprios caminhos. As ações
+# de cada elemento vão em extensionElements, no namespace do editor.
+BPMN_NS = 'http://www.omg.org/spec/BPMN/20100524/MODEL'
+BPMNDI_NS = 'http://www.omg.org/spec/BPMN/20100524/DI'
+DC_NS = 'http://www.omg.org/spec/DD/20100524/DC'
+DI_NS = 'http://www.omg.org/spec/DD/20100524/DI'
+EDITOR_NS = 'urn:bpmn-editor:extensions'
+
+# Tag BPMN -> tipo do editor. O editor só tem um tipo de evento, de
+# atividade e de gateway; na gravação cada tipo volta para EXPORT_TAGS.
+TAG_TYPES = {
+    **dict.fromkeys(('startEvent', 'endEvent', 'intermediateCatchEvent',
+                     'intermediateThrowEvent', 'boundaryEvent'), 'start'),
+    **dict.fromkeys(('task', 'userTask', 'serviceTask', 'scriptTask', 'manualTask',
+                     'sendTask', 'receiveTask', 'businessRuleTask', 'callActivity'), 'task'),
+    **dict.fromkeys(('exclusiveGateway', 'parallelGateway', 'inclusiveGateway',
+                     'eventBasedGateway', 'complexGateway'), 'gateway'),
+}
+# Subprocessos viram uma tarefa e os nós de dentro entram no mesmo nível
+# (lidos no início da tag, para não reter o subprocesso inteiro)
+CONTAINER_TAGS = {'subProcess', 'adHocSubProcess', 'transaction'}
+EXPORT_TAGS = {'start': 'startEvent', 'task': 'task', 'gateway': 'exclusiveGateway'}
+
+# Ids do BPMN são xsd:ID (NCName): não podem começar com dígito, como
+# metade dos uuid4().hex do editor. Esses ganham ID_PREFIX na gravação,
+# que sai de novo na leitura (um NCName nunca o recebe, então não há ambiguidade)
+ID_PREFIX = 'id_'
+NCNAME = re.compile(r'[^\W\d][\w.\-]*\Z')
+
+
+def export_id(value):
+    return value if NCNAME.match(value) else ID_PREFIX + value
+
+
+def import_id(value):
+    if value and value.startswith(ID_PREFIX):
+        original = value[len(ID_PREFIX):]
+        if original and not NCNAME.match(original):
+            return original
+    return value
+
+
+def sniff(head):
+    return head.lstrip(b'\xef\xbb\xbf').lstrip().startswith(b'<')
+
+
+def _split(tag):
+    """('namespace', 'nome') de uma tag do ElementTree"""
+    if tag[:1] == '{':
+        namespace, _, name = tag[1:].partition('}')
+        return namespace, name
+    return '', tag
+
+
+def _element_record(node, name):
+    record = {
+        'id': import_id(node.get('id')),
+        'type': TAG_TYPES.get(name, 'task'),
+        'pos': (0.0, 0.0),
+        'name': node.get('name') or "",
+        'connections': [],
+        'description': "",
+        'actions': {},
+    }
+    for child in node:
+        namespace, child_name = _split(child.tag)
+        if namespace != BPMN_NS:
+            continue
+        if child_name in ('incoming', 'outgoing') and child.text:
+            record['connections'].append(import_id(child.text.strip()))
+        elif child_name == 'documentation':
+            record['description'] = child.text or ""
+        elif child_name == 'extensionElements':
+            for action in child.iter(f'{{{EDITOR_NS}}}action'):
+                record['actions'][action.get('name')] = json.loads(action.get('value', 'null'))
+    return record
+
+
+def _place(record, bounds):
+    x, y = float(bounds.get('x', 0)), float(bounds.get('y', 0))
+    width, height = float(bounds.get('width', 0)), float(bounds.get('height', 0))
+    # BPMNDI usa o canto superior esquerdo; o editor, o centro
+    record['pos'] = (x + width / 2, y + height / 2)
+    if (width, height) != default_size(record['type']):
+        record['size'] = (width, height)
+
+
+def iter_records(stream):
+    """Gera (tipo, registro) com iterparse, descartando cada nó já lido.
+
+    Um elemento só sai quando a sua forma (BPMNShape) é lida, e as
+    conexões só depois de todos os elementos; até lá ficam os registros,
+    nunca a árvore XML.
+    """
+    pending = {}       # id -> registro de elemento ainda sem forma
+    seen = set()       # ids de elementos já emitidos
+    flows = []
+    stack = []
+    captured = None    # Nó cujos filhos ainda serão lidos (ex.: documentation)
+    try:
+        for event, node in ET.iterparse(stream, events=('start', 'end')):
+            namespace, name = _split(node.tag)
+            if event == 'start':
+                stack.append(node)
+                if captured is not None:
+                    continue
+                if namespace == BPMN_NS and name in CONTAINER_TAGS:
+                    record = _element_record(node, name)
+                    pending[record['id']] = record
+                elif ((namespace == BPMN_NS and (name in TAG_TYPES or name == 'sequenceFlow'))
+                      or (namespace == BPMNDI_NS and name == 'BPMNShape')):
+                    captured = node
+                continue
+
+            stack.pop()
+            if captured is not None and node is not captured:
+                continue
+            captured = None
+            if namespace == BPMN_NS and name in TAG_TYPES:
+                record = _element_record(node, name)
+                pending[record['id']] = record
+            elif namespace == BPMN_NS and name == 'sequenceFlow':
+                flows.append({'id': import_id(node.get('id')),
+                              'source_id': import_id(node.get('sourceRef')),
+                              'target_id': import_id(node.get('targetRef'))})
+            elif namespace == BPMNDI_NS and name == 'BPMNShape':
+                record = pending.pop(import_id(node.get('bpmnElement')), None)
+                if record is not None:
+                    bounds = node.find(f'{{{DC_NS}}}Bounds')
+                    if bounds is not None:
+                        _place(record, bounds)
+                    seen.add(record['id'])
+                    yield 'element', record
+            if stack:
+                stack[-1].remove(node)  # Memória limitada: o nó lido sai da árvore
+    except ET.ParseError as e:
+        raise DocumentFormatError(f"XML inválido: {e}") from e
+
+    for record in pending.values():
+        logger.warning(f"Elemento {record['id']} sem forma no diagrama; posto na origem")
+        seen.add(record['id'])
+        yield 'element', record
+    for record in flows:
+        if record['source_id'] in seen and record['target_id'] in seen:
+            yield 'connection', record
+        else:
+            logger.warning(f"Fluxo {record['id']} liga elementos não suportados; ignorado")
+
+
+def load(stream):
+    document = {'elements': [], 'connections': []}
+    for kind, record in iter_records(stream):
+        document[kind + 's'].append(record)
+    return document
+
+
+def _write(stream, text):
+    stream.write(text.encode('utf-8'))
+
+
+def _element_xml(record):
+    tag = EXPORT_TAGS.get(record['type'], 'task')
+    attributes = (f"id={quoteattr(export_id(record['id']))} "
+                  f"name={quoteattr(record['name'] or '')}")
+    body = []
+    if record.get('description'):
+        body.append(f"      <bpmn:documentation>{escape(record['description'])}"
+                    f"</bpmn:documentation>\n")
+    if record.get('actions'):
+        body.append("      <bpmn:extensionElements>\n")
+        for action, value in record['actions'].items():
+            body.append(f"        <editor:action name={quoteattr(str(action))} "
+                        f"value={quoteattr(json.dumps(value, ensure_ascii=False))}/>\n")
+        body.append("      </bpmn:extensionElements>\n")
+    if not body:
+        return f"    <bpmn:{tag} {attributes}/>\n"
+    return f"    <bpmn:{tag} {attributes}>\n{''.join(body)}    </bpmn:{tag}>\n"
+
+
+def _number(value):
+    """Menor texto que relê o mesmo float (o :g corta em 6 dígitos)"""
+    text = repr(float(value))
+    return text[:-2] if text.endswith('.0') else text
+
+
+def dump_records(records, stream):
+    """Grava (tipo, registro) à medida que chegam.
+
+    O processo sai direto no fluxo; as formas e arestas do BPMNDI vão
+    para um temporário em disco e são copiadas no fim. Em memória fica
+    só o retângulo de cada elemento, para os pontos das arestas.
+    """
+    _write(stream, '<?xml version="1.0" encoding="UTF-8"?>\n'
+                   f'<bpmn:definitions xmlns:bpmn="{BPMN_NS}" xmlns:bpmndi="{BPMNDI_NS}" '
+                   f'xmlns:dc="{DC_NS}" xmlns:di="{DI_NS}" xmlns:editor="{EDITOR_NS}" '
+                   'id="Definitions_1" targetNamespace="http://bpmn.io/schema/bpmn">\n'
+                   '  <bpmn:process id="Process_1" isExecutable="false">\n')
+    centers = {}
+    with tempfile.TemporaryFile() as diagram:
+        for kind, record in records:
+            if kind == 'element':
+                width, height = record.get('size') or default_size(record['type'])
+                x, y = record['pos']
+                centers[record['id']] = (x, y)
+                _write(stream, _element_xml(record))
+                xml_id = export_id(record['id'])
+                _write(diagram, f'      <bpmndi:BPMNShape id={quoteattr(xml_id + "_di")} '
+                                f'bpmnElement={quoteattr(xml_id)}>\n'
+                                f'        <dc:Bounds x="{_number(x - width / 2)}" '
+                                f'y="{_number(y - height / 2)}" '
+                                f'width="{_number(width)}" height="{_number(height)}"/>\n'
+                                '      </bpmndi:BPMNShape>\n')
+            else:
+                xml_id = export_id(record['id'])
+                _write(stream, f'    <bpmn:sequenceFlow id={quoteattr(xml_id)} '
+                               f'sourceRef={quoteattr(export_id(record["source_id"]))} '
+                               f'targetRef={quoteattr(export_id(record["target_id"]))}/>\n')
+                waypoints = ''.join(f'        <di:waypoint x="{_number(x)}" y="{_number(y)}"/>\n'
+                                    for x, y in (centers[record['source_id']],
+                                                 centers[record['target_id']]))
+                _write(diagram, f'      <bpmndi:BPMNEdge id={quoteattr(xml_id + "_di")} '
+                                f'bpmnElement={quoteattr(xml_id)}>\n'
+                                f'{waypoints}      </bpmndi:BPMNEdge>\n')
+        _write(stream, '  </bpmn:process>\n'
+                       '  <bpmndi:BPMNDiagram id="BPMNDiagram_1">\n'
+                       '    <bpmndi:BPMNPlane id="BPMNPlane_1" bpmnElement="Process_1">\n')
+        diagram.seek(0)
+        shutil.copyfileobj(diagram, stream)
+    _write(stream, '    </bpmndi:BPMNPlane>\n'
+                   '  </bpmndi:BPMNDiagram>\n'
+                   '</bpmn:definitions>\n')
+
+
+def dump(document, stream):
+    dump_records(iter_document_records(document), stream)
@@ -0,0 +1,124 @@
+from PyQt5.QtCore import Qt
+
+from ..utils.exceptions import DocumentFormatError
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Documento em memória, independente do formato em disco: o mesmo
+# dicionário que save_project grava com pickle, montado a partir de
+# BPMNElement.__getstate__ / BPMNConnection.__getstate__.
+#   {'elements':    [{'id', 'type', 'pos': (x, y), 'name', 'connections'}, ...],
+#    'connections': [{'id', 'source_id', 'target_id'}, ...]}
+# 'description' e 'actions' são opcionais nos elementos.
+ELEMENT_KEYS = ('id', 'type', 'pos', 'name')
+CONNECTION_KEYS = ('id', 'source_id', 'target_id')
+
+# Versão do esquema dos registros. Documentos antigos passam pelas
+# migrações em ordem: MIGRATIONS[v](tipo, registro) devolve o registro na
+# versão v + 1. A versão 0 são os .bpmn gravados com pickle.
+SCHEMA_VERSION = 1
+
+
+def _migrate_v0(kind, record):
+    """pickle -> v1: 'pos' vira tupla e os campos opcionais ganham valor padrão"""
+    if kind == 'element':
+        record['pos'] = tuple(record['pos'])
+        record.setdefault('connections', [])
+        record.setdefault('description', "")
+        record.setdefault('actions', {})
+    return record
+
+
+MIGRATIONS = {0: _migrate_v0}
+
+
+def migrate_record(kind, record, version):
+    """Atualiza um registro ('element' ou 'connection') de `version` até SCHEMA_VERSION"""
+    if version > SCHEMA_VERSION:
+        raise DocumentFormatError(f"Versão de esquema {version} é mais nova que "
+                                  f"a suportada ({SCHEMA_VERSION})")
+    for step in range(version, SCHEMA_VERSION):
+        record = MIGRATIONS[step](kind, record)
+    return record
+
+
+def migrate_document(document, version):
+    if version == SCHEMA_VERSION:
+        return document
+    return {
+        'elements': [migrate_record('element', r, version) for r in document.get('elements', [])],
+        'connections': [migrate_record('connection', r, version)
+                        for r in document.get('connections', [])],
+    }
+
+
+def element_record(element):
+    """Registro de um elemento, com os campos de __getstate__ e o texto editável"""
+    return {
+        'id': element.unique_id,
+        'type': element.element_type,
+        'pos': (element.x(), element.y()),
+        'name': element.name,
+        'connections': [c.unique_id for c in element.connections],
+        'description': element.description,
+        'actions': dict(element.actions),
+    }
+
+
+def connection_record(connection):
+    return {
+        'id': connection.unique_id,
+        'source_id': connection.source.unique_id,
+        'target_id': connection.target.unique_id,
+    }
+
+
+def iter_scene_records(scene):
+    """(tipo, registro) de cada item da cena: primeiro os elementos, depois as conexões"""
+    from ..models.elements import BPMNElement, BPMNConnection
+
+    # Ordem crescente de empilhamento: com o mesmo Z, é a ordem de inserção
+    items = scene.items(Qt.AscendingOrder)
+    for item in items:
+        if isinstance(item, BPMNElement):
+            yield 'element', element_record(item)
+    for item in items:
+        if isinstance(item, BPMNConnection) and item.source and item.target:
+            yield 'connection', connection_record(item)
+
+
+def document_from_scene(scene):
+    """Documento com os elementos e as conexões completas da cena"""
+    document = {'elements': [], 'connections': []}
+    for kind, record in iter_scene_records(scene):
+        document[kind + 's'].append(record)
+    return document
+
+
+def iter_document_records(document):
+    for record in document.get('elements', []):
+        yield 'element', record
+    for record in document.get('connections', []):
+        yield 'connection', record
+
+
+def validate_document(document):
+    """Confere a estrutura do documento; devolve-o para encadear chamadas"""
+    if not isinstance(document, dict):
+        raise DocumentFormatError(f"Documento deve ser um dicionário, não {type(document).__name__}")
+    for key in ('elements', 'connections'):
+        if not isinstance(document.get(key, []), list):
+            raise DocumentFormatError(f"'{key}' deve ser uma lista")
+    for record in document.get('elements', []):
+        if not isinstance(record, dict):
+            # save_model gravava os próprios itens com pickle.dumps
+            raise DocumentFormatError("Elemento serializado como objeto, não como registro")
+        missing = [key for key in ELEMENT_KEYS if key not in record]
+        if missing:
+            raise DocumentFormatError(f"Elemento {record.get('id')} sem os campos {missing}")
+    for record in document.get('connections', []):
+        missing = [key for key in CONNECTION_KEYS if key not in record]
+        if missing:
+            raise DocumentFormatError(f"Conexão {record.get('id')} sem os campos {missing}")
+    return document
@@ -0,0 +1,403 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+from ..utils.exceptions import DocumentFormatError
+from .document import element_record, connection_record
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Diário de edições: arquivo irmão do documento (.nome.bpmn.journal), só
+# com acréscimos, uma operação JSON por linha:
+#   {"journal": "bpmn-journal", "version": 1}
+#   {"op": "add", "record": {...}}            elemento novo
+#   {"op": "connect", "record": {...}}        conexão nova
+#   {"op": "move", "id": ..., "pos": [x, y]}
+#   {"op": "rename", "id": ..., "name": ...}
+#   {"op": "delete", "id": ...}               elemento ou conexão
+# Todas as operações são idempotentes (reaplicar dá o mesmo documento),
+# então uma queda entre gravar o documento compactado e truncar o diário
+# não corrompe nada: na próxima abertura as operações são reaplicadas.
+JOURNAL_NAME = 'bpmn-journal'
+JOURNAL_VERSION = 1
+FLUSH_INTERVAL_MS = 1000   # Perda máxima numa queda: ~1 s de edições
+COMPACT_THRESHOLD = 2000   # Operações acumuladas que disparam a compactação
+# Formatos que o editor lê e grava sem perda; os outros nunca são regravados
+COMPACT_FORMATS = ('ndjson', 'binary', 'pickle')
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+_HEADER = (_encoder.encode({'journal': JOURNAL_NAME, 'version': JOURNAL_VERSION}) + '\n').encode()
+
+
+def journal_path(document_path):
+    path = Path(document_path)
+    return path.with_name(f".{path.name}.journal")
+
+
+def untitled_journal_path():
+    from ..thumbnails.cache import default_cache_dir
+    return default_cache_dir().parent / 'recovery' / 'untitled.journal'
+
+
+def apply_operations(document, operations):
+    """Documento com as operações aplicadas, em ordem (o original não é alterado)"""
+    elements = {record['id']: dict(record) for record in document.get('elements', [])}
+    connections = {record['id']: dict(record) for record in document.get('connections', [])}
+    for operation in operations:
+        op = operation['op']
+        if op == 'add':
+            elements[operation['record']['id']] = dict(operation['record'])
+        elif op == 'connect':
+            connections[operation['record']['id']] = dict(operation['record'])
+        elif op == 'move':
+            if operation['id'] in elements:
+                elements[operation['id']]['pos'] = tuple(operation['pos'])
+        elif op == 'rename':
+            if operation['id'] in elements:
+                elements[operation['id']]['name'] = operation['name']
+        elif op == 'delete':
+            elements.pop(operation['id'], None)
+            connections.pop(operation['id'], None)
+        else:
+            raise DocumentFormatError(f"Operação de diário desconhecida: {op!r}")
+    # Conexões cujas pontas foram removidas somem junto
+    connections = {key: record for key, record in connections.items()
+                   if record['source_id'] in elements and record['target_id'] in elements}
+    for record in elements.values():
+        if 'pos' in record:
+            record['pos'] = tuple(record['pos'])
+    return {'elements': list(elements.values()), 'connections': list(connections.values())}
+
+
+class EditJournal:
+    """Arquivo de diário: acrescenta operações e as relê para recuperação.
+
+    `append` só acumula em memória; `flush` grava o lote e faz fsync.
+    O arquivo só é criado na primeira gravação: abrir um documento sem
+    editá-lo não deixa diário ao lado dele. Gravação e compactação (que
+    pode rodar em outra thread) se coordenam por um lock.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._pending = []
+        self._file = None  # Aberto só quando o arquivo existe
+        self._count = 0    # Operações gravadas
+        # Operações já removidas do início: as marcas contam operações desde
+        # a abertura, então continuam valendo depois de uma compactação
+        self._discarded = 0
+        if self.path.exists():
+            self._drop_partial_line()
+            self._open()
+            self._count = len(self.operations())
+
+    def _open(self):
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._write_header(self.path)
+        self._file = open(self.path, 'ab')
+
+    @staticmethod
+    def _write_header(path):
+        with open(path, 'wb') as f:
+            f.write(_HEADER)
+
+    def _drop_partial_line(self):
+        """Remove o fim de uma gravação interrompida, para não emendar nele"""
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            if not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+
+    def __len__(self):
+        """Operações gravadas ou pendentes"""
+        with self._lock:
+            return self._count + len(self._pending)
+
+    def append(self, operation):
+        with self._lock:
+            self._pending.append(_encoder.encode(operation).encode('utf-8') + b'\n')
+
+    def flush(self):
+        """Grava as operações pendentes e garante que chegaram ao disco"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        if self._file is None:
+            self._open()
+        self._file.write(b''.join(self._pending))
+        self._count += len(self._pending)
+        self._pending.clear()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def operations(self, end=None):
+        """Operações gravadas (até a marca `end`); uma última linha incompleta
+        (queda no meio de uma gravação) é ignorada"""
+        operations = []
+        with self._lock:
+            if self._file is None and not self.path.exists():
+                return operations
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            limit = None if end is None else end - self._discarded
+        lines = data.split(b'\n')
+        try:
+            header = json.loads(lines[0])
+        except ValueError as e:
+            raise DocumentFormatError(f"Diário inválido: {self.path}") from e
+        if header.get('journal') != JOURNAL_NAME or header.get('version', 0) > JOURNAL_VERSION:
+            raise DocumentFormatError(f"Diário em formato desconhecido: {self.path}")
+        for line in lines[1:]:
+            if limit is not None and len(operations) >= limit:
+                break
+            if not line.strip():
+                continue
+            try:
+                operations.append(json.loads(line))
+            except ValueError:
+                logger.warning(f"Diário {self.path}: linha incompleta ignorada")
+                break
+        return operations
+
+    def reset(self):
+        """Descarta o diário (o documento em disco já contém tudo)"""
+        with self._lock:
+            self._pending.clear()
+            if self._file is not None:
+                self._discarded += self._count
+                self._replace_with(b'')
+
+    def _replace_with(self, tail):
+        self._file.close()
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(_HEADER + tail)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._file = open(self.path, 'ab')
+        self._count = tail.count(b'\n')
+
+    def compact(self, document_path, format=None):
+        """Aplica o diário ao documento em disco e remove o que foi aplicado.
+
+        Edições que chegarem durante a compactação continuam no diário.
+        Devolve o número de operações aplicadas.
+        """
+        from . import detect_format, is_compressed, load_document, save_document
+
+        end = self.mark()
+        operations = self.operations(end)
+        if operations:
+            format = format or detect_format(document_path)
+            if format not in COMPACT_FORMATS:
+                raise DocumentFormatError(f"O diário não regrava documentos {format}: "
+                                          f"{document_path} perderia o que o editor não lê")
+            document = apply_operations(load_document(document_path, format), operations)
+            # Um documento salvo com gzip continua comprimido
+            save_document(document, document_path, format, is_compressed(document_path))
+        self.discard_until(end)
+        return len(operations)
+
+    def mark(self):
+        """Grava o pendente e devolve a marca atual, para `discard_until`.
+
+        A marca é o número de operações gravadas desde a abertura (não um
+        byte do arquivo), então sobrevive a uma compactação no meio tempo.
+        """
+        with self._lock:
+            self._flush_locked()
+            return self._discarded + self._count
+
+    def discard_until(self, end):
+        """Remove as operações anteriores à marca `end` (já estão no documento
+        em disco); as que uma compactação já removeu não contam de novo"""
+        with self._lock:
+            drop = end - self._discarded
+            if self._file is None or drop <= 0:
+                return
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            start = data.find(b'\n') + 1  # Depois do cabeçalho
+            while drop and start < len(data):
+                newline = data.find(b'\n', start)
+                if newline < 0:
+                    break
+                if data[start:newline].strip():
+                    drop -= 1
+                start = newline + 1
+            self._replace_with(data[start:])
+            self._discarded = end
+
+    def close(self, remove=False):
+        with self._lock:
+            if remove:
+                self._pending.clear()
+            self._flush_locked()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if remove:
+                self.path.unlink(missing_ok=True)
+
+
+class CompactionJob(QRunnable):
+    def __init__(self, recorder, journal, document_path):
+        super().__init__()
+        self.recorder = recorder
+        self.journal = journal
+        self.document_path = document_path
+
+    def run(self):
+        try:
+            count = self.journal.compact(self.document_path)
+            self.recorder.signals.compacted.emit(str(self.document_path), count)
+        except Exception as e:
+            logger.warning(f"Compactação de {self.document_path} falhou: {e}")
+            self.recorder.signals.failed.emit(str(self.document_path), str(e))
+
+
+class JournalSignals(QObject):
+    compacted = pyqtSignal(str, int)  # documento, operações aplicadas
+    failed = pyqtSignal(str, str)     # documento, mensagem
+
+
+class JournalRecorder:
+    """Transforma as edições da cena em operações do diário.
+
+    Assina as edições e os lotes de movimento do GeometryDispatcher. Os
+    movimentos de um arrasto são agrupados por elemento até a próxima
+    operação de outro tipo ou a próxima gravação, que acontece a cada
+    FLUSH_INTERVAL_MS. A compactação roda numa thread própria.
+    """
+
+    def __init__(self, scene, parent=None):
+        self.scene = scene
+        self.journal = None
+        self.document_path = None
+        self.signals = JournalSignals()
+        self._moves = {}  # id -> posição, movimentos ainda não anotados
+        self._paused = 0
+        self._flush_failed = False
+        self._holds = 0  # Salvamentos em curso: a compactação espera
+        self._timer = QTimer(parent)
+        self._timer.setInterval(FLUSH_INTERVAL_MS)
+        self._timer.timeout.connect(self.flush)
+        self.pool = QThreadPool(parent)
+        self.pool.setMaxThreadCount(1)
+
+    def start(self, journal, document_path=None):
+        """Passa a anotar as edições da cena no diário"""
+        self.stop()
+        self.journal = journal
+        self.document_path = str(document_path) if document_path else None
+        self.scene.dispatcher.subscribe_edits(self.on_edit)
+        self.scene.dispatcher.subscribe(self.on_moved)
+        self._timer.start()
+
+    def stop(self, remove=False):
+        """Para de anotar; com remove=True apaga o diário (documento salvo)"""
+        self.scene.dispatcher.unsubscribe_edits(self.on_edit)
+        self.scene.dispatcher.unsubscribe(self.on_moved)
+        self._timer.stop()
+        if self.journal is not None:
+            self.wait()
+            self._write_moves()
+            try:
+                self.journal.close(remove)
+            except OSError as e:
+                logger.warning(f"Diário {self.journal.path} não pôde ser gravado: {e}")
+            self.journal = None
+
+    def has_changes(self):
+        """Há edições anotadas (ou a anotar) desde o último salvamento"""
+        return bool(self._moves) or (self.journal is not None and len(self.journal) > 0)
+
+    @contextmanager
+    def paused(self):
+        """Mudanças feitas dentro do bloco não são anotadas (ex.: itens lidos do próprio documento)"""
+        self._paused += 1
+        try:
+            yield
+        finally:
+            self._paused -= 1
+
+    def on_edit(self, operation, item):
+        from ..models.elements import BPMNElement, BPMNConnection
+
+        if self._paused:
+            return
+        self._write_moves()
+        if operation == 'remove':
+            self._moves.pop(item.unique_id, None)
+            self.journal.append({'op': 'delete', 'id': item.unique_id})
+        elif operation == 'rename':
+            self.journal.append({'op': 'rename', 'id': item.unique_id, 'name': item.name})
+        elif isinstance(item, BPMNElement):
+            self.journal.append({'op': 'add', 'record': element_record(item)})
+        elif isinstance(item, BPMNConnection) and item.source and item.target:
+            self.journal.append({'op': 'connect', 'record': connection_record(item)})
+
+    def on_moved(self, elements, connections):
+        if self._paused:
+            return
+        for element in elements:
+            self._moves[element.unique_id] = (element.x(), element.y())
+
+    def _write_moves(self):
+        for element_id, pos in self._moves.items():
+            self.journal.append({'op': 'move', 'id': element_id, 'pos': pos})
+        self._moves.clear()
+
+    def mark(self):
+        """Posição do diário que corresponde ao estado atual da cena"""
+        self._write_moves()
+        return self.journal.mark()
+
+    def flush(self):
+        """Grava no disco o que foi editado desde a última gravação"""
+        if self.journal is None:
+            return
+        self._write_moves()
+        try:
+            self.journal.flush()
+        except OSError as e:
+            # Ex.: pasta só de leitura; as operações ficam pendentes e a
+            # gravação é tentada de novo no próximo ciclo
+            if not self._flush_failed:
+                logger.warning(f"Diário {self.journal.path} não pôde ser gravado: {e}")
+            self._flush_failed = True
+            return
+        self._flush_failed = False
+        if self.document_path and len(self.journal) >= COMPACT_THRESHOLD:
+            self.compact()
+
+    def hold_compaction(self):
+        """Suspende a compactação até `release_compaction` (ex.: durante um
+        salvamento, que regrava o mesmo documento)"""
+        self._holds += 1
+
+    def release_compaction(self):
+        self._holds = max(0, self._holds - 1)
+
+    def compact(self):
+        """Aplica o diário ao documento em segundo plano (sem efeito em documentos sem nome)"""
+        if (self.journal is None or not self.document_path or self._holds
+                or self.pool.activeThreadCount()):
+            return False
+        self._write_moves()
+        self.pool.start(CompactionJob(self, self.journal, self.document_path))
+        return True
+
+    def wait(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
@@ -0,0 +1,101 @@
+import io
+import json
+
+from ..utils.exceptions import DocumentFormatError
+from .document import (SCHEMA_VERSION, ELEMENT_KEYS, CONNECTION_KEYS, migrate_record,
+                       iter_document_records)
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Um objeto JSON por linha, em UTF-8:
+#   {"format": "bpmn-ndjson", "version": 1}
+#   {"kind": "element", "id": ..., "type": ..., "pos": [x, y], "name": ..., ...}
+#   ...
+#   {"kind": "connection", "id": ..., "source_id": ..., "target_id": ...}
+# Cabeçalho primeiro, depois todos os elementos, depois as conexões (que
+# só referenciam elementos já lidos). Leitura e escrita seguem linha a
+# linha, sem montar o arquivo inteiro em memória.
+FORMAT_NAME = 'bpmn-ndjson'
+HEADER_PREFIX = b'{"format":"' + FORMAT_NAME.encode() + b'"'
+KINDS = {'element': ELEMENT_KEYS, 'connection': CONNECTION_KEYS}
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+_decode = json.JSONDecoder().decode
+
+
+def sniff(head):
+    return head.lstrip().startswith(HEADER_PREFIX)
+
+
+def _line(obj):
+    return _encoder.encode(obj).encode('utf-8') + b'\n'
+
+
+def read_header(stream):
+    line = stream.readline()
+    try:
+        header = json.loads(line)
+    except ValueError as e:
+        raise DocumentFormatError(f"Cabeçalho NDJSON inválido: {e}") from e
+    if not isinstance(header, dict) or header.get('format') != FORMAT_NAME:
+        raise DocumentFormatError("Arquivo não é um documento bpmn-ndjson")
+    version = header.get('version')
+    if not isinstance(version, int):
+        raise DocumentFormatError("Cabeçalho sem versão de esquema")
+    if version > SCHEMA_VERSION:
+        raise DocumentFormatError(f"Versão de esquema {version} é mais nova que "
+                                  f"a suportada ({SCHEMA_VERSION})")
+    return header
+
+
+def iter_records(stream):
+    """Gera (tipo, registro) a partir de um fluxo binário, já migrados para SCHEMA_VERSION"""
+    version = read_header(stream)['version']
+    current = version == SCHEMA_VERSION
+    seen_connection = False
+    for number, line in enumerate(stream, start=2):
+        if not line.strip():
+            continue
+        try:
+            record = _decode(line.decode('utf-8'))
+            kind = record.pop('kind')
+        except (ValueError, KeyError, AttributeError, TypeError) as e:  # UnicodeDecodeError é ValueError
+            raise DocumentFormatError(f"Linha {number} inválida: {e}") from e
+        keys = KINDS.get(kind)
+        if keys is None:
+            raise DocumentFormatError(f"Linha {number}: tipo de registro desconhecido {kind!r}")
+        missing = [key for key in keys if key not in record]
+        if missing:
+            raise DocumentFormatError(f"Linha {number}: {kind} sem os campos {missing}")
+        if kind == 'connection':
+            seen_connection = True
+        elif seen_connection:
+            raise DocumentFormatError(f"Linha {number}: elemento depois das conexões")
+        if kind == 'element':
+            record['pos'] = tuple(record['pos'])
+        yield kind, record if current else migrate_record(kind, record, version)
+
+
+def load(stream):
+    document = {'elements': [], 'connections': []}
+    for kind, record in iter_records(stream):
+        document[kind + 's'].append(record)
+    return document
+
+
+def loads(data):
+    return load(io.BytesIO(data))
+
+
+def dump_records(records, stream):
+    """Grava (tipo, registro) um por linha; `records` pode ser um gerador"""
+    stream.write(_line({'format': FORMAT_NAME, 'version': SCHEMA_VERSION}))
+    for kind, record in records:
+        line = {'kind': kind}
+        line.update(record)
+        stream.write(_line(line))
+
+
+def dump(document, stream):
+    dump_records(iter_document_records(document), stream)
@@ -0,0 +1,47 @@
+import io
+import pickle
+
+from ..utils.exceptions import DocumentFormatError
+from .document import validate_document, migrate_document
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Protocolo 2 é o primeiro byte de todos os .bpmn gravados por save_project
+PICKLE_MAGIC = b'\x80'
+
+
+class DocumentUnpickler(pickle.Unpickler):
+    """Unpickler que só aceita tipos primitivos.
+
+    Os documentos de save_project contêm apenas dicionários, listas,
+    tuplas, strings e números; qualquer referência a classe ou função
+    (o que permitiria executar código ao abrir um arquivo) é recusada.
+    """
+
+    def find_class(self, module, name):
+        raise DocumentFormatError(f"Arquivo referencia {module}.{name}; "
+                                  f"apenas documentos de dados são aceitos")
+
+
+def sniff(head):
+    return head[:1] == PICKLE_MAGIC
+
+
+def load(stream):
+    try:
+        document = DocumentUnpickler(stream).load()
+    except DocumentFormatError:
+        raise
+    except Exception as e:
+        raise DocumentFormatError(f"Pickle inválido: {e}") from e
+    return migrate_document(validate_document(document), 0)
+
+
+def loads(data):
+    return load(io.BytesIO(data))
+
+
+def dump(document, stream):
+    """Formato legado: mantido só para exportar para versões antigas do editor"""
+    pickle.dump(document, stream)
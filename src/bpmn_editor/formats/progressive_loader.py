@@ -0,0 +1,229 @@
+import gc
+import time
+from contextlib import contextmanager, nullcontext
+
+from PyQt5.QtCore import QObject, QTimer, QPointF, QRectF, pyqtSignal
+
+from ..models.elements import BPMNElement
+
+import logging
+logger = logging.getLogger(__name__)
+
+PROGRESSIVE_THRESHOLD = 2000  # Documentos menores são carregados de uma vez
+SLICE_MS = 12                 # Tempo de criação de itens por fatia do laço de eventos
+VIEWPORT_MARGIN = 200         # Folga (cena) em volta da área visível; cobre meio elemento
+CELL_SIZE = 400               # Células (cena) que agrupam os centros ainda não criados
+
+
+def _cell(x, y):
+    return int(x // CELL_SIZE), int(y // CELL_SIZE)
+
+
+@contextmanager
+def _collection_paused():
+    """Sem coletas automáticas do gc durante uma fatia da carga.
+
+    Uma coleta completa no meio da fatia varre a cena inteira (pausas de
+    centenas de ms); a carga não cria ciclos. Entre as fatias o gc volta a
+    valer para o resto do programa, mas os objetos já existentes ficam
+    congelados (gc.freeze) até o fim da carga, para que as coletas entre
+    fatias não varram de novo o que já foi criado.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.freeze()
+        if enabled:
+            gc.enable()
+
+
+class LoaderSignals(QObject):
+    progress = pyqtSignal(int, int)  # elementos criados, total
+    finished = pyqtSignal(int)       # total de elementos
+
+
+class ProgressiveLoader(QObject):
+    """Carrega um documento grande no canvas sem travar a interface.
+
+    Os elementos na área visível são criados na hora; o resto entra em
+    fatias de SLICE_MS pelo laço de eventos, sempre começando pelo que
+    estiver visível no momento (o usuário pode rolar e dar zoom durante a
+    carga) e depois pelos mais próximos da vista inicial. Cada conexão é
+    criada quando a sua segunda ponta fica pronta. Elementos removidos
+    pelo usuário no meio da carga levam junto as conexões ainda não
+    criadas. O diário não anota os itens vindos do documento.
+    """
+
+    def __init__(self, canvas, recorder=None, parent=None):
+        super().__init__(parent)
+        self.canvas = canvas
+        self.recorder = recorder
+        self.signals = LoaderSignals()
+        self._timer = QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._step)
+        # Custo médio (ms) de fechar o lote por conexão criada: caminhos e
+        # cruzamentos também entram no orçamento da fatia
+        self._commit_ms = 0.5
+        self._reset()
+
+    def _reset(self):
+        self._records = []
+        self._order = []            # Índices por distância da vista inicial
+        self._next = 0
+        self._pending = set()       # Índices ainda não criados
+        self._cells = {}            # célula -> índices com o centro nela
+        self._visible = []          # Índices visíveis na última vista, a criar primeiro
+        self._last_view = None
+        self._built = {}            # id -> BPMNElement
+        self._waiting = {}          # id -> conexões à espera desse elemento
+        self._created = 0
+
+    @property
+    def loading(self):
+        return len(self._pending) > 0
+
+    def _visible_rect(self):
+        visible = self.canvas.mapToScene(self.canvas.viewport().rect()).boundingRect()
+        return visible.adjusted(-VIEWPORT_MARGIN, -VIEWPORT_MARGIN,
+                                VIEWPORT_MARGIN, VIEWPORT_MARGIN)
+
+    def _pending_in(self, rect):
+        """Índices ainda não criados com o centro na área, em ordem"""
+        x0, y0 = _cell(rect.left(), rect.top())
+        x1, y1 = _cell(rect.right(), rect.bottom())
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self._cells):
+            keys = [key for key in self._cells if x0 <= key[0] <= x1 and y0 <= key[1] <= y1]
+        else:
+            keys = [(cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)]
+        found = []
+        for key in keys:
+            bucket = self._cells.get(key)
+            if bucket is None:
+                continue
+            bucket = [index for index in bucket if index in self._pending]
+            if bucket:
+                self._cells[key] = bucket
+                found.extend(bucket)
+            else:
+                del self._cells[key]
+        found.sort()
+        return found
+
+    def load(self, document):
+        """Começa a carregar `document` no canvas (que já deve estar vazio)"""
+        self.cancel()
+        self._records = document.get('elements', [])
+        self._pending = set(range(len(self._records)))
+        left = top = float('inf')
+        right = bottom = float('-inf')
+        for index, record in enumerate(self._records):
+            x, y = record['pos']
+            self._cells.setdefault(_cell(x, y), []).append(index)
+            left, right = min(left, x), max(right, x)
+            top, bottom = min(top, y), max(bottom, y)
+        for record in document.get('connections', []):
+            self._waiting.setdefault(record['source_id'], []).append(record)
+            if record['target_id'] != record['source_id']:
+                self._waiting.setdefault(record['target_id'], []).append(record)
+
+        # A área rolável já cobre o documento inteiro, para navegar durante a carga
+        if self._records:
+            bounds = QRectF(left, top, right - left, bottom - top).adjusted(
+                -VIEWPORT_MARGIN, -VIEWPORT_MARGIN, VIEWPORT_MARGIN, VIEWPORT_MARGIN)
+            self.canvas.setSceneRect(QRectF(self.canvas.viewport().rect()).united(bounds))
+        center = self._visible_rect().center()
+        cx, cy = center.x(), center.y()
+        records = self._records
+        self._order = sorted(range(len(records)),
+                             key=lambda i: (records[i]['pos'][0] - cx) ** 2 +
+                                           (records[i]['pos'][1] - cy) ** 2)
+        self.canvas.scene.dispatcher.subscribe_edits(self._on_edit)
+
+        self._build(self._pending_in(self._visible_rect()))
+        if self.loading:
+            self._timer.start()
+        else:
+            self._done()
+
+    def _candidates(self):
+        """Índices a criar: primeiro os visíveis agora, depois na ordem de distância"""
+        view = self._visible_rect()
+        if view != self._last_view:
+            # A vista mudou (rolagem, zoom): o que apareceu passa na frente
+            self._last_view = view
+            self._visible = self._pending_in(view)
+            self._visible.reverse()
+        while self._visible:
+            yield self._visible.pop()
+        while self._next < len(self._order):
+            index = self._order[self._next]
+            self._next += 1
+            yield index
+
+    def _build(self, indices, deadline=None):
+        paused = self.recorder.paused() if self.recorder is not None else nullcontext()
+        bulk_insert = self.canvas.bulk_insert(fit_scene=False, rebuild_index=False)
+        with _collection_paused(), paused, bulk_insert as bulk:
+            for index in indices:
+                if index not in self._pending:
+                    continue
+                self._pending.discard(index)
+                self._build_element(bulk, self._records[index])
+                if (deadline is not None and time.perf_counter() +
+                        len(bulk.connections) * self._commit_ms / 1000 >= deadline):
+                    break
+            start = time.perf_counter()
+        if bulk.connections:
+            elapsed = (time.perf_counter() - start) * 1000
+            self._commit_ms = 0.7 * self._commit_ms + 0.3 * elapsed / len(bulk.connections)
+        self.signals.progress.emit(self._created, len(self._records))
+
+    def _build_element(self, bulk, record):
+        element = bulk.add_element(
+            record['type'], QPointF(*record['pos']),
+            name=record['name'],
+            element_id=record['id'],
+            description=record.get('description'),
+            actions=record.get('actions'),
+            size=record.get('size'),
+        )
+        self._created += 1
+        self._built[record['id']] = element
+        for connection in self._waiting.pop(record['id'], ()):
+            source = self._built.get(connection['source_id'])
+            target = self._built.get(connection['target_id'])
+            if source is not None and target is not None:
+                bulk.add_connection(source, target, connection['id'])
+
+    def _step(self):
+        deadline = time.perf_counter() + SLICE_MS / 1000
+        self._build(self._candidates(), deadline)
+        if not self.loading:
+            self._done()
+
+    def _on_edit(self, operation, item):
+        # Um elemento removido não recebe mais conexões do documento
+        if (operation == 'remove' and isinstance(item, BPMNElement)
+                and self._built.get(item.unique_id) is item):
+            del self._built[item.unique_id]
+
+    def finish(self):
+        """Cria tudo o que falta agora (ex.: antes de salvar)"""
+        if self.loading:
+            self._build(list(self._order))
+            self._done()
+
+    def _done(self):
+        total = len(self._records)
+        self.cancel()
+        self.signals.finished.emit(total)
+
+    def cancel(self):
+        """Abandona a carga em curso (os itens já criados ficam na cena)"""
+        self._timer.stop()
+        self.canvas.scene.dispatcher.unsubscribe_edits(self._on_edit)
+        gc.unfreeze()  # A próxima coleta completa volta a ver a cena toda
+        self._reset()
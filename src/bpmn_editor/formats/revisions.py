@@ -0,0 +1,175 @@
+import hashlib
+import json
+
+from ..utils.exceptions import DocumentFormatError
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Diferença entre duas revisões de um documento, casando os itens pelo
+# id (unique_id de BPMNElement / BPMNConnection): um dicionário por lado
+# e uma passada em cada, O(n). A mesma comparação gera o delta, que
+# guarda uma revisão como as mudanças em relação à revisão mãe:
+#   {'format': 'bpmn-delta', 'version': 1, 'parent': <digest da mãe>,
+#    'elements':    {'added': [registro], 'removed': [id],
+#                    'changed': [{'id', 'fields': {campo: valor}, 'unset': [campo]}]},
+#    'connections': {'added': [registro], 'removed': [id], 'changed': [...]}}
+# 'unset' (campos que deixaram de existir) só aparece quando não é vazio.
+DELTA_FORMAT = 'bpmn-delta'
+DELTA_VERSION = 1
+KINDS = ('elements', 'connections')
+# Campos que o JSON devolve como lista e o documento guarda como tupla
+TUPLE_FIELDS = ('pos', 'size')
+
+
+class DocumentDiff:
+    """Ids das mudanças de `parent` para `child`.
+
+    Elementos e conexões ficam em added/removed; `moved`, `renamed` e
+    `actions_changed` são de elementos, `rewired` de conexões cuja origem
+    ou destino mudou. Um item pode estar em mais de uma lista.
+    """
+
+    __slots__ = ('added', 'removed', 'moved', 'renamed', 'actions_changed', 'rewired')
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, [])
+
+    def __bool__(self):
+        return any(getattr(self, name) for name in self.__slots__)
+
+    def summary(self):
+        """Contagem por categoria, ex.: {'added': 2, 'moved': 1, ...}"""
+        return {name: len(getattr(self, name)) for name in self.__slots__}
+
+
+def _by_id(records):
+    return {record['id']: record for record in records}
+
+
+def _change(old, new):
+    """Entrada de 'changed': os campos de `new` diferentes de `old` e os que sumiram"""
+    change = {'id': new['id'],
+              'fields': {key: value for key, value in new.items()
+                         if key not in old or old[key] != value}}
+    unset = [key for key in old if key not in new]
+    if unset:
+        change['unset'] = unset
+    return change
+
+
+def diff_documents(parent, child):
+    """DocumentDiff de `parent` para `child` (documentos no formato de document.py)"""
+    diff = DocumentDiff()
+    for kind in KINDS:
+        old = _by_id(parent.get(kind, []))
+        seen = set()
+        for record in child.get(kind, []):
+            seen.add(record['id'])
+            previous = old.get(record['id'])
+            if previous is None:
+                diff.added.append(record['id'])
+                continue
+            if kind == 'connections':
+                if (previous['source_id'], previous['target_id']) != (record['source_id'],
+                                                                      record['target_id']):
+                    diff.rewired.append(record['id'])
+                continue
+            if tuple(previous['pos']) != tuple(record['pos']):
+                diff.moved.append(record['id'])
+            if previous['name'] != record['name']:
+                diff.renamed.append(record['id'])
+            if previous.get('actions', {}) != record.get('actions', {}):
+                diff.actions_changed.append(record['id'])
+        diff.removed.extend(item_id for item_id in old if item_id not in seen)
+    return diff
+
+
+def _record_hash(kind, record):
+    text = json.dumps([kind, record], sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest(), 'big')
+
+
+def document_digest(document):
+    """Impressão digital do conteúdo, independente da ordem dos registros.
+
+    Soma (mod 2**256) do hash de cada registro: linear e estável se uma
+    revisão reconstruída pelo delta sair em outra ordem.
+    """
+    total = 0
+    for kind in KINDS:
+        for record in document.get(kind, []):
+            total = (total + _record_hash(kind, record)) % (1 << 256)
+    return f"{total:064x}"
+
+
+def make_delta(parent, child):
+    """Delta que transforma `parent` em `child`; só os campos alterados entram"""
+    delta = {'format': DELTA_FORMAT, 'version': DELTA_VERSION, 'parent': document_digest(parent)}
+    for kind in KINDS:
+        old = _by_id(parent.get(kind, []))
+        added, changed = [], []
+        seen = set()
+        for record in child.get(kind, []):
+            seen.add(record['id'])
+            previous = old.get(record['id'])
+            if previous is None:
+                added.append(record)
+            elif previous != record:
+                changed.append(_change(previous, record))
+        delta[kind] = {'added': added, 'removed': [item_id for item_id in old if item_id not in seen],
+                       'changed': changed}
+    return delta
+
+
+def _restore(record):
+    for field in TUPLE_FIELDS:
+        if isinstance(record.get(field), list):
+            record[field] = tuple(record[field])
+    return record
+
+
+def apply_delta(parent, delta):
+    """Reconstrói a revisão: a ordem da mãe, sem os removidos, com os novos no fim"""
+    if delta.get('format') != DELTA_FORMAT:
+        raise DocumentFormatError("Não é um delta de documento")
+    if delta.get('version', 0) > DELTA_VERSION:
+        raise DocumentFormatError(f"Versão de delta {delta['version']} é mais nova que "
+                                  f"a suportada ({DELTA_VERSION})")
+    if delta['parent'] != document_digest(parent):
+        raise DocumentFormatError("O delta foi gerado a partir de outra revisão")
+    document = {}
+    for kind in KINDS:
+        changes = delta.get(kind, {})
+        removed = set(changes.get('removed', []))
+        changed = {change['id']: change for change in changes.get('changed', [])}
+        records = []
+        for record in parent.get(kind, []):
+            if record['id'] in removed:
+                continue
+            change = changed.get(record['id'])
+            if change is not None:
+                record = dict(record)
+                record.update(change['fields'])
+                for key in change.get('unset', ()):
+                    record.pop(key, None)
+                record = _restore(record)
+            records.append(record)
+        records.extend(_restore(dict(record)) for record in changes.get('added', []))
+        document[kind] = records
+    return document
+
+
+def dump_delta(delta, stream):
+    stream.write(json.dumps(delta, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def load_delta(stream):
+    try:
+        delta = json.loads(stream.read().decode('utf-8'))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise DocumentFormatError(f"Delta inválido: {e}") from e
+    if not isinstance(delta, dict) or delta.get('format') != DELTA_FORMAT:
+        raise DocumentFormatError("Não é um delta de documento")
+    return delta
@@ -0,0 +1,112 @@
+import gc
+import time
+from pathlib import Path
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from . import DEFAULT_FORMAT, save_document
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class SaveSignals(QObject):
+    """Sinais emitidos pelos jobs (entregues na thread da interface)"""
+    started = pyqtSignal(str)           # caminho
+    progress = pyqtSignal(str, int)     # caminho, porcentagem
+    finished = pyqtSignal(str, float)   # caminho, duração em ms
+    failed = pyqtSignal(str, str)       # caminho, mensagem
+    _done = pyqtSignal(str)             # interno: libera o próximo pedido
+
+
+class SaveJob(QRunnable):
+    """Serializa, comprime (se pedido) e grava um instantâneo já pronto"""
+
+    def __init__(self, pipeline, path, document, format, compress):
+        super().__init__()
+        self.pipeline = pipeline
+        self.path = str(path)
+        self.document = document
+        self.format = format
+        self.compress = compress
+        self._percent = -1
+
+    def _progress(self, done, total):
+        percent = done * 100 // max(1, total)
+        if percent != self._percent:
+            self._percent = percent
+            self.pipeline.signals.progress.emit(self.path, percent)
+
+    def run(self):
+        signals = self.pipeline.signals
+        start = time.perf_counter()
+        try:
+            save_document(self.document, self.path, self.format, self.compress, self._progress)
+            signals.finished.emit(self.path, (time.perf_counter() - start) * 1000)
+        except Exception as e:
+            logger.warning(f"Falha ao salvar {self.path}: {e}")
+            signals.failed.emit(self.path, str(e))
+        finally:
+            signals._done.emit(self.path)
+
+
+class SavePipeline(QObject):
+    """Salvamento fora da thread da interface.
+
+    `save` tira um instantâneo do modelo na thread da interface (a função
+    `snapshot` devolve registros novos, que o worker pode ler sem
+    travas) e entrega serialização, compressão, fsync e a troca atômica
+    do arquivo a um QThreadPool. Pedidos feitos enquanto um arquivo
+    está sendo gravado se fundem: só o último é gravado, com o estado do
+    modelo no momento em que a gravação anterior termina.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.signals = SaveSignals()
+        self.signals._done.connect(self._on_done)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._running = set()
+        self._queued = {}  # caminho -> (snapshot, formato, compress, before_start)
+
+    @property
+    def busy(self):
+        return bool(self._running or self._queued)
+
+    def save(self, path, snapshot, format=DEFAULT_FORMAT, compress=False, before_start=None):
+        """Agenda a gravação; `before_start(documento)` roda na thread da interface
+        logo após o instantâneo (ex.: marcar o diário de edições)"""
+        path = str(Path(path))
+        request = (snapshot, format, compress, before_start)
+        if path in self._running:
+            self._queued[path] = request  # Substitui um pedido anterior ainda na fila
+            return False
+        self._start(path, request)
+        return True
+
+    def _start(self, path, request):
+        snapshot, format, compress, before_start = request
+        # O instantâneo só aloca registros novos; uma coleta de lixo no meio
+        # dele quase dobraria a pausa da interface
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            document = snapshot()
+        finally:
+            if enabled:
+                gc.enable()
+        if before_start is not None:
+            before_start(document)
+        self._running.add(path)
+        self.signals.started.emit(path)
+        self.pool.start(SaveJob(self, path, document, format, compress))
+
+    def _on_done(self, path):
+        self._running.discard(path)
+        request = self._queued.pop(path, None)
+        if request is not None:
+            self._start(path, request)
+
+    def wait(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
@@ -0,0 +1,103 @@
+from functools import partial
+
+from PyQt5.QtCore import QPointF, QRectF
+
+from ..models.elements import BPMNElement, BPMNConnection
+from ..models.grid import GridScene
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def build_element(record):
+    element = BPMNElement(record['type'], QPointF(*record['pos']))
+    element.unique_id = record['id']  # Preservar o ID original
+    element.setData(0, element.unique_id)
+    element.name = record['name']
+    element.description = record.get('description', "")
+    element.actions = dict(record.get('actions') or {})
+    if 'size' in record:
+        _resize(element, *record['size'])
+    return element
+
+
+def _resize(element, width, height):
+    element.rect = QRectF(-width / 2, -height / 2, width, height)
+
+
+def build_connection(record, elements_by_id):
+    source = elements_by_id.get(record['source_id'])
+    target = elements_by_id.get(record['target_id'])
+    if source is None or target is None or source is target:
+        logger.error(f"Conexão inválida: {record}")
+        return None
+    connection = BPMNConnection(source, target)
+    connection.unique_id = record['id']
+    connection.setData(0, connection.unique_id)
+    return connection
+
+
+def build_scene(document, scene=None):
+    """Cria os itens do documento numa GridScene (sem canvas nem janela).
+
+    Devolve (cena, elementos por id, conexões). Os cruzamentos são
+    calculados uma vez no fim, não a cada conexão adicionada.
+    """
+    if scene is None:
+        scene = GridScene()
+    elements_by_id = {}
+    connections = []
+    scene.crossings.suspend()
+    try:
+        for record in document.get('elements', []):
+            element = build_element(record)
+            scene.addItem(element)
+            elements_by_id[element.unique_id] = element
+        for record in document.get('connections', []):
+            connection = build_connection(record, elements_by_id)
+            if connection is not None:
+                scene.addItem(connection)
+                connections.append(connection)
+    finally:
+        scene.crossings.resume()
+    return scene, elements_by_id, connections
+
+
+def build_lazy_scene(binary, scene=None, defer_paths=False):
+    """Como build_scene, a partir de um BinaryDocument: os textos de cada
+    elemento ficam no arquivo mapeado até o elemento ser visto ou editado.
+
+    Com defer_paths=True os caminhos das conexões não são calculados (o
+    chamador os calcula, ex.: no commit de BPMNCanvas.bulk_insert).
+    """
+    if scene is None:
+        scene = GridScene()
+    elements = []
+    connections = []
+    scene.crossings.suspend()
+    try:
+        for index, element_id in enumerate(binary.ids):
+            element_type = binary.element_types[index]
+            element = BPMNElement(element_type, QPointF(*binary.positions[index]))
+            element.unique_id = element_id
+            element.setData(0, element_id)
+            if binary.sizes[index] != (element.rect.width(), element.rect.height()):
+                _resize(element, *binary.sizes[index])
+            element.defer_text(partial(binary.element_text, index))
+            scene.addItem(element)
+            elements.append(element)
+        for connection_id, source, target in binary.connections:
+            if source == target:
+                logger.error(f"Conexão inválida: {connection_id}")
+                continue
+            connection = BPMNConnection(elements[source], elements[target], defer_path=True)
+            connection.unique_id = connection_id
+            connection.setData(0, connection_id)
+            scene.addItem(connection)
+            connections.append(connection)
+        if not defer_paths:
+            for connection in connections:
+                connection.update_position()
+    finally:
+        scene.crossings.resume()
+    return scene, {element.unique_id: element for element in elements}, connections
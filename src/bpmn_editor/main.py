@@ -11,18 +11,31 @@ from .views.canvas import BPMNCanvas
 from .dialogs.property_dialog import PropertyDialog
 from .panels.actions_panel import ActionsPanel
 from .panels.script_panel import ScriptPanel
+from .panels.overview_panel import OverviewPanel
+from .export.renderer import render_scene, EXPORT_FORMATS
+from .thumbnails import ThumbnailService
+from .formats import (load_document, document_from_scene, detect_format, BinaryDocument,
+                      DEFAULT_FORMAT, save_revision, load_revision)
+from .formats.revisions import diff_documents
+from .formats.save_pipeline import SavePipeline
+from .formats.progressive_loader import ProgressiveLoader, PROGRESSIVE_THRESHOLD
+from .formats.scene_builder import build_lazy_scene
+from .formats.journal import (EditJournal, JournalRecorder, apply_operations, journal_path,
+                              untitled_journal_path)
+from .dialogs.thumbnail_file_dialog import ThumbnailFileDialog
 
 from functools import partial 
 from weakref import ref
 from datetime import datetime
 
-import logging, json, pickle
+import logging, json
 import locale
 import sys
 from pathlib import Path
 
 from datetime import datetime
 import os
+import shutil
 import logging
 logger = logging.getLogger(__name__)
 
@@ -35,6 +48,17 @@ sys.path.append(str(Path(__file__).parent.parent))
 locale.setlocale(locale.LC_ALL, 'en_US.UTF-8')  # Forçar locale compatível
 sys.stdout.reconfigure(encoding='utf-8')  # Configurar saída padrão
 
+# Filtros do diálogo "Salvar Projeto": o binário é para mapas muito grandes
+NDJSON_FILTER = "BPMN Files (*.bpmn)"
+COMPRESSED_FILTER = "BPMN comprimido - gzip (*.bpmn)"
+BINARY_FILTER = "BPMN binário - mapas grandes (*.bpmn)"
+XML_FILTER = "BPMN 2.0 XML (*.bpmn *.xml)"
+# Formatos de troca com outras ferramentas: importados como documento sem
+# nome e exportados sem trocar o arquivo atual (o mapeamento perde dados)
+EXPORT_ONLY_FORMATS = ('xml',)
+# Revisão gravada como delta em relação a um .bpmn (formats/revisions.py)
+DELTA_FILTER = "Revisão BPMN - delta (*.bpmndelta)"
+
 class BPMNEditor(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -44,6 +68,7 @@ class BPMNEditor(QMainWindow):
         self.palette = BPMNPalette(self.canvas, self)
         self.canvas.editor_ref = self 
         self.current_file = None  # Adicionar atributo
+        self.thumbnails = ThumbnailService(parent=self)  # Prévias dos arquivos .bpmn
 
         # Configurações de auto salvamento
         self.autosave_timer = QTimer(self)
@@ -57,6 +82,24 @@ class BPMNEditor(QMainWindow):
         
         # 2. Configurar interface
         self.init_ui()
+
+        # Diário de edições: cada alteração vai para o disco em ~1 s e é
+        # reaplicada se o editor cair antes de salvar
+        self.recorder = JournalRecorder(self.canvas.scene, self)
+        self.recorder.signals.compacted.connect(self.on_journal_compacted)
+
+        # Documentos grandes entram aos poucos, começando pela área visível
+        self.loader = ProgressiveLoader(self.canvas, self.recorder, self)
+        self.loader.signals.progress.connect(self.on_load_progress)
+        self.loader.signals.finished.connect(self.on_load_finished)
+        self.recover_untitled()
+
+        # Salvamento em segundo plano
+        self.saver = SavePipeline(self)
+        self._saving = {}  # caminho -> (marca do diário, instantâneo, arquivo do diário)
+        self.saver.signals.progress.connect(self.on_save_progress)
+        self.saver.signals.finished.connect(self.on_save_finished)
+        self.saver.signals.failed.connect(self.on_save_failed)
         
         self.setWindowTitle("Editor BPMN")
         self.setGeometry(100, 100, 1200, 800)
@@ -89,6 +132,10 @@ class BPMNEditor(QMainWindow):
         # Adiciona o painel de roteiro
         self.addDockWidget(Qt.RightDockWidgetArea, self.script_panel)
 
+        # Visão geral (minimapa) logo abaixo do roteiro
+        self.overview_panel = OverviewPanel(self.canvas)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.overview_panel)
+
         self.property_dialog = PropertyDialog()  # Diálogo modal
         self.actions_panel = ActionsPanel()
         self.addDockWidget(Qt.LeftDockWidgetArea, self.actions_panel)
@@ -220,11 +267,20 @@ class BPMNEditor(QMainWindow):
         file_menu.addAction(self.new_action)
         file_menu.addAction(self.open_action)
         file_menu.addAction(self.save_action)
+        file_menu.addSeparator()
+        file_menu.addAction(self.import_xml_action)
+        file_menu.addAction(self.export_xml_action)
+        file_menu.addSeparator()
+        file_menu.addAction(self.save_revision_action)
+        file_menu.addAction(self.open_revision_action)
         
         # Menu Ver
         view_menu = self.menuBar().addMenu("&Ver")
         view_menu.addAction(self.zoom_in_action)
         view_menu.addAction(self.zoom_out_action)
+        view_menu.addSeparator()
+        view_menu.addAction(self.compare_action)
+        view_menu.addAction(self.clear_compare_action)
 
     def on_selection_changed(self):
         selected = self.canvas.selectedItems()
@@ -290,30 +346,94 @@ class BPMNEditor(QMainWindow):
         )
         self.zoom_out_action.setShortcut("Ctrl+-")
         self.zoom_out_action.triggered.connect(self.zoom_out)
+
+        # BPMN 2.0 XML, para trocar modelos com outras ferramentas
+        self.import_xml_action = QAction("&Importar BPMN 2.0 XML...", self)
+        self.import_xml_action.triggered.connect(self.open_diagram)
+        self.export_xml_action = QAction("&Exportar BPMN 2.0 XML...", self)
+        self.export_xml_action.triggered.connect(self.save_diagram)
+
+        # Revisões: comparar com outro arquivo e gravar/abrir deltas
+        self.compare_action = QAction("&Comparar com revisão...", self)
+        self.compare_action.triggered.connect(self.compare_with_file)
+        self.clear_compare_action = QAction("&Limpar comparação", self)
+        self.clear_compare_action.triggered.connect(self.clear_comparison)
+        self.save_revision_action = QAction("Salvar como &delta de revisão...", self)
+        self.save_revision_action.triggered.connect(self.save_as_revision)
+        self.open_revision_action = QAction("Abrir delta de re&visão...", self)
+        self.open_revision_action.triggered.connect(self.open_revision)
         
     def create_toolbar(self):
         toolbar = self.addToolBar("Arquivo")
         toolbar.addAction(self.open_action)
         toolbar.addAction(self.save_action)  # ← Agora visível na UI
 
-    def autoSave(self):  # <-- ATENÇÃO À INDENTAÇÃO!
+    def autoSave(self):
+        """Grava o diário e o incorpora ao documento em segundo plano.
+
+        O custo é proporcional às edições desde a última vez, não ao
+        tamanho do documento; sem arquivo aberto o diário é a cópia de segurança.
+        """
         try:
-            if hasattr(self, 'current_file') and self.current_file:
-                self.saveToFile(self.current_file)
-            else:
-                self.saveAs()  # Garanta que saveAs() existe!
-            
-            print(f"Autosave: {datetime.now().strftime('%H:%M:%S')}")  # Debug
+            self.recorder.flush()
+            if not self.saver.busy:
+                self.recorder.compact()
+            logger.info(f"Autosave: {datetime.now().strftime('%H:%M:%S')}")
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Autosave falhou:\n{str(e)}")
 
+    def on_journal_compacted(self, path, count):
+        # Método, não lambda: a conexão cai junto com a janela
+        self.statusBar().showMessage(f"Autosave: {count} alteração(ões) gravadas em {path}", 5000)
+
+    def recover_untitled(self):
+        """Reaplica o diário do documento sem nome deixado por uma queda"""
+        journal = self.journal_for(None)
+        operations = journal.operations()
+        if operations:
+            self.populate_canvas(apply_operations({}, operations))
+            self.statusBar().showMessage(
+                f"{len(operations)} alteração(ões) não salvas recuperadas", 5000)
+        self.recorder.start(journal)
+
+    def journal_for(self, path=None):
+        return EditJournal(journal_path(path) if path else untitled_journal_path())
+
+    def restart_journal(self, path=None):
+        """Novo diário vazio, depois de salvar (o documento já contém tudo) ou limpar"""
+        self.recorder.stop(remove=True)
+        self.recorder.start(self.journal_for(path), path)
+
+    def closeEvent(self, event):
+        """Fechamento normal: o diário só fica se o usuário quiser recuperar as
+        edições não salvas na próxima abertura"""
+        self.loader.cancel()
+        remove = True
+        if self.recorder.has_changes():
+            answer = QMessageBox.question(
+                self, "Alterações não salvas",
+                "Há alterações não salvas. Descartá-las?\n\n"
+                "Não: elas ficam guardadas e são recuperadas na próxima abertura.",
+                QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel, QMessageBox.Cancel)
+            if answer == QMessageBox.Cancel:
+                event.ignore()
+                return
+            remove = answer == QMessageBox.Yes
+        self.saver.wait()  # Um salvamento em curso termina antes de sair
+        self.recorder.stop(remove=remove)
+        super().closeEvent(event)
+
     def setWindowModifiedFlag(self, modified):
         title = "Editor BPMN" + ("*" if modified else "")
         self.setWindowTitle(title)
 
     def new_diagram(self):
+        self.loader.cancel()
+        self.recorder.stop(remove=True)  # O conteúdo descartado não volta na recuperação
         self.canvas.scene.clear()
         self.canvas.elements.clear()
+        self.current_file = None
+        self.restart_journal()
         self.statusBar().showMessage("Diagrama reiniciado", 2000)
 
     def delete_element(self):
@@ -330,12 +450,13 @@ class BPMNEditor(QMainWindow):
             self.properties.show()
 
     def zoom_in(self):
-        self.canvas.scale(1.2, 1.2)
+        self.canvas.zoom_by(1.2)
 
     def zoom_out(self):
-        self.canvas.scale(0.8, 0.8)
+        self.canvas.zoom_by(0.8)
 
     def zoom_reset(self):
+        self.canvas.finish_zoom()
         self.canvas.resetTransform()
 
     def on_element_selected(self):
@@ -345,45 +466,39 @@ class BPMNEditor(QMainWindow):
 
     # ... manter métodos existentes de save/open/export ...
     def save_diagram(self):
+        """Exporta o diagrama em BPMN 2.0 XML (gravado em segundo plano, como save)"""
         options = QFileDialog.Options()
         file_name, _ = QFileDialog.getSaveFileName(
-            self, "Salvar Diagrama", "", "BPMN Files (*.bpmn);;All Files (*)", options=options)
+            self, "Exportar BPMN 2.0 XML", "", f"{XML_FILTER};;All Files (*)", options=options)
         
         if file_name:
-            # Lógica temporária de salvamento
-            with open(file_name, 'w') as f:
-                f.write("BPMN Diagram - Versão 1.0\n")
-                for item in self.canvas.scene.items():
-                    if isinstance(item, BPMNElement):
-                        f.write(f"{item.element_type}|{item.name}|{item.description}\n")
-            self.statusBar().showMessage(f'Diagrama salvo em: {file_name}')
-            self.current_file = file_name
+            self.save_in_background(file_name, 'xml')
 
     def open_diagram(self):
+        """Importa um BPMN 2.0 XML de outra ferramenta (ou qualquer .bpmn do editor)"""
         options = QFileDialog.Options()
         file_name, _ = QFileDialog.getOpenFileName(
-            self, "Abrir Diagrama", "", "BPMN Files (*.bpmn);;All Files (*)", options=options)
+            self, "Importar BPMN 2.0 XML", "", f"{XML_FILTER};;All Files (*)", options=options)
         if file_name:
             try:
-                with open(file_name, 'r') as f:
-                    data = json.load(f)
-                    self.canvas.load_elements(data)
+                self.open_document(file_name)
             except Exception as e:
                 self.statusBar().showMessage(f'Erro ao abrir: {str(e)}')
 
     def new_file(self):
+        self.loader.cancel()
+        self.recorder.stop(remove=True)
         self.canvas.scene.clear()
+        self.current_file = None
+        self.restart_journal()
         self.statusBar().showMessage("Novo arquivo criado")
 
     def open_file(self):
-        filename, _ = QFileDialog.getOpenFileName(
-            self, "Abrir Diagrama", "", "BPMN Files (*.bpmn)"
-        )
+        filename = ThumbnailFileDialog.get_open_file_name(
+            self.thumbnails, self, "Abrir Diagrama")
         if filename:
             try:
-                with open(filename, 'rb') as f:
-                    data = pickle.load(f)
-                    self.canvas.load_elements(data)
+                self.open_document(filename)  # Também abre .bpmn antigos (pickle)
             except Exception as e:
                 QMessageBox.critical(self, "Erro", f"Erro ao abrir arquivo:\n{str(e)}")
 
@@ -392,76 +507,264 @@ class BPMNEditor(QMainWindow):
             self, "Salvar Diagrama", "", "BPMN Files (*.bpmn)"
         )
         if filename:
-            data = {'elements': [e.__getstate__() for e in self.canvas.elements]}
-            with open(filename, 'wb') as f:
-                pickle.dump(data, f)
+            self.save_in_background(filename)
 
     def export_image(self):
         options = QFileDialog.Options()
         file_name, _ = QFileDialog.getSaveFileName(
-            self, "Exportar Imagem", "", "PNG Files (*.png);;JPEG Files (*.jpg)", options=options)
+            self, "Exportar Imagem", "",
+            "PNG Files (*.png);;SVG Files (*.svg);;PDF Files (*.pdf)", options=options)
         
         if file_name:
-            # Implementar exportação da imagem
-            self.statusBar().showMessage(f'Imagem exportada: {file_name}')
+            if Path(file_name).suffix.lower().lstrip('.') not in EXPORT_FORMATS:
+                file_name += '.png'
+            try:
+                render_scene(self.canvas.scene, file_name)
+                self.statusBar().showMessage(f'Imagem exportada: {file_name}')
+            except Exception as e:
+                QMessageBox.critical(self, "Erro", f"Falha ao exportar:\n{str(e)}")
 
     def save_project(self):
         print("[DEBUG] Salvando projeto...")  # Verifique se esta linha aparece
         try:
-            path, _ = QFileDialog.getSaveFileName(self, "Salvar Projeto", "", "BPMN Files (*.bpmn)")
+            filters = f"{NDJSON_FILTER};;{COMPRESSED_FILTER};;{BINARY_FILTER}"
+            path, selected = QFileDialog.getSaveFileName(self, "Salvar Projeto", "", filters)
             if path:
-                # Coletar dados de elementos e conexões
-                elements_data = [elem.__getstate__() for elem in self.canvas.elements]
-                connections = [item for item in self.canvas.scene.items() if isinstance(item, BPMNConnection)]
-                connections_data = [conn.__getstate__() for conn in connections]
-                
-                data = {
-                    'elements': elements_data,
-                    'connections': connections_data
-                }
-                
-                with open(path, 'wb') as f:
-                    pickle.dump(data, f)
+                self.save_in_background(path, 'binary' if selected == BINARY_FILTER else 'ndjson',
+                                        compress=selected == COMPRESSED_FILTER)
 
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Falha ao salvar: {str(e)}")
             logging.error(f"Erro ao salvar: {str(e)}")
 
+    def save_in_background(self, path, format=DEFAULT_FORMAT, compress=False):
+        """Salva sem travar a interface; progresso e resultado vão para a barra de status"""
+        path = str(path)
+        self.loader.finish()  # O instantâneo precisa do documento inteiro
+
+        def before_start(document):
+            # Instantâneo tirado: edições daqui em diante ficam no diário
+            self.recorder.wait()  # Uma compactação em curso não sobrescreve o arquivo
+            self.recorder.hold_compaction()  # Nem uma nova, até o fim do salvamento
+            if format in EXPORT_ONLY_FORMATS:
+                self._saving[path] = (None, document, None)  # Exportação: o diário fica onde está
+            else:
+                self._saving[path] = (self.recorder.mark(), document, self.recorder.journal.path)
+
+        self.saver.save(path, lambda: document_from_scene(self.canvas.scene), format, compress,
+                        before_start=before_start)
+
+    def _ask_parent_revision(self, title):
+        path, _ = QFileDialog.getOpenFileName(self, title, "", "BPMN Files (*.bpmn);;All Files (*)")
+        return path
+
+    def compare_with_file(self):
+        """Mostra no canvas o que mudou desde outra revisão do diagrama"""
+        path = self._ask_parent_revision("Comparar com revisão")
+        if not path:
+            return
+        try:
+            parent = load_document(path)
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Falha ao abrir {path}:\n{e}")
+            return
+        self.loader.finish()
+        current = document_from_scene(self.canvas.scene)
+        diff = diff_documents(parent, current)
+        self.canvas.show_diff(diff, parent, current)
+        counts = ", ".join(f"{count} {name}" for name, count in diff.summary().items() if count)
+        self.statusBar().showMessage(f"Diferenças: {counts or 'nenhuma'}")
+
+    def clear_comparison(self):
+        self.canvas.clear_diff()
+        self.statusBar().clearMessage()
+
+    def save_as_revision(self):
+        """Grava o diagrama só com as mudanças em relação a um .bpmn (a revisão mãe)"""
+        parent_path = self._ask_parent_revision("Revisão mãe")
+        if not parent_path:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Salvar delta de revisão", "",
+                                              f"{DELTA_FILTER};;All Files (*)")
+        if not path:
+            return
+        self.loader.finish()
+        try:
+            delta = save_revision(load_document(parent_path),
+                                  document_from_scene(self.canvas.scene), path)
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Falha ao salvar {path}:\n{e}")
+            return
+        changes = sum(len(delta[kind][part]) for kind in ('elements', 'connections')
+                      for part in ('added', 'removed', 'changed'))
+        self.statusBar().showMessage(f"Delta salvo em {path} ({changes} mudança(s))", 5000)
+
+    def open_revision(self):
+        """Abre uma revisão gravada como delta, reconstruída a partir da mãe"""
+        path, _ = QFileDialog.getOpenFileName(self, "Abrir delta de revisão", "",
+                                              f"{DELTA_FILTER};;All Files (*)")
+        if not path:
+            return
+        parent_path = self._ask_parent_revision("Revisão mãe")
+        if not parent_path:
+            return
+        try:
+            document = load_revision(load_document(parent_path), path)
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Falha ao abrir {path}:\n{e}")
+            return
+        # A revisão reconstruída ainda não tem arquivo próprio; o diagrama
+        # anterior é descartado, junto com o seu diário
+        self.recorder.stop(remove=True)
+        self.populate_canvas(document)
+        self.current_file = None
+        self.restart_journal()
+
+    def on_load_progress(self, created, total):
+        self.statusBar().showMessage(f"Carregando: {created * 100 // max(1, total)}% "
+                                     f"({created}/{total} elementos)")
+
+    def on_load_finished(self, total):
+        self.statusBar().showMessage(f"{total} elementos carregados", 3000)
+
+    def on_save_progress(self, path, percent):
+        self.statusBar().showMessage(f"Salvando {Path(path).name}: {percent}%")
+
+    def on_save_finished(self, path, elapsed_ms):
+        if path in self._saving:
+            self.recorder.release_compaction()
+        mark, document, journal_file = self._saving.pop(path, (None, None, None))
+        journal = self.recorder.journal
+        if journal is not None and journal.path == journal_file:
+            journal.discard_until(mark)
+            if self.recorder.document_path != path:
+                # Salvar como: só agora o diário vai para junto do arquivo novo;
+                # se a gravação falhasse, ele ainda recuperaria tudo
+                self.recorder.stop()
+                target = journal_path(path)
+                if journal_file.exists():
+                    shutil.move(journal_file, target)
+                else:
+                    target.unlink(missing_ok=True)  # Diário velho de outra sessão
+                self.current_file = path
+                self.recorder.start(self.journal_for(path), path)
+        self.statusBar().showMessage(f"Salvo em {path} ({elapsed_ms:.0f} ms)", 5000)
+        if document is not None:
+            self.thumbnails.file_saved(path, document)
+
+    def on_save_failed(self, path, message):
+        if self._saving.pop(path, None) is not None:
+            self.recorder.release_compaction()
+        QMessageBox.critical(self, "Erro", f"Falha ao salvar {path}:\n{message}")
+
     def load_project(self):
         try:
-            path, _ = QFileDialog.getOpenFileName(self, "Abrir Projeto", "", "BPMN Files (*.bpmn)")
+            path = ThumbnailFileDialog.get_open_file_name(self.thumbnails, self, "Abrir Projeto")
             if path:
-                with open(path, 'rb') as f:
-                    data = pickle.load(f)
-
-                # Limpar cena atual
-                self.canvas.scene.clear()
-                self.canvas.elements = []
-                
-                # Passo 1: Recriar elementos
-                elements_map = {}
-                for elem_data in data['elements']:
-                    element = self.canvas.add_element(
-                        elem_data['type'], 
-                        QPointF(elem_data['pos'][0], elem_data['pos'][1])
-                    )
-                    element.unique_id = elem_data['id']  # Garantir ID original
-                    element.name = elem_data['name']
-                    elements_map[elem_data['id']] = element
-                
-                # Passo 2: Reconectar
-                for conn_data in data['connections']:
-                    start = elements_map.get(conn_data['source_id'])
-                    end = elements_map.get(conn_data['target_id'])
-                    if start and end:
-                        self.canvas.create_connection(start, end)
-                    else:
-                        logging.error(f"Conexão inválida: {conn_data}")
+                self.open_document(path)
                     
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Falha ao carregar: {str(e)}")
             logging.error("Erro durante o carregamento:", exc_info=True)
 
+    def open_document(self, path):
+        """Carrega um .bpmn no canvas, reaplicando o diário de uma sessão que caiu.
+
+        No formato binário os textos ficam no arquivo até serem usados;
+        nos outros, documentos grandes são carregados aos poucos. BPMN 2.0
+        XML é importado como documento sem nome (ver import_document).
+        """
+        if detect_format(path) in EXPORT_ONLY_FORMATS:
+            self.import_document(path)
+            return
+        self.loader.cancel()
+        self.recorder.stop()
+        journal = None
+        try:
+            journal = EditJournal(journal_path(path))  # Só cria o arquivo na primeira edição
+            operations = journal.operations()
+            if operations:
+                self.populate_canvas(apply_operations(load_document(path), operations))
+                self.statusBar().showMessage(
+                    f"{len(operations)} alteração(ões) não salvas recuperadas", 5000)
+            elif detect_format(path) != 'binary':
+                self.populate_canvas(load_document(path))
+            else:
+                binary = BinaryDocument(path)
+                self.canvas.scene.clear()
+                self.canvas.elements, self.canvas.connections = [], []
+                with self.canvas.bulk_insert() as bulk:
+                    _, elements, connections = build_lazy_scene(
+                        binary, self.canvas.scene, defer_paths=True)
+                    bulk.elements.extend(elements.values())
+                    bulk.connections.extend(connections)
+                for element in self.canvas.elements:
+                    element.set_editor_reference(self)
+        except Exception:
+            # As edições seguem indo para o diário do documento anterior
+            if journal is not None:
+                journal.close()
+            self.recorder.start(self.journal_for(self.current_file), self.current_file)
+            raise
+        self.current_file = path
+        self.recorder.start(journal, path)
+
+    def import_document(self, path):
+        """Abre um arquivo de outra ferramenta como documento sem nome.
+
+        O arquivo nunca é regravado pelo diário: o mapeamento do editor
+        perderia raias e tipos que ele não conhece. O conteúdo importado
+        entra no diário sem nome, para ser recuperado numa queda.
+        """
+        document = load_document(path)
+        self.loader.cancel()
+        self.recorder.stop()  # O diário do documento anterior fica como está
+        journal = self.journal_for(None)
+        journal.reset()  # Como em "Novo": o que havia sem nome é substituído
+        for record in document['elements']:
+            journal.append({'op': 'add', 'record': record})
+        for record in document['connections']:
+            journal.append({'op': 'connect', 'record': record})
+        self.populate_canvas(document)
+        self.current_file = None
+        self.recorder.start(journal)
+        self.statusBar().showMessage(f"{Path(path).name} importado como documento sem nome", 5000)
+
+    def populate_canvas(self, data):
+        """Substitui o conteúdo do canvas pelo documento carregado"""
+        # Limpar cena atual
+        self.loader.cancel()
+        self.canvas.scene.clear()
+        self.canvas.elements, self.canvas.connections = [], []
+        if len(data['elements']) >= PROGRESSIVE_THRESHOLD:
+            self.loader.load(data)
+            return
+        
+        # Caminhos e cruzamentos são calculados uma vez, no fim da transação
+        with self.canvas.bulk_insert() as bulk:
+            # Passo 1: Recriar elementos
+            elements_map = {}
+            for elem_data in data['elements']:
+                element = bulk.add_element(
+                    elem_data['type'], 
+                    QPointF(elem_data['pos'][0], elem_data['pos'][1]),
+                    name=elem_data['name'],
+                    element_id=elem_data['id'],  # Garantir ID original
+                    description=elem_data.get('description'),
+                    actions=elem_data.get('actions'),
+                    size=elem_data.get('size'),
+                )
+                elements_map[elem_data['id']] = element
+            
+            # Passo 2: Reconectar
+            for conn_data in data['connections']:
+                start = elements_map.get(conn_data['source_id'])
+                end = elements_map.get(conn_data['target_id'])
+                if start and end:
+                    bulk.add_connection(start, end, conn_data.get('id'))
+                else:
+                    logging.error(f"Conexão inválida: {conn_data}")
+
     def delete_element(self):
         selected = self.canvas.scene.selectedItems()
         for item in selected:
@@ -476,68 +779,12 @@ class BPMNEditor(QMainWindow):
         # Limpar cena antes de coletar dados
         self.canvas.scene.clearSelection()
         
-        # Coletar dados de forma segura
-        data = {
-            'elements': [pickle.dumps(item) for item in self.canvas.scene.items() 
-                        if isinstance(item, BPMNElement)],
-            'connections': [pickle.dumps(item) for item in self.canvas.scene.items()
-                        if isinstance(item, BPMNConnection)]
-        }
-        
-        with open(self.current_file, 'wb') as f:
-            pickle.dump(data, f)
+        # Registros de dados (nunca os próprios objetos), gravados fora da thread da interface
+        self.save_in_background(self.current_file)
 
     def load_model(self):
-        # Resetar estado completamente
-        self.canvas.scene.clear()
-        self.current_file = None
-        
-        with open(self.current_file, 'rb') as f:
-            data = pickle.load(f)
-        
-        id_map = {}
-        # Desserialização em 2 passos
-        for item_type in ['elements', 'connections']:
-            for item_data in data[item_type]:
-                item = pickle.loads(item_data)
-                if isinstance(item, BPMNElement):
-                    id_map[item.unique_id] = item
-                    self.canvas.scene.addItem(item)
-                elif isinstance(item, BPMNConnection):
-                    # Conexões serão reconstruídas posteriormente
-                    pass
-
-        # Primeira passada: apenas elementos
-        for item_data in data['elements']:
-            item = pickle.loads(item_data)
-            id_map[item.unique_id] = item
-            self.canvas.scene.addItem(item)
-        
-        # Reconectar elementos
-        logging.info(f"Elementos carregados: {len(id_map)}")
-        logging.info(f"Conexões a processar: {len(data['connections'])}")
-        
-        for idx, item_data in enumerate(data['connections']):
-            conn = pickle.loads(item_data)
-            logging.debug(f"Processando conexão {idx+1}/{len(data['connections'])}: {conn}")
-            conn = pickle.loads(item_data)
-
-            source_id = conn['source_id']  # Nome correto
-            target_id = conn['target_id']
-            
-            source = id_map.get(source_id)
-            target = id_map.get(target_id)
-            
-            if source and target:
-                new_conn = BPMNConnection(source, target)
-                new_conn.unique_id = conn['id']
-                self.canvas.scene.addItem(new_conn)
-                # Mantenha as referências nos elementos
-                source.add_connection(new_conn)
-                target.add_connection(new_conn)
-            else:
-                logging.error(f"Conexão {conn['id']} inválida: "
-                            f"Source ({source_id}) ou Target ({target_id}) não encontrados")
+        self.open_document(self.current_file)
+        logging.info(f"Elementos carregados: {len(self.canvas.elements)}")
                 
     def salvarArquivo(self):
         if not self.current_file:
@@ -546,8 +793,7 @@ class BPMNEditor(QMainWindow):
         
         if self.current_file:
             try:
-                self.save_model()  # ← Substituir código direto pelo método
-                self.statusBar().showMessage(f"Modelo salvo em: {self.current_file}", 5000)
+                self.save_model()  # ← Resultado aparece na barra de status
             except Exception as e:
                 QMessageBox.critical(self, "Erro", f"Falha ao salvar:\n{str(e)}")
 
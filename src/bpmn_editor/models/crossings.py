@@ -0,0 +1,235 @@
+from PyQt5.QtCore import QPointF
+
+from .spatial_index import UniformGridIndex
+
+import math
+import logging
+logger = logging.getLogger(__name__)
+
+# Distância mínima (em unidades de cena) para que um cruzamento perto das
+# extremidades não seja contado: conexões que saem do mesmo ponto de
+# conexão sempre se tocam ali
+ENDPOINT_TOLERANCE = 2.0
+
+
+# Largura das faixas verticais usadas para localizar segmentos candidatos
+SEGMENT_BUCKET_WIDTH = 32.0
+
+
+def flatten_path(path):
+    """Converte o caminho (Bézier) numa lista de pontos (x, y)"""
+    points = []
+    for polygon in path.toSubpathPolygons():
+        points.extend((p.x(), p.y()) for p in polygon)
+    return points
+
+
+class Polyline:
+    """Polilinha achatada com seus segmentos distribuídos em faixas de x.
+
+    Montada uma vez por mudança de caminho; a comparação entre duas
+    polilinhas visita só os segmentos das faixas que cada segmento toca,
+    em vez de todos os pares de segmentos.
+    """
+
+    __slots__ = ('points', 'segments', 'buckets')
+
+    def __init__(self, points):
+        self.points = points
+        self.segments = []
+        self.buckets = {}
+        width = SEGMENT_BUCKET_WIDTH
+        for i in range(len(points) - 1):
+            (ax, ay), (bx, by) = points[i], points[i + 1]
+            min_x, max_x = (ax, bx) if ax < bx else (bx, ax)
+            min_y, max_y = (ay, by) if ay < by else (by, ay)
+            self.segments.append((ax, ay, bx, by, min_x, max_x, min_y, max_y))
+            for bucket in range(math.floor(min_x / width), math.floor(max_x / width) + 1):
+                self.buckets.setdefault(bucket, []).append(i)
+
+    @classmethod
+    def from_path(cls, path):
+        return cls(flatten_path(path))
+
+
+def _segment_intersection(ax, ay, bx, by, cx, cy, dx, dy):
+    rx, ry = bx - ax, by - ay
+    sx, sy = dx - cx, dy - cy
+    denom = rx * sy - ry * sx
+    if denom == 0:
+        return None  # Segmentos paralelos ou colineares
+    qx, qy = cx - ax, cy - ay
+    t = (qx * sy - qy * sx) / denom
+    u = (qx * ry - qy * rx) / denom
+    if 0.0 <= t <= 1.0 and 0.0 <= u <= 1.0:
+        return ax + t * rx, ay + t * ry
+    return None
+
+
+def polyline_intersections(a, b, tolerance=ENDPOINT_TOLERANCE):
+    """Pontos onde as polilinhas `a` e `b` se cruzam (fora das extremidades)"""
+    if not a.segments or not b.segments:
+        return []
+
+    ends = (a.points[0], a.points[-1], b.points[0], b.points[-1])
+    tol2 = tolerance * tolerance
+    width = SEGMENT_BUCKET_WIDTH
+    b_segments = b.segments
+    b_buckets = b.buckets
+    found = []
+
+    for ax, ay, bx, by, min_x, max_x, min_y, max_y in a.segments:
+        seen = set()
+        for bucket in range(math.floor(min_x / width), math.floor(max_x / width) + 1):
+            for j in b_buckets.get(bucket, ()):
+                if j in seen:
+                    continue
+                seen.add(j)
+                cx, cy, dx, dy, c_min_x, c_max_x, c_min_y, c_max_y = b_segments[j]
+                if c_max_x < min_x or c_min_x > max_x or c_max_y < min_y or c_min_y > max_y:
+                    continue
+                point = _segment_intersection(ax, ay, bx, by, cx, cy, dx, dy)
+                if point is None:
+                    continue
+                if any((point[0] - ex) ** 2 + (point[1] - ey) ** 2 <= tol2 for ex, ey in ends):
+                    continue
+                if any((point[0] - fx) ** 2 + (point[1] - fy) ** 2 <= tol2 for fx, fy in found):
+                    continue  # Mesmo cruzamento visto em segmentos vizinhos
+                found.append(point)
+    return [QPointF(x, y) for x, y in found]
+
+
+class CrossingEngine:
+    """Detecção incremental de cruzamentos entre conexões.
+
+    Fase larga: grade uniforme sobre os retângulos envolventes das conexões.
+    Fase estreita: interseção das polilinhas obtidas dos caminhos Bézier.
+    Quando o caminho de uma conexão muda, apenas ela é comparada com as
+    vizinhas da grade, e os conjuntos `crossing_connections` das duas
+    pontas de cada par são ajustados juntos, mantendo a simetria.
+
+    Os pontos de cruzamento ficam guardados por par de conexões e só são
+    descartados quando o caminho de uma das duas muda; o paint apenas lê
+    os marcadores já prontos.
+    """
+
+    def __init__(self, cell_size=200):
+        self._grid = UniformGridIndex(cell_size)
+        self._polylines = {}
+        self._pair_points = {}  # frozenset({a, b}) -> [QPointF]
+        self._markers = {}      # conexão -> pontos de todos os seus pares
+        self._pending = set()
+        self.suspended = False
+
+    def __contains__(self, connection):
+        return connection in self._polylines
+
+    def __len__(self):
+        return len(self._polylines)
+
+    def update(self, connection):
+        """Recalcula os cruzamentos de uma conexão cujo caminho mudou"""
+        if self.suspended:
+            self._pending.add(connection)
+            return
+        self._recompute(connection)
+
+    def update_many(self, connections):
+        for connection in connections:
+            self.update(connection)
+
+    def crossing_points(self, connection):
+        """Pontos de cruzamento (coordenadas de cena) já calculados"""
+        markers = self._markers.get(connection)
+        if markers is None:
+            markers = []
+            for other in connection.crossing_connections:
+                markers.extend(self._pair_points.get(frozenset((connection, other)), ()))
+            self._markers[connection] = markers
+        return markers
+
+    def remove(self, connection):
+        """Tira a conexão do motor e desfaz seus cruzamentos"""
+        self._pending.discard(connection)
+        self._grid.remove(connection)
+        self._polylines.pop(connection, None)
+        self._markers.pop(connection, None)
+        for other in getattr(connection, 'crossing_connections', []):
+            self._pair_points.pop(frozenset((connection, other)), None)
+            self._markers.pop(other, None)
+            if connection in other.crossing_connections:
+                other.crossing_connections.remove(connection)
+                other.update()
+        connection.crossing_connections = []
+
+    def clear(self):
+        """Esquece tudo sem tocar nos itens (usado por GridScene.clear)"""
+        self._grid.clear()
+        self._polylines.clear()
+        self._pair_points.clear()
+        self._markers.clear()
+        self._pending.clear()
+
+    def rebuild(self, connections):
+        """Reconstrói o motor do zero (equivalente ao antigo update_connections)"""
+        self.clear()
+        connections = list(connections)
+        for connection in connections:
+            connection.crossing_connections = []
+            self._index(connection)
+        for connection in connections:
+            self._recompute(connection, reindex=False)
+
+    def suspend(self):
+        self.suspended = True
+
+    def resume(self):
+        """Reativa o motor e processa de uma vez as conexões pendentes"""
+        self.suspended = False
+        pending, self._pending = self._pending, set()
+        for connection in pending:
+            self._index(connection)
+        for connection in pending:
+            self._recompute(connection, reindex=False)
+
+    def _index(self, connection):
+        path = connection.path()
+        self._polylines[connection] = Polyline.from_path(path)
+        # Folga evita retângulos de área nula (caminhos retos)
+        self._grid.insert(connection, path.boundingRect().adjusted(-1, -1, 1, 1))
+
+    def _recompute(self, connection, reindex=True):
+        if reindex:
+            self._index(connection)
+        polyline = self._polylines[connection]
+        area = self._grid.rect_of(connection)
+
+        # O caminho mudou: todos os pares desta conexão são refeitos
+        for other in connection.crossing_connections:
+            self._pair_points.pop(frozenset((connection, other)), None)
+
+        crossing = []
+        for other in self._grid.items_in_rect(area):
+            if other is connection:
+                continue
+            points = polyline_intersections(polyline, self._polylines[other])
+            if points:
+                crossing.append(other)
+                self._pair_points[frozenset((connection, other))] = points
+
+        old = set(connection.crossing_connections)
+        new = set(crossing)
+        for other in old - new:
+            if connection in other.crossing_connections:
+                other.crossing_connections.remove(connection)
+        for other in new - old:
+            if connection not in other.crossing_connections:
+                other.crossing_connections.append(connection)
+        # Os marcadores de todos os parceiros (antigos e novos) mudaram
+        for other in old | new:
+            self._markers.pop(other, None)
+            other.update()
+
+        connection.crossing_connections = crossing
+        self._markers.pop(connection, None)
+        connection.update()
@@ -0,0 +1,211 @@
+from PyQt5.QtCore import QTimer, QRectF
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Intervalo de um quadro (~60 Hz) entre recálculos durante um arrasto
+FRAME_INTERVAL_MS = 16
+
+
+class GeometryDispatcher:
+    """Central de mudanças de geometria da GridScene.
+
+    Substitui os sinais por objeto (elementMoved -> updatePosition de cada
+    conexão). A cena mantém um mapa elemento -> conexões, alimentado pelas
+    conexões ao entrar/sair da cena, e cada movimento de elemento chega
+    aqui por BPMNElement.itemChange.
+
+    Fora de um arrasto o lote é entregue na hora. Entre `begin()` e
+    `end()` (pressionar e soltar o mouse sobre um elemento) os elementos
+    movidos são acumulados e entregues uma vez por quadro. Em cada entrega
+    as conexões afetadas são deduplicadas, cada caminho é recalculado uma
+    única vez com o motor de cruzamentos em lote, e os assinantes
+    (`subscribe`) recebem (elementos, conexões) numa só chamada.
+
+    Observadores de área (`subscribe_regions`, como o minimapa) recebem,
+    uma vez por quadro, as regiões de cena em que algum item entrou,
+    saiu ou mudou de lugar. Sem observadores nada disso é registrado.
+
+    Observadores de edição (`subscribe_edits`, como o diário de edições)
+    são avisados na hora quando um item entra ('add') ou sai ('remove')
+    da cena, ou quando um elemento é renomeado ('rename').
+    """
+
+    def __init__(self, scene, interval=FRAME_INTERVAL_MS):
+        self.scene = scene
+        self._adjacency = {}  # elemento -> {conexão: None} (dict = conjunto ordenado)
+        self._endpoints = {}  # conexão -> elementos em que foi registrada
+        self._moved = {}      # Elementos movidos no lote atual
+        self._subscribers = []
+        self._depth = 0
+        self._timer = QTimer(scene)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self.flush)
+
+        self._edit_subscribers = []
+        self._region_subscribers = []
+        self._bounds = {}   # item -> último retângulo de cena conhecido
+        self._regions = []  # Regiões alteradas ainda não entregues
+        self._region_timer = QTimer(scene)
+        self._region_timer.setSingleShot(True)
+        self._region_timer.setInterval(interval)
+        self._region_timer.timeout.connect(self.flush_regions)
+
+    # Mapa elemento -> conexões
+
+    def attach(self, connection):
+        """Registra (ou atualiza) as pontas de uma conexão"""
+        self.detach(connection)
+        endpoints = tuple(element for element in (connection.source, connection.target)
+                          if element is not None)
+        for element in endpoints:
+            self._adjacency.setdefault(element, {})[connection] = None
+        self._endpoints[connection] = endpoints
+
+    def detach(self, connection):
+        for element in self._endpoints.pop(connection, ()):
+            connections = self._adjacency.get(element)
+            if connections is not None:
+                connections.pop(connection, None)
+                if not connections:
+                    del self._adjacency[element]
+
+    def connections_of(self, element):
+        return list(self._adjacency.get(element, ()))
+
+    # Assinantes
+
+    def subscribe(self, callback):
+        """callback(elementos, conexões) é chamado uma vez por lote"""
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    # Edições
+
+    def subscribe_edits(self, callback):
+        """callback(operação, item) para 'add', 'remove' e 'rename'"""
+        if callback not in self._edit_subscribers:
+            self._edit_subscribers.append(callback)
+
+    def unsubscribe_edits(self, callback):
+        if callback in self._edit_subscribers:
+            self._edit_subscribers.remove(callback)
+
+    def item_edited(self, operation, item):
+        if item.data(0) is None:
+            return
+        for callback in list(self._edit_subscribers):
+            callback(operation, item)
+
+    # Regiões alteradas
+
+    def subscribe_regions(self, callback):
+        """callback([QRectF, ...]) recebe as regiões alteradas, uma vez por quadro"""
+        if callback in self._region_subscribers:
+            return
+        if not self._region_subscribers:
+            # A partir de agora é preciso saber de onde cada item sai
+            self._bounds = {item: item.sceneBoundingRect() for item in self.scene.items()
+                            if item.data(0) is not None}
+        self._region_subscribers.append(callback)
+
+    def unsubscribe_regions(self, callback):
+        if callback in self._region_subscribers:
+            self._region_subscribers.remove(callback)
+        if not self._region_subscribers:
+            self._bounds.clear()
+            self._regions.clear()
+
+    def item_geometry_changed(self, item, rect=None):
+        """Item entrou/mudou (rect = novo retângulo de cena) ou saiu (rect = None)"""
+        if not self._region_subscribers:
+            return
+        old = self._bounds.pop(item, None)
+        if old is not None:
+            self._regions.append(old)
+        if rect is not None:
+            self._bounds[item] = QRectF(rect)
+            self._regions.append(QRectF(rect))
+        if self._regions and not self._region_timer.isActive():
+            self._region_timer.start()
+
+    def flush_regions(self):
+        self._region_timer.stop()
+        if not self._regions:
+            return
+        regions, self._regions = self._regions, []
+        for callback in list(self._region_subscribers):
+            callback(regions)
+
+    # Lotes
+
+    @property
+    def batching(self):
+        return self._depth > 0
+
+    def begin(self):
+        """Início de um arrasto: passa a acumular os movimentos"""
+        self._depth += 1
+
+    def end(self):
+        """Fim do arrasto: entrega o que estiver pendente imediatamente"""
+        if self._depth > 0:
+            self._depth -= 1
+        if self._depth == 0:
+            self.flush()
+
+    def element_moved(self, element):
+        self._moved[element] = None
+        if not self._depth:
+            self.flush()
+        elif not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        """Recalcula uma vez cada conexão dos elementos movidos e avisa os assinantes"""
+        self._timer.stop()
+        if not self._moved:
+            return
+        moved, self._moved = list(self._moved), {}
+        connections = {}
+        for element in moved:
+            connections.update(self._adjacency.get(element, ()))
+        connections = list(connections)
+        self.update_connections(connections)
+        for callback in list(self._subscribers):
+            callback(moved, connections)
+
+    def discard(self, element):
+        """Esquece um elemento removido da cena"""
+        self._moved.pop(element, None)
+
+    def clear(self):
+        self._timer.stop()
+        self._moved.clear()
+        self._adjacency.clear()
+        self._endpoints.clear()
+        self._depth = 0
+        if self._bounds:
+            # Tudo o que estava na cena some de uma vez
+            self._regions.extend(self._bounds.values())
+            self._bounds.clear()
+            self._region_timer.start()
+
+    def update_connections(self, connections):
+        crossings = getattr(self.scene, 'crossings', None)
+        if crossings is None or crossings.suspended or len(connections) < 2:
+            for connection in connections:
+                connection.update_position()
+            return
+        # Cada caminho novo entra no motor de cruzamentos de uma vez só
+        crossings.suspend()
+        try:
+            for connection in connections:
+                connection.update_position()
+        finally:
+            crossings.resume()
@@ -1,40 +1,58 @@
 import sys
 from PyQt5.QtWidgets import (QGraphicsRectItem, QGraphicsLineItem, QGraphicsItem, 
-                             QGraphicsObject, QDialog, QGraphicsPathItem)
+                             QGraphicsObject, QDialog, QGraphicsPathItem,
+                             QStyleOptionGraphicsItem)
 from PyQt5.QtGui import (QColor, QBrush, QPen, QPolygonF, QPainterPath, QPainter, QCursor)
-from PyQt5.QtCore import (Qt, QPointF, QRectF, QLineF, pyqtSignal)
+from PyQt5.QtCore import (Qt, QPointF, QRectF, QLineF)
 
 from ..dialogs.property_dialog import PropertyDialog
+from .lod import lod_tier
+from .styles import style_table
+from .geometry import element_geometry, default_size, CORNER_RADIUS
+from .labels import LabelCache, DEFAULT_LABEL_MODE
 
 import uuid 
 import logging
 logger = logging.getLogger(__name__)
 
-# from PyQt5.QtCore import QObject, pyqtSignal
+def sync_spatial_index(item, change, value):
+    """Mantém o índice espacial da cena (modo 'grid') em dia com o item
+    e avisa os observadores de edição quando o item entra ou sai da cena"""
+    if change == QGraphicsItem.ItemSceneChange:
+        old_scene = item.scene()
+        if old_scene is not None and hasattr(old_scene, 'unindex_item'):
+            old_scene.unindex_item(item)
+        if old_scene is not None and hasattr(old_scene, 'dispatcher'):
+            old_scene.dispatcher.item_edited('remove', item)
+    elif change in (QGraphicsItem.ItemSceneHasChanged,
+                    QGraphicsItem.ItemPositionHasChanged):
+        scene = item.scene()
+        if scene is not None and hasattr(scene, 'reindex_item'):
+            scene.reindex_item(item)
+        if (change == QGraphicsItem.ItemSceneHasChanged and scene is not None
+                and hasattr(scene, 'dispatcher')):
+            scene.dispatcher.item_edited('add', item)
+
 class BPMNElement(QGraphicsObject):
-    elementMoved = pyqtSignal()  # Sinal para notificar movimento
+    # Movimentos são entregues pelo GeometryDispatcher da cena (ver
+    # models/dispatcher.py), não por sinais por elemento
 
     def __init__(self, element_type: str, pos: QPointF):
         super().__init__()
-        self.rect = QRectF(0, 0, 0, 0)
+        self._element_type = element_type
+        self._geometry = None  # Cache de shape()/boundingRect()/pontos
+        self._label = LabelCache()  # Rótulo pronto por faixa de zoom
+        self._rect = QRectF(0, 0, 0, 0)
+        self._text_source = None  # Textos ainda não decodificados (ver defer_text)
         self.actions = {}  # Dicionário para armazenar ações e seus parâmetros
         self.unique_id = uuid.uuid4().hex  # Gerar ID único
         self.setData(0, self.unique_id)   # Armazenar no item
 
         # Define o tamanho padrão do elemento baseado no tipo
-        if element_type in ["task", "subprocess"]:
-            width, height = 100, 80
-        elif element_type in ["start_event", "end_event", "intermediate_event"]:
-            width, height = 40, 40
-        elif element_type in ["gateway"]:
-            width, height = 50, 50
-        else:
-            width, height = 60, 60
+        width, height = default_size(element_type)
             
-        # Centraliza o retângulo na posição fornecida
-        x = pos.x() - width/2
-        y = pos.y() - height/2
-        self.rect = QRectF(x, y, width, height)
+        # Centraliza o retângulo na posição do elemento (coordenadas locais)
+        self.rect = QRectF(-width/2, -height/2, width, height)
 
         self.name = "Novo Elemento"
         self.description = ""
@@ -45,19 +63,126 @@ class BPMNElement(QGraphicsObject):
         self.setFlag(QGraphicsItem.ItemSendsGeometryChanges, True)
         self.setFlag(QGraphicsItem.ItemSendsScenePositionChanges, True)
 
-        self.element_type = element_type
         self.connections = []  # Lista de conexões
-        
-    def setPos(self, *args):
-        super().setPos(*args)
-        self.elementMoved.emit()  # Emitir o sinal quando a posição mudar
+
+    @property
+    def rect(self):
+        return self._rect
+
+    @rect.setter
+    def rect(self, value):
+        self._set_geometry_key('_rect', QRectF(value))
+
+    @property
+    def element_type(self):
+        return self._element_type
+
+    @element_type.setter
+    def element_type(self, value):
+        self._set_geometry_key('_element_type', value)
+
+    def _set_geometry_key(self, attr, value):
+        """Troca tipo/retângulo avisando o Qt e descartando a geometria em cache"""
+        if getattr(self, attr, None) == value:
+            return
+        self._mark_dirty()
+        self.prepareGeometryChange()
+        setattr(self, attr, value)
+        self._geometry = None
+        self._mark_dirty()
+        scene = self.scene()
+        if scene is not None and hasattr(scene, 'reindex_item'):
+            scene.reindex_item(self)
+        for connection in getattr(self, 'connections', []):
+            connection.update_position()
+
+    def defer_text(self, source):
+        """Adia nome, descrição e ações até o primeiro acesso.
+
+        `source()` devolve (nome, descrição, ações); usado pelo formato
+        binário, que só decodifica o texto de elementos vistos ou editados.
+        """
+        self._text_source = source
+        self._label.invalidate()
+        self.update()
+
+    def _load_text(self):
+        source, self._text_source = self._text_source, None
+        self._name, self._description, self._actions = source()
+
+    @property
+    def name(self):
+        if self._text_source is not None:
+            self._load_text()
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        # Diálogo, painéis e carregadores passam todos por aqui
+        if getattr(self, '_text_source', None) is not None:
+            self._load_text()
+        if getattr(self, '_name', None) == value:
+            return
+        self._name = value
+        label = getattr(self, '_label', None)
+        if label is None:
+            self._label = LabelCache()
+        else:
+            label.invalidate()
+        self.update()
+        scene = self.scene()
+        if scene is not None and hasattr(scene, 'dispatcher'):
+            scene.dispatcher.item_edited('rename', self)
+
+    @property
+    def description(self):
+        if self._text_source is not None:
+            self._load_text()
+        return self._description
+
+    @description.setter
+    def description(self, value):
+        if self._text_source is not None:
+            self._load_text()
+        self._description = value
+
+    @property
+    def actions(self):
+        if self._text_source is not None:
+            self._load_text()
+        return self._actions
+
+    @actions.setter
+    def actions(self, value):
+        if self._text_source is not None:
+            self._load_text()
+        self._actions = value
+
+    def geometry(self):
+        """Geometria (contorno, rótulo, limites, pontos) do tipo e retângulo atuais"""
+        if self._geometry is None:
+            self._geometry = element_geometry(self._element_type, self._rect)
+        return self._geometry
 
     def itemChange(self, change, value):
         if change == QGraphicsItem.ItemPositionChange:
-            # Atualizar conexões quando o elemento é movido
-            for connection in self.connections:
-                connection.update_position()
-            self.elementMoved.emit()  # Emitir sinal de movimento
+            # Região antiga do elemento e das conexões (modo 'dirty')
+            self._mark_dirty()
+        elif change == QGraphicsItem.ItemPositionHasChanged:
+            # Atualizar conexões depois que o elemento foi movido (durante
+            # um arrasto, uma vez por quadro para toda a seleção)
+            dispatcher = getattr(self.scene(), 'dispatcher', None)
+            if dispatcher is not None:
+                dispatcher.element_moved(self)
+            else:
+                for connection in self.connections:
+                    connection.update_position()
+            self._mark_dirty()  # Região nova
+        elif change == QGraphicsItem.ItemSceneChange:
+            dispatcher = getattr(self.scene(), 'dispatcher', None)
+            if dispatcher is not None:
+                dispatcher.discard(self)
+        sync_spatial_index(self, change, value)
         return super().itemChange(change, value)
 
     def serialize(self):
@@ -78,11 +203,11 @@ class BPMNElement(QGraphicsObject):
             'connections': [c.unique_id for c in self.connections 
                         if isinstance(c, BPMNConnection)]
         }
-        print(f"[SERIALIZAÇÃO] Elemento {self.unique_id}")
+        logger.debug(f"[SERIALIZAÇÃO] Elemento {self.unique_id}")
         return state
 
     def __setstate__(self, state):
-        print(f"[DESSERIALIZAÇÃO] Elemento {state['id']}")
+        logger.debug(f"[DESSERIALIZAÇÃO] Elemento {state['id']}")
         self.unique_id = state['id']
         self.element_type = state['type']
         self.setPos(*state['pos'])
@@ -92,71 +217,77 @@ class BPMNElement(QGraphicsObject):
     def get_persistent_id(self):
         return self.data(0)  # Recuperar ID armazenado
     
+    def style(self):
+        """Estilo pré-calculado do tipo do elemento no tema da cena"""
+        styles = getattr(self.scene(), 'styles', None) or style_table()
+        return styles.element(self.element_type)
+
     def get_color(self):
-        colors = {
-            'start': QColor('#4CAF50'),
-            'task': QColor('#2196F3'),
-            'gateway': QColor('#FF9800')
-        }
-        return colors.get(self.element_type, QColor('#607D8B'))
+        return self.style().color
     
+    def label_mode(self):
+        return getattr(self.scene(), 'label_mode', DEFAULT_LABEL_MODE)
+
+    def prepare_label_mode_change(self):
+        """Chamado pela cena antes de trocar o modo de rótulo (muda os limites)"""
+        self.prepareGeometryChange()
+
     def boundingRect(self):
-        if self.element_type == 'gateway':
-            return QRectF(-10, -10, 120, 90)  # Área maior para o losango
-        return self.rect
+        # Inclui rótulo, caneta de seleção e pontos de conexão
+        geometry = self.geometry()
+        if self.label_mode() == 'wrap':
+            return geometry.wrapped_bounding_rect
+        return geometry.bounding_rect
     
     def shape(self):
-        path = QPainterPath()
-        if self.element_type == 'start':
-            path.addEllipse(self.rect)
-        elif self.element_type == 'gateway':
-            diamond = QPolygonF([
-                QPointF(self.rect.center().x(), self.rect.top()),
-                QPointF(self.rect.right(), self.rect.center().y()),
-                QPointF(self.rect.center().x(), self.rect.bottom()),
-                QPointF(self.rect.left(), self.rect.center().y())
-            ])
-            path.addPolygon(diamond)
-        else:
-            path.addRoundedRect(self.rect, 10, 10)
-        return path
+        # Cópia: o contorno em cache é compartilhado por todos os elementos
+        # iguais. O QPainterPath é copiado só se quem o recebe alterá-lo.
+        return QPainterPath(self.geometry().outline)
+
+    def lod_box(self):
+        """Área ocupada pela forma desenhada (usada no nível 'minimal')"""
+        return self.geometry().rect
 
     def paint(self, painter: QPainter, option, widget=None):
+        style = self.style()
+        geometry = self.geometry()
+        tier = lod_tier(self, option, painter)
+        if tier == 'minimal':
+            # Zoom muito afastado: só uma caixa preenchida
+            painter.fillRect(geometry.rect, style.brush)
+            return
+
         # Destacar seleção
-        if self.isSelected():
-            painter.setPen(QPen(Qt.yellow, 3))
-        else:
-            painter.setPen(QPen(Qt.black, 1))
-    
-        painter.setBrush(self.get_color())
-        
-        # Desenha pontos de conexão quando selecionado
-        if self.isSelected():
-            painter.setPen(QPen(Qt.blue, 2))
-            for point in self.connectionPoints():
-                painter.drawEllipse(point, 4, 4)
-        
-        # Formas específicas por tipo
-        if self.element_type == 'start':
+        selected = self.isSelected()
+        painter.setPen(style.selected_pen if selected else style.pen)
+        painter.setBrush(style.brush)
+
+        # Formas específicas por tipo (geometria em cache do elemento)
+        if geometry.kind == 'ellipse':
             # Círculo para evento de início
-            painter.drawEllipse(25, 10, 50, 50)
-            painter.drawText(QRectF(0, 60, 100, 20), Qt.AlignCenter, self.name)
-            
-        elif self.element_type == 'gateway':
+            painter.drawEllipse(geometry.rect)
+        elif geometry.kind == 'diamond':
             # Losango para gateway
-            diamond = QPolygonF([
-                QPointF(50, 0), 
-                QPointF(100, 35),
-                QPointF(50, 70),
-                QPointF(0, 35)
-            ])
-            painter.drawPolygon(diamond)
-            painter.drawText(QRectF(0, 70, 100, 20), Qt.AlignCenter, self.name)
-            
+            painter.drawPolygon(geometry.polygon)
         else:  # Tarefas
             # Retângulo com cantos arredondados
-            painter.drawRoundedRect(0, 0, 100, 60, 10, 10)
-            painter.drawText(QRectF(0, 60, 100, 20), Qt.AlignCenter, self.name)
+            painter.drawRoundedRect(geometry.rect, CORNER_RADIUS, CORNER_RADIUS)
+
+        if tier != 'full':
+            return
+
+        painter.setFont(style.font)
+        scale = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        mode = self.label_mode()
+        rect = geometry.wrapped_label_rect if mode == 'wrap' else geometry.label_rect
+        for point, text in self._label.lines(self.name, style.font, rect, scale, mode):
+            painter.drawStaticText(point, text)
+
+        # Desenha pontos de conexão quando selecionado
+        if selected:
+            painter.setPen(style.handle_pen)
+            for point in geometry.connection_points:
+                painter.drawEllipse(point, 4, 4)
 
         # # Desenha elipse nos cruzamentos
         # for other in self.crossing_connections:
@@ -196,10 +327,36 @@ class BPMNElement(QGraphicsObject):
             
         super().mouseDoubleClickEvent(event)
 
+    def _mark_dirty(self):
+        scene = self.scene()
+        if scene is None or getattr(scene, 'repaint_mode', 'full') != 'dirty':
+            return
+        scene.mark_dirty(self.sceneBoundingRect())
+        for connection in self.connections:
+            scene.mark_dirty(connection.sceneBoundingRect())
+
+    def mousePressEvent(self, event):
+        # Os movimentos até soltar o botão são agrupados por quadro
+        dispatcher = getattr(self.scene(), 'dispatcher', None)
+        if dispatcher is not None and event.button() == Qt.LeftButton:
+            dispatcher.begin()
+        super().mousePressEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        super().mouseReleaseEvent(event)
+        dispatcher = getattr(self.scene(), 'dispatcher', None)
+        if dispatcher is not None and event.button() == Qt.LeftButton:
+            dispatcher.end()
+
     def mouseMoveEvent(self, event):
-        # Forçar atualização em tempo real
+        # Forçar atualização em tempo real (no modo 'dirty' só as regiões
+        # marcadas em itemChange são repintadas)
         super().mouseMoveEvent(event)
-        self.scene().update()
+        scene = self.scene()
+        if hasattr(scene, 'request_full_repaint'):
+            scene.request_full_repaint()
+        else:
+            scene.update()
 
     def add_connection(self, connection):
         if connection not in self.connections:
@@ -210,15 +367,8 @@ class BPMNElement(QGraphicsObject):
             self.connections.remove(connection)
 
     def connectionPoints(self):
-        """Retorna os pontos de conexão do elemento"""
-        rect = self.rect()
-        center = rect.center()
-        return [
-            QPointF(center.x(), rect.top()),    # Topo
-            QPointF(rect.right(), center.y()),  # Direita
-            QPointF(center.x(), rect.bottom()), # Base
-            QPointF(rect.left(), center.y())    # Esquerda
-        ]
+        """Retorna os pontos de conexão do elemento (topo, direita, base, esquerda)"""
+        return list(self.geometry().connection_points)
     
     def nearestConnectionPoint(self, point: QPointF):
         """Encontra o ponto de conexão mais próximo de uma coordenada"""
@@ -227,7 +377,9 @@ class BPMNElement(QGraphicsObject):
         return min(points, key=lambda p: (p - scene_point).manhattanLength())
 
 class BPMNConnection(QGraphicsPathItem):
-    def __init__(self, start_element, end_element=None):
+    def __init__(self, start_element, end_element=None, defer_path=False):
+        """Com defer_path=True o caminho fica vazio até o primeiro update_position
+        (cargas em massa calculam todos os caminhos de uma vez no fim)"""
         super().__init__()
         self.unique_id = uuid.uuid4().hex
         self._start_element = start_element
@@ -267,15 +419,14 @@ class BPMNConnection(QGraphicsPathItem):
         # Configurações visuais
         self.setZValue(-1)  # Ficar atrás dos elementos
         self.setPen(QPen(Qt.darkGray, 2, Qt.SolidLine, Qt.RoundCap))  # Atualizado
-        self.update_position()
-
-        self._start.elementMoved.connect(self.updatePosition)
-        self._end.elementMoved.connect(self.updatePosition)
+        # O caminho acompanha os elementos pelo GeometryDispatcher da cena,
+        # que registra a conexão ao entrar nela (ver itemChange)
+        if not defer_path:
+            self.update_position()
 
-        # DEBUG:
-        print(f"[DEBUG] Conexão {self.unique_id} criada com:")  # ASCII seguro
-        print(f"  Source: {self.source.unique_id if self.source else 'None'}")
-        print(f"  Target: {self.target.unique_id if self.target else 'None'}")
+        logger.debug(f"Conexão {self.unique_id} criada: "
+                     f"{self.source.unique_id if self.source else 'None'} -> "
+                     f"{self.target.unique_id if self.target else 'None'}")
 
     def __getstate__(self):
         return {
@@ -293,6 +444,40 @@ class BPMNConnection(QGraphicsPathItem):
         self._source_id = state['source_id']  # Armazena temporariamente
         self._target_id = state['target_id']
 
+    @property
+    def source(self):
+        return self._start_element
+
+    @property
+    def target(self):
+        return self._end_element
+
+    def itemChange(self, change, value):
+        sync_spatial_index(self, change, value)
+        # Entrada e saída da cena registram a conexão no motor de cruzamentos
+        # e no mapa elemento -> conexões do dispatcher
+        if change == QGraphicsItem.ItemSceneChange:
+            old_scene = self.scene()
+            if old_scene is not None and hasattr(old_scene, 'crossings'):
+                old_scene.crossings.remove(self)
+            if old_scene is not None and hasattr(old_scene, 'dispatcher'):
+                old_scene.dispatcher.detach(self)
+        elif change == QGraphicsItem.ItemSceneHasChanged:
+            scene = self.scene()
+            if scene is not None and hasattr(scene, 'crossings'):
+                scene.crossings.update(self)
+            if scene is not None and hasattr(scene, 'dispatcher'):
+                scene.dispatcher.attach(self)
+        return super().itemChange(change, value)
+
+    def setPath(self, path):
+        super().setPath(path)
+        scene = self.scene()
+        if scene is not None and hasattr(scene, 'reindex_item'):
+            scene.reindex_item(self)
+        if scene is not None and hasattr(scene, 'crossings'):
+            scene.crossings.update(self)
+
     def start_element(self):
         return self._start_element
 
@@ -300,10 +485,8 @@ class BPMNConnection(QGraphicsPathItem):
         return self._end_element
 
     def updatePosition(self):
-        # Atualiza a posição da linha baseado na posição dos elementos
-        start_pos = self._start_element.pos()
-        end_pos = self._end_element.pos()
-        self.setLine(start_pos.x(), start_pos.y(), end_pos.x(), end_pos.y())
+        # Atualiza o caminho baseado na posição dos elementos
+        self.update_position()
 
     def update_position(self):
         if not self._start_element or not self._end_element:
@@ -344,18 +527,42 @@ class BPMNConnection(QGraphicsPathItem):
             'end_element_id': self.end_id
         }
 
+    def crossing_points(self):
+        """Pontos de cruzamento calculados pelo motor da cena (em cache)"""
+        scene = self.scene()
+        if scene is None or not hasattr(scene, 'crossings'):
+            return []
+        return scene.crossings.crossing_points(self)
+
+    def boundingRect(self):
+        # Os marcadores de cruzamento (raio 3) passam da caneta do caminho
+        return super().boundingRect().adjusted(-3, -3, 3, 3)
+
     def paint(self, painter, option, widget):
+        styles = getattr(self.scene(), 'styles', None) or style_table()
         if self.isSelected():
-            painter.setPen(QPen(Qt.red, 2, Qt.DashLine))
+            painter.setPen(styles.connection.selected_pen)
         else:
-            painter.setPen(QPen(Qt.darkGray, 2, Qt.SolidLine))
-        painter.drawLine(self.line())
+            painter.setPen(styles.connection.pen)
+        painter.setBrush(Qt.NoBrush)
+
+        tier = lod_tier(self, option, painter)
+        path = self.path()
+        if tier == 'minimal':
+            # Zoom muito afastado: a curva vira um segmento reto
+            if path.elementCount() > 1:
+                first = path.elementAt(0)
+                last = path.elementAt(path.elementCount() - 1)
+                painter.drawLine(QLineF(first.x, first.y, last.x, last.y))
+            return
+
+        painter.drawPath(path)
+        if tier != 'full':
+            return
 
-        for other in self.crossing_connections:
-            intersection = self.path().intersected(other.path())
-            if not intersection.isEmpty():
-                rect = intersection.boundingRect()
-                painter.drawEllipse(rect.center(), 3, 3)
+        # Marcadores já calculados quando a geometria mudou
+        for point in self.crossing_points():
+            painter.drawEllipse(point, 3, 3)
 
     def updatePath(self):
         path = QPainterPath()
@@ -408,6 +615,10 @@ class BPMNConnection(QGraphicsPathItem):
             if not hasattr(self._end_element, 'connections'):
                 self._end_element.connections = []
             self._end_element.connections.append(self)
+
+        scene = self.scene()
+        if scene is not None and hasattr(scene, 'dispatcher'):
+            scene.dispatcher.attach(self)
         
         # Atualiza o caminho visual
         self.updatePath()
@@ -420,7 +631,10 @@ class BPMNConnection(QGraphicsPathItem):
             
         # Usa boundingRect() para melhor performance
         area = self.path().boundingRect()  
-        items = scene.items(area, Qt.IntersectsItemShape)
+        if hasattr(scene, 'items_in_area'):
+            items = scene.items_in_area(area, Qt.IntersectsItemShape)
+        else:
+            items = scene.items(area, Qt.IntersectsItemShape)
         
         return any(
             isinstance(item, BPMNConnection) 
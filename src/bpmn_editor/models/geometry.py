@@ -0,0 +1,95 @@
+from PyQt5.QtCore import QPointF, QRectF
+from PyQt5.QtGui import QPainterPath, QPolygonF
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Tamanho padrão (largura, altura) de cada tipo de elemento
+DEFAULT_SIZES = {
+    'start': (50, 50),
+    'task': (100, 60),
+    'gateway': (100, 70),
+}
+FALLBACK_SIZE = (60, 60)
+
+CORNER_RADIUS = 10
+LABEL_HEIGHT = 20
+WRAPPED_LABEL_HEIGHT = 3 * LABEL_HEIGHT  # Até três linhas no modo 'wrap' (models/labels.py)
+
+# Quanto o desenho passa do contorno: metade da caneta de seleção (3)
+# e os pontos de conexão (raio 4 + caneta 2) centrados nas bordas
+PAINT_MARGIN = 5
+
+_cache = {}
+MAX_CACHED_GEOMETRIES = 4096
+
+
+def default_size(element_type):
+    return DEFAULT_SIZES.get(element_type, FALLBACK_SIZE)
+
+
+def shape_kind(element_type):
+    if element_type == 'start':
+        return 'ellipse'
+    if element_type == 'gateway':
+        return 'diamond'
+    return 'rounded_rect'
+
+
+class ElementGeometry:
+    """Geometria derivada de (tipo, retângulo) de um elemento.
+
+    Imutável e compartilhada entre todos os elementos com o mesmo tipo e
+    o mesmo retângulo; quem a altera deve pedir uma nova.
+    """
+
+    __slots__ = ('kind', 'rect', 'outline', 'polygon', 'label_rect', 'wrapped_label_rect',
+                 'bounding_rect', 'wrapped_bounding_rect', 'connection_points')
+
+    def __init__(self, element_type, rect):
+        self.kind = shape_kind(element_type)
+        self.rect = QRectF(rect)
+        center = rect.center()
+
+        self.polygon = None
+        self.outline = QPainterPath()
+        if self.kind == 'ellipse':
+            self.outline.addEllipse(rect)
+        elif self.kind == 'diamond':
+            self.polygon = QPolygonF([
+                QPointF(center.x(), rect.top()),
+                QPointF(rect.right(), center.y()),
+                QPointF(center.x(), rect.bottom()),
+                QPointF(rect.left(), center.y())
+            ])
+            self.outline.addPolygon(self.polygon)
+            self.outline.closeSubpath()
+        else:
+            self.outline.addRoundedRect(rect, CORNER_RADIUS, CORNER_RADIUS)
+
+        # Rótulo logo abaixo da forma, com a mesma largura
+        self.label_rect = QRectF(rect.left(), rect.bottom(), rect.width(), LABEL_HEIGHT)
+        self.wrapped_label_rect = QRectF(rect.left(), rect.bottom(), rect.width(),
+                                         WRAPPED_LABEL_HEIGHT)
+        margins = rect.adjusted(-PAINT_MARGIN, -PAINT_MARGIN, PAINT_MARGIN, PAINT_MARGIN)
+        self.bounding_rect = margins.united(self.label_rect)
+        self.wrapped_bounding_rect = margins.united(self.wrapped_label_rect)
+
+        self.connection_points = (
+            QPointF(center.x(), rect.top()),    # Topo
+            QPointF(rect.right(), center.y()),  # Direita
+            QPointF(center.x(), rect.bottom()), # Base
+            QPointF(rect.left(), center.y())    # Esquerda
+        )
+
+
+def element_geometry(element_type, rect):
+    """Geometria em cache para o par (tipo, retângulo)"""
+    key = (element_type, rect.x(), rect.y(), rect.width(), rect.height())
+    geometry = _cache.get(key)
+    if geometry is None:
+        if len(_cache) >= MAX_CACHED_GEOMETRIES:
+            _cache.clear()
+        geometry = ElementGeometry(element_type, rect)
+        _cache[key] = geometry
+    return geometry
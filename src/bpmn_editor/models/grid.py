@@ -1,16 +1,241 @@
 from PyQt5.QtWidgets import QGraphicsScene
-from PyQt5.QtCore import Qt, QRectF, QLineF
-from PyQt5.QtGui import QPainter, QPen, QColor, QBrush
+from PyQt5.QtCore import Qt, QRectF, QTimer
+from PyQt5.QtGui import QPainter, QBrush, QTransform, QPainterPath
+
+from .spatial_index import UniformGridIndex
+from .crossings import CrossingEngine
+from .grid_renderer import GridRenderer
+from .lod import DEFAULT_LOD_THRESHOLDS
+from .styles import DEFAULT_THEME, style_table
+from .labels import LABEL_MODES, DEFAULT_LABEL_MODE
+from .dispatcher import GeometryDispatcher
+
+# Modos de indexação espacial suportados por documento:
+#   'none' -> varredura linear (QGraphicsScene.NoIndex)
+#   'bsp'  -> árvore BSP nativa do Qt
+#   'grid' -> grade uniforme própria, mantida por BPMNElement.itemChange
+INDEX_MODES = ('none', 'bsp', 'grid')
+DEFAULT_INDEX_MODE = 'bsp'
+
+# Modos de repintura:
+#   'full'  -> cada arrasto/zoom invalida a cena inteira (comportamento antigo)
+#   'dirty' -> só as regiões marcadas via mark_dirty são repintadas
+REPAINT_MODES = ('full', 'dirty')
+DEFAULT_REPAINT_MODE = 'full'
 
 class GridScene(QGraphicsScene):
-    def __init__(self):
+    def __init__(self, index_mode=DEFAULT_INDEX_MODE, bsp_depth=0, cell_size=200):
         super().__init__()
+        self.grid_renderer = GridRenderer()
+        self._content_only = False
         self.setSceneRect(QRectF(0, 0, 800, 600))
         self.grid_visible = True
         self.minor_spacing = 20
         self.major_spacing = 100
         self.setBackgroundBrush(QBrush(Qt.white))
 
+        self.repaint_mode = DEFAULT_REPAINT_MODE
+        self._dirty_rects = []
+        self.lod_thresholds = dict(DEFAULT_LOD_THRESHOLDS)
+        self.styles = style_table(DEFAULT_THEME)
+        self.label_mode = DEFAULT_LABEL_MODE
+
+        self.index_mode = None
+        self.bsp_depth = bsp_depth
+        self.grid_index = UniformGridIndex(cell_size)
+        # Retângulo que já cobriu todo o conteúdo indexado; só cresce, como
+        # o sceneRect implícito do Qt, e dispensa itemsBoundingRect()
+        self.content_rect = QRectF()
+        self.crossings = CrossingEngine(cell_size)  # Cruzamentos entre conexões
+        self.dispatcher = GeometryDispatcher(self)  # Mudanças de geometria em lote
+        self.set_index_mode(index_mode)
+
+    # Espaçamento e visibilidade da grade invalidam os ladrilhos em cache
+    @property
+    def grid_visible(self):
+        return self._grid_visible
+
+    @grid_visible.setter
+    def grid_visible(self, value):
+        self._set_grid_option('_grid_visible', value)
+
+    @property
+    def minor_spacing(self):
+        return self._minor_spacing
+
+    @minor_spacing.setter
+    def minor_spacing(self, value):
+        self._set_grid_option('_minor_spacing', value)
+
+    @property
+    def major_spacing(self):
+        return self._major_spacing
+
+    @major_spacing.setter
+    def major_spacing(self, value):
+        self._set_grid_option('_major_spacing', value)
+
+    def _set_grid_option(self, attr, value):
+        if getattr(self, attr, None) == value:
+            return
+        setattr(self, attr, value)
+        self.grid_renderer.invalidate()
+        self.invalidate(QRectF(), QGraphicsScene.BackgroundLayer)
+
+    def set_repaint_mode(self, mode):
+        if mode not in REPAINT_MODES:
+            raise ValueError(f"Modo de repintura inválido: {mode}")
+        self.repaint_mode = mode
+        self._dirty_rects = []
+
+    def mark_dirty(self, rect):
+        """Acumula uma região suja; todas são repintadas juntas no próximo ciclo"""
+        if self.repaint_mode != 'dirty' or rect.isEmpty():
+            return
+        if not self._dirty_rects:
+            QTimer.singleShot(0, self.flush_dirty)
+        # Funde com uma região sobreposta para reduzir as chamadas a update()
+        for i, existing in enumerate(self._dirty_rects):
+            if existing.intersects(rect):
+                self._dirty_rects[i] = existing.united(rect)
+                return
+        self._dirty_rects.append(QRectF(rect))
+
+    def flush_dirty(self):
+        rects, self._dirty_rects = self._dirty_rects, []
+        for rect in rects:
+            self.update(rect)
+
+    def request_full_repaint(self):
+        """Repinta a cena inteira apenas no modo 'full'"""
+        if self.repaint_mode == 'full':
+            self.update()
+
+    def set_theme(self, theme_name):
+        """Troca o tema; as tabelas de canetas/pincéis são compartilhadas"""
+        self.styles = style_table(theme_name)
+        self.update()
+
+    def set_lod_thresholds(self, labels=None, shapes=None):
+        """Ajusta os limiares de nível de detalhe (ver models/lod.py)"""
+        labels = self.lod_thresholds['labels'] if labels is None else labels
+        shapes = self.lod_thresholds['shapes'] if shapes is None else shapes
+        if shapes > labels:
+            raise ValueError("O limiar 'shapes' não pode ser maior que 'labels'")
+        self.lod_thresholds.update(labels=labels, shapes=shapes)
+        self.update()
+
+    def set_label_mode(self, mode):
+        """Escolhe como nomes longos cabem no rótulo (ver models/labels.py)"""
+        if mode not in LABEL_MODES:
+            raise ValueError(f"Modo de rótulo inválido: {mode}")
+        if mode == self.label_mode:
+            return
+        # 'wrap' usa um rótulo mais alto: os limites dos elementos mudam
+        elements = [item for item in super().items() if hasattr(item, 'prepare_label_mode_change')]
+        for element in elements:
+            element.prepare_label_mode_change()
+        self.label_mode = mode
+        for element in elements:
+            self.reindex_item(element)
+        self.update()
+
+    def set_index_mode(self, mode, bsp_depth=None):
+        """Seleciona a estratégia de indexação espacial do documento"""
+        if mode not in INDEX_MODES:
+            raise ValueError(f"Modo de índice inválido: {mode}")
+        if bsp_depth is not None:
+            self.bsp_depth = bsp_depth
+
+        if mode == 'bsp':
+            self.setItemIndexMethod(QGraphicsScene.BspTreeIndex)
+            self.setBspTreeDepth(self.bsp_depth)  # 0 = profundidade automática
+        else:
+            # No modo 'grid' o índice do Qt fica desligado para não pagar
+            # a manutenção de duas estruturas durante o arrasto
+            self.setItemIndexMethod(QGraphicsScene.NoIndex)
+
+        previous = self.index_mode
+        self.index_mode = mode
+        if mode != previous:  # Mesmo modo: o índice já está em dia
+            self.grid_index.clear()
+            # Da base para o topo: a ordem de inserção no índice desempata
+            # o empilhamento de itens com o mesmo zValue
+            for item in super().items(Qt.AscendingOrder):
+                self.reindex_item(item)
+
+    def reindex_item(self, item):
+        """Atualiza a posição do item no índice espacial do documento"""
+        if item.data(0) is None:
+            return
+        rect = item.sceneBoundingRect()
+        if not self.content_rect.contains(rect):
+            self.content_rect = self.content_rect.united(rect)
+        if self.index_mode == 'grid':
+            self.grid_index.insert(item, rect)
+        elif self.index_mode == 'bsp':
+            self._grow_scene_rect(rect)
+        self.dispatcher.item_geometry_changed(item, rect)
+
+    def _grow_scene_rect(self, rect):
+        """A BSP do Qt só particiona o sceneRect; itens fora dele caem numa
+        varredura linear. Crescer com folga geométrica mantém as
+        reconstruções da árvore em O(log n) ao longo da edição."""
+        current = self.sceneRect()
+        if current.contains(rect):
+            return
+        united = current.united(rect)
+        margin = max(united.width(), united.height()) / 2
+        self.setSceneRect(united.adjusted(-margin, -margin, margin, margin))
+
+    def unindex_item(self, item):
+        self.grid_index.remove(item)
+        self.dispatcher.item_geometry_changed(item, None)
+
+    def clear(self):
+        self.grid_index.clear()
+        self.content_rect = QRectF()
+        self.crossings.clear()
+        self.dispatcher.clear()
+        super().clear()
+
+    def item_at(self, pos, transform=None):
+        """Item mais ao topo na posição (equivalente a itemAt)"""
+        if transform is None:
+            transform = QTransform()
+        if self.index_mode != 'grid':
+            return self.itemAt(pos, transform)
+        items = self.items_at(pos)
+        return items[0] if items else None
+
+    def items_at(self, pos):
+        """Itens sob a posição, do topo para a base (equivalente a items(pos))"""
+        if self.index_mode != 'grid':
+            return self.items(pos)
+        # Itens sem ID (linhas temporárias etc.) não são indexados
+        candidates = [item for item in self.grid_index.items_at(pos)
+                      if item.isVisible() and item.contains(item.mapFromScene(pos))]
+        return self._stacking_sorted(candidates)
+
+    def items_in_area(self, rect, mode=Qt.IntersectsItemShape):
+        """Itens que intersectam a área (equivalente a items(rect, mode))"""
+        if self.index_mode != 'grid':
+            return self.items(rect, mode)
+        candidates = self.grid_index.items_in_rect(rect)
+        if mode == Qt.IntersectsItemShape:
+            area = QPainterPath()
+            area.addRect(rect)
+            candidates = [item for item in candidates
+                          if item.collidesWithPath(item.mapFromScene(area), mode)]
+        elif mode in (Qt.ContainsItemShape, Qt.ContainsItemBoundingRect):
+            candidates = [item for item in candidates
+                          if rect.contains(item.sceneBoundingRect())]
+        return self._stacking_sorted(candidates)
+
+    def _stacking_sorted(self, items):
+        order_of = self.grid_index.order_of
+        return sorted(items, key=lambda item: (item.zValue(), order_of(item)), reverse=True)
+
     def selectedItems(self):
         try:
             selected = []
@@ -24,47 +249,21 @@ class GridScene(QGraphicsScene):
         except Exception:
             return []
 
+    def render_content(self, painter, target=QRectF(), source=QRectF()):
+        """Como render(), mas sem a grade (minimapa, prévias): a grade não é
+        desligada de verdade, o que invalidaria os ladrilhos das views"""
+        self._content_only = True
+        try:
+            self.render(painter, target, source, Qt.IgnoreAspectRatio)
+        finally:
+            self._content_only = False
+
     def drawBackground(self, painter, rect):
         super().drawBackground(painter, rect)
-        if not self.grid_visible:
+        if not self.grid_visible or self._content_only:
             return
 
-        # Configurações iniciais
+        painter.save()
         painter.setRenderHint(QPainter.Antialiasing, False)
-        left = int(rect.left()) - (int(rect.left()) % self.minor_spacing)
-        top = int(rect.top()) - (int(rect.top()) % self.minor_spacing)
-
-        # Linhas menores
-        minor_pen = QPen(QColor(220, 220, 220), 0.5)
-        painter.setPen(minor_pen)
-        
-        # Linhas horizontais
-        y = top
-        while y < rect.bottom():
-            painter.drawLine(QLineF(rect.left(), y, rect.right(), y))
-            y += self.minor_spacing
-            
-        # Linhas verticais
-        x = left
-        while x < rect.right():
-            painter.drawLine(QLineF(x, rect.top(), x, rect.bottom()))
-            x += self.minor_spacing
-
-        # Linhas principais
-        major_pen = QPen(QColor(200, 200, 200), 1)
-        painter.setPen(major_pen)
-        
-        # Linhas horizontais principais
-        y = top
-        while y < rect.bottom():
-            if y % self.major_spacing == 0:
-                painter.drawLine(QLineF(rect.left(), y, rect.right(), y))
-            y += self.minor_spacing
-            
-        # Linhas verticais principais
-        x = left
-        while x < rect.right():
-            if x % self.major_spacing == 0:
-                painter.drawLine(QLineF(x, rect.top(), x, rect.bottom()))
-            x += self.minor_spacing
-
+        self.grid_renderer.draw(painter, rect, self.minor_spacing, self.major_spacing)
+        painter.restore()
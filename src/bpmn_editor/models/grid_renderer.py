@@ -0,0 +1,117 @@
+from PyQt5.QtCore import Qt, QLineF
+from PyQt5.QtGui import QPainter, QPen, QColor, QBrush, QImage, QTransform, QPaintEngine
+
+from .lod import zoom_bucket, MIN_ZOOM_BUCKET, MAX_ZOOM_BUCKET
+
+import math
+import logging
+logger = logging.getLogger(__name__)
+
+MINOR_PEN = QPen(QColor(220, 220, 220), 0.5)
+MAJOR_PEN = QPen(QColor(200, 200, 200), 1)
+
+# Faixa de escalas dos ladrilhos. Abaixo dela o menor ladrilho é
+# reaproveitado (em linhas seriam milhares); acima, linhas em lote, que
+# são poucas e continuam nítidas
+MIN_TILE_SCALE = MIN_ZOOM_BUCKET
+MAX_TILE_SCALE = MAX_ZOOM_BUCKET
+
+# Dispositivos vetoriais recebem linhas de verdade, não um bitmap
+VECTOR_ENGINES = (QPaintEngine.SVG, QPaintEngine.Pdf, QPaintEngine.PostScript,
+                  QPaintEngine.Picture)
+
+
+class GridRenderer:
+    """Desenha a grade de fundo da GridScene.
+
+    O caminho principal pré-renderiza um ladrilho de `major_spacing` x
+    `major_spacing` (uma linha principal e as secundárias entre elas) por
+    faixa de zoom e o aplica como textura de um único fillRect. Quando a
+    textura não serve (espaçamentos que não se dividem, rotação, saída
+    vetorial), as linhas são desenhadas em lote com drawLines.
+    """
+
+    def __init__(self):
+        self._tiles = {}  # (escala, minor, major) -> QBrush
+
+    def invalidate(self):
+        """Descarta os ladrilhos (chamado quando espaçamento/visibilidade mudam)"""
+        self._tiles.clear()
+
+    def draw(self, painter, rect, minor, major):
+        transform = painter.worldTransform()
+        if self._can_tile(painter, transform, minor, major):
+            painter.fillRect(rect, self.tile_brush(transform.m11(), minor, major))
+        else:
+            self.draw_lines(painter, rect, minor, major)
+
+    def _can_tile(self, painter, transform, minor, major):
+        if minor <= 0 or major <= 0 or major % minor != 0:
+            return False
+        if transform.type() > QTransform.TxScale or transform.m11() != transform.m22():
+            return False
+        if not 0 < transform.m11() <= MAX_TILE_SCALE:
+            return False
+        engine = painter.paintEngine()
+        return engine is None or engine.type() not in VECTOR_ENGINES
+
+    def tile_brush(self, scale, minor, major):
+        bucket = zoom_bucket(scale)
+        key = (bucket, minor, major)
+        brush = self._tiles.get(key)
+        if brush is None:
+            brush = self._build_tile(bucket, minor, major)
+            self._tiles[key] = brush
+        return brush
+
+    def _build_tile(self, bucket, minor, major):
+        size = max(1, round(major * bucket))
+        scale = size / major  # Escala real, com ladrilho de tamanho inteiro
+
+        image = QImage(size, size, QImage.Format_ARGB32_Premultiplied)
+        image.fill(Qt.transparent)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        painter.scale(scale, scale)
+
+        # As bordas x=0/y=0 do ladrilho são a linha principal; as linhas
+        # secundárias só valem a pena enquanto tiverem ao menos 2px entre si
+        if minor * scale >= 2:
+            painter.setPen(MINOR_PEN)
+            painter.drawLines([QLineF(0, k * minor, major, k * minor)
+                               for k in range(1, major // minor)] +
+                              [QLineF(k * minor, 0, k * minor, major)
+                               for k in range(1, major // minor)])
+        painter.setPen(MAJOR_PEN)
+        painter.drawLines([QLineF(0, 0, major, 0), QLineF(0, 0, 0, major)])
+        painter.end()
+
+        brush = QBrush(image)
+        brush.setTransform(QTransform.fromScale(1 / scale, 1 / scale))
+        return brush
+
+    def draw_lines(self, painter, rect, minor, major):
+        """Alternativa sem textura: um drawLines por caneta"""
+        if minor <= 0:
+            return
+        left = math.floor(rect.left() / minor) * minor
+        top = math.floor(rect.top() / minor) * minor
+
+        minor_lines, major_lines = [], []
+        y = top
+        while y < rect.bottom():
+            line = QLineF(rect.left(), y, rect.right(), y)
+            (major_lines if major and y % major == 0 else minor_lines).append(line)
+            y += minor
+        x = left
+        while x < rect.right():
+            line = QLineF(x, rect.top(), x, rect.bottom())
+            (major_lines if major and x % major == 0 else minor_lines).append(line)
+            x += minor
+
+        if minor_lines:
+            painter.setPen(MINOR_PEN)
+            painter.drawLines(minor_lines)
+        if major_lines:
+            painter.setPen(MAJOR_PEN)
+            painter.drawLines(major_lines)
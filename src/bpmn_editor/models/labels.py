@@ -0,0 +1,115 @@
+from PyQt5.QtCore import Qt, QPointF
+from PyQt5.QtGui import QStaticText, QFont, QFontMetricsF, QTextLayout, QTransform
+
+from .lod import zoom_bucket
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Como nomes maiores que a largura do rótulo são apresentados:
+#   'elide' -> uma linha, cortada com reticências
+#   'wrap'  -> quebra por palavras, alinhado no topo de um rótulo mais alto
+#              (geometry.WRAPPED_LABEL_HEIGHT); a última linha que cabe
+#              recebe as reticências
+LABEL_MODES = ('elide', 'wrap')
+DEFAULT_LABEL_MODE = 'elide'
+
+
+def _scaled_font(font, scale):
+    """Fonte no tamanho em que será rasterizada na faixa de zoom"""
+    if scale == 1:
+        return font
+    scaled = QFont(font)
+    if font.pointSizeF() > 0:
+        scaled.setPointSizeF(font.pointSizeF() * scale)
+    elif font.pixelSize() > 0:
+        scaled.setPixelSize(max(1, round(font.pixelSize() * scale)))
+    return scaled
+
+
+def _wrap_lines(text, font, width, max_lines):
+    """Quebra o texto em até `max_lines` linhas de largura `width`"""
+    layout = QTextLayout(text, font)
+    layout.beginLayout()
+    lines = []
+    while len(lines) < max_lines:
+        line = layout.createLine()
+        if not line.isValid():
+            break
+        line.setLineWidth(width)
+        lines.append((line.textStart(), line.textLength()))
+    layout.endLayout()
+    if not lines:
+        return []
+    result = [text[start:start + length].strip() for start, length in lines[:-1]]
+    start = lines[-1][0]
+    result.append(text[start:].strip())  # Resto vai para a última linha
+    return result
+
+
+class LabelCache:
+    """Rótulo de um elemento pronto para desenhar com drawStaticText.
+
+    Guarda, por (faixa de zoom, modo), as linhas já cortadas/quebradas e
+    os QStaticText correspondentes com o layout de glifos preparado para a
+    escala da faixa. Nada é refeito em paint enquanto texto, fonte e
+    retângulo do rótulo forem os mesmos; `invalidate` é chamado quando o
+    nome muda.
+    """
+
+    __slots__ = ('_key', '_variants')
+
+    def __init__(self):
+        self._key = None
+        self._variants = {}  # (faixa, modo) -> [(QPointF, QStaticText)]
+
+    def invalidate(self):
+        self._key = None
+        self._variants.clear()
+
+    def lines(self, text, font, rect, scale, mode=DEFAULT_LABEL_MODE):
+        """Linhas posicionadas (canto superior esquerdo, texto estático)"""
+        key = (text, font.key(), rect.x(), rect.y(), rect.width(), rect.height())
+        if key != self._key:
+            self._key = key
+            self._variants.clear()
+
+        bucket = zoom_bucket(scale)
+        variant = self._variants.get((bucket, mode))
+        if variant is None:
+            variant = self._build(text, font, rect, bucket, mode)
+            self._variants[(bucket, mode)] = variant
+        return variant
+
+    def _build(self, text, font, rect, bucket, mode):
+        if not text:
+            return []
+        # A largura dos glifos hintados muda com a escala: o corte é medido
+        # na fonte do tamanho rasterizado e convertido de volta
+        scaled = _scaled_font(font, bucket)
+        metrics = QFontMetricsF(scaled)
+        width = rect.width() * bucket
+        line_height = QFontMetricsF(font).lineSpacing()
+
+        if mode == 'wrap':
+            max_lines = max(1, int(rect.height() // line_height))
+            texts = _wrap_lines(text, scaled, width, max_lines)
+            texts[-1] = metrics.elidedText(texts[-1], Qt.ElideRight, width)
+        else:
+            texts = [metrics.elidedText(text, Qt.ElideRight, width)]
+
+        prepared = QTransform.fromScale(bucket, bucket)
+        if mode == 'wrap':
+            top = rect.top()
+        else:
+            top = rect.top() + (rect.height() - line_height * len(texts)) / 2
+        variant = []
+        for line in texts:
+            static = QStaticText(line)
+            static.setTextFormat(Qt.PlainText)
+            static.setPerformanceHint(QStaticText.AggressiveCaching)
+            static.prepare(prepared, font)
+            left = rect.left() + (rect.width() - static.size().width()) / 2
+            variant.append((QPointF(left, top), static))
+            top += line_height
+        return variant
@@ -0,0 +1,43 @@
+from PyQt5.QtWidgets import QStyleOptionGraphicsItem
+
+import math
+import logging
+logger = logging.getLogger(__name__)
+
+# Níveis de detalhe (LOD) usados pelo paint dos elementos e conexões.
+# O valor comparado é QStyleOptionGraphicsItem.levelOfDetailFromTransform:
+# 1.0 em zoom 100%, 0.5 em 50% e assim por diante.
+#   lod >= 'labels'            -> 'full': formas, textos, pontos e marcadores
+#   'shapes' <= lod < 'labels' -> 'reduced': formas sem textos nem marcadores
+#   lod < 'shapes'             -> 'minimal': caixas preenchidas e retas
+DEFAULT_LOD_THRESHOLDS = {
+    'labels': 0.5,
+    'shapes': 0.25,
+}
+
+LOD_TIERS = ('full', 'reduced', 'minimal')
+
+# Faixas de zoom em que ladrilhos da grade e rótulos são preparados:
+# potências de 2 entre MIN_ZOOM_BUCKET e MAX_ZOOM_BUCKET
+MIN_ZOOM_BUCKET = 1 / 16
+MAX_ZOOM_BUCKET = 16
+
+
+def lod_tier(item, option, painter):
+    """Nível de detalhe em que o item deve ser desenhado neste paint"""
+    if option is None:
+        return 'full'
+    lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+    scene = item.scene()
+    thresholds = getattr(scene, 'lod_thresholds', None) or DEFAULT_LOD_THRESHOLDS
+    if lod >= thresholds['labels']:
+        return 'full'
+    if lod >= thresholds['shapes']:
+        return 'reduced'
+    return 'minimal'
+
+
+def zoom_bucket(scale):
+    """Arredonda a escala para a potência de 2 mais próxima, dentro das faixas"""
+    scale = min(max(scale, MIN_ZOOM_BUCKET), MAX_ZOOM_BUCKET)
+    return 2.0 ** round(math.log2(scale))
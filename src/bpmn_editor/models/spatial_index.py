@@ -0,0 +1,140 @@
+from PyQt5.QtCore import QRectF
+
+import itertools
+import math
+import logging
+logger = logging.getLogger(__name__)
+
+
+# Itens que ocupariam mais células que isto (conexões longas, por exemplo)
+# vão para uma lista à parte, sempre testada nas consultas
+MAX_CELLS_PER_ITEM = 64
+
+
+class UniformGridIndex:
+    """Índice espacial em grade uniforme para itens da cena.
+
+    Cada item é registrado em todas as células que seu retângulo (em
+    coordenadas de cena) toca. Consultas por ponto ou por área visitam
+    apenas as células envolvidas, em vez de varrer a cena inteira.
+
+    A ordem de inserção também é guardada: entre itens de mesmo zValue o
+    Qt empilha o último adicionado por cima, e as consultas da cena usam
+    order_of() para desempatar do mesmo jeito.
+    """
+
+    def __init__(self, cell_size=200):
+        if cell_size <= 0:
+            raise ValueError(f"Tamanho de célula inválido: {cell_size}")
+        self.cell_size = cell_size
+        self._cells = {}       # (cx, cy) -> set de itens
+        self._item_cells = {}  # item -> tupla de células ocupadas
+        self._item_rects = {}  # item -> QRectF em coordenadas de cena
+        self._large = set()    # itens grandes demais para a grade
+        self._order = {}       # item -> sequência da primeira inserção
+        self._sequence = itertools.count()
+
+    def __len__(self):
+        return len(self._item_rects)
+
+    def __contains__(self, item):
+        return item in self._item_rects
+
+    def _cell_range(self, rect):
+        size = self.cell_size
+        x0 = math.floor(rect.left() / size)
+        y0 = math.floor(rect.top() / size)
+        x1 = math.floor(rect.right() / size)
+        y1 = math.floor(rect.bottom() / size)
+        return x0, y0, x1, y1
+
+    def _cells_for(self, rect):
+        x0, y0, x1, y1 = self._cell_range(rect)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > MAX_CELLS_PER_ITEM:
+            return ()
+        return tuple((cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1))
+
+    def insert(self, item, rect: QRectF):
+        """Registra (ou atualiza) o item com o retângulo informado"""
+        cells = self._cells_for(rect)
+        old_cells = self._item_cells.get(item)
+        self._item_rects[item] = QRectF(rect)
+        if item not in self._order:
+            self._order[item] = next(self._sequence)
+        if cells:
+            self._large.discard(item)
+        else:
+            self._large.add(item)
+        if old_cells == cells:
+            return
+
+        if old_cells:
+            for key in old_cells:
+                bucket = self._cells.get(key)
+                if bucket is not None:
+                    bucket.discard(item)
+                    if not bucket:
+                        del self._cells[key]
+
+        for key in cells:
+            self._cells.setdefault(key, set()).add(item)
+        self._item_cells[item] = cells
+
+    update = insert
+
+    def remove(self, item):
+        """Remove o item do índice (ignora itens não indexados)"""
+        cells = self._item_cells.pop(item, None)
+        self._item_rects.pop(item, None)
+        self._order.pop(item, None)
+        self._large.discard(item)
+        if not cells:
+            return
+        for key in cells:
+            bucket = self._cells.get(key)
+            if bucket is not None:
+                bucket.discard(item)
+                if not bucket:
+                    del self._cells[key]
+
+    def clear(self):
+        self._cells.clear()
+        self._item_cells.clear()
+        self._item_rects.clear()
+        self._order.clear()
+        self._large.clear()
+
+    def rect_of(self, item):
+        return self._item_rects.get(item)
+
+    def order_of(self, item):
+        """Sequência de inserção do item (maior = adicionado depois)"""
+        return self._order.get(item, -1)
+
+    def items_at(self, point):
+        """Itens cujo retângulo contém o ponto"""
+        size = self.cell_size
+        key = (math.floor(point.x() / size), math.floor(point.y() / size))
+        rects = self._item_rects
+        found = [item for item in self._cells.get(key, ()) if rects[item].contains(point)]
+        if self._large:
+            found.extend(item for item in self._large if rects[item].contains(point))
+        return found
+
+    def items_in_rect(self, rect: QRectF):
+        """Itens cujo retângulo intersecta a área informada"""
+        x0, y0, x1, y1 = self._cell_range(rect)
+        rects = self._item_rects
+
+        # Áreas muito grandes: varrer os itens é mais barato que as células
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(rects):
+            return [item for item, r in rects.items() if r.intersects(rect)]
+
+        found = set(self._large)
+        cells = self._cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket)
+        return [item for item in found if rects[item].intersects(rect)]
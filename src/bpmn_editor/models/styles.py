@@ -0,0 +1,97 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QColor, QBrush, QPen, QFont
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Temas disponíveis. Cores por tipo de elemento e das conexões; tudo o
+# que o paint usa é derivado daqui uma única vez por tema.
+THEMES = {
+    'default': {
+        'element_colors': {
+            'start': '#4CAF50',
+            'task': '#2196F3',
+            'gateway': '#FF9800',
+        },
+        'fallback_color': '#607D8B',
+        'outline': '#000000',
+        'selected': '#FFFF00',
+        'handles': '#0000FF',
+        'connection': '#808080',
+        'connection_selected': '#FF0000',
+        'font_family': None,  # Fonte padrão da aplicação
+        'font_size': None,    # Tamanho padrão da aplicação
+    },
+}
+
+DEFAULT_THEME = 'default'
+
+
+class ElementStyle:
+    """Canetas, pincel e fonte de um tipo de elemento (a geometria fica em
+    models/geometry.py, pois depende do retângulo de cada elemento)"""
+
+    __slots__ = ('color', 'brush', 'pen', 'selected_pen', 'handle_pen', 'font')
+
+    def __init__(self, element_type, theme):
+        colors = theme['element_colors']
+        self.color = QColor(colors.get(element_type, theme['fallback_color']))
+        self.brush = QBrush(self.color)
+        self.pen = QPen(QColor(theme['outline']), 1)
+        self.selected_pen = QPen(QColor(theme['selected']), 3)
+        self.handle_pen = QPen(QColor(theme['handles']), 2)
+        self.font = _theme_font(theme)
+
+
+class ConnectionStyle:
+    """Canetas das conexões e dos marcadores de cruzamento"""
+
+    __slots__ = ('pen', 'selected_pen')
+
+    def __init__(self, theme):
+        self.pen = QPen(QColor(theme['connection']), 2, Qt.SolidLine)
+        self.selected_pen = QPen(QColor(theme['connection_selected']), 2, Qt.DashLine)
+
+
+def _theme_font(theme):
+    font = QFont()
+    if theme['font_family']:
+        font.setFamily(theme['font_family'])
+    if theme['font_size']:
+        font.setPointSize(theme['font_size'])
+    return font
+
+
+class StyleTable:
+    """Tabela de estilos pré-calculada de um tema (consultada pelos paint)"""
+
+    def __init__(self, theme_name=DEFAULT_THEME):
+        if theme_name not in THEMES:
+            raise ValueError(f"Tema desconhecido: {theme_name}")
+        self.theme_name = theme_name
+        self.theme = THEMES[theme_name]
+        self.connection = ConnectionStyle(self.theme)
+        self._elements = {}
+        for element_type in self.theme['element_colors']:
+            self._elements[element_type] = ElementStyle(element_type, self.theme)
+
+    def element(self, element_type):
+        style = self._elements.get(element_type)
+        if style is None:
+            # Tipos fora do tema são montados uma vez e guardados
+            style = ElementStyle(element_type, self.theme)
+            self._elements[element_type] = style
+        return style
+
+
+_tables = {}
+
+
+def style_table(theme_name=DEFAULT_THEME):
+    """Tabela compartilhada do tema (criada na primeira consulta, já com a
+    QApplication de pé, pois QFont depende dela)"""
+    table = _tables.get(theme_name)
+    if table is None:
+        table = StyleTable(theme_name)
+        _tables[theme_name] = table
+    return table
@@ -1,4 +1,5 @@
 from .script_panel import ScriptPanel
 from .actions_panel import ActionsPanel
+from .overview_panel import OverviewPanel
 
-__all__ = ['ScriptPanel', 'ActionsPanel']
\ No newline at end of file
+__all__ = ['ScriptPanel', 'ActionsPanel', 'OverviewPanel']
\ No newline at end of file
@@ -0,0 +1,130 @@
+from PyQt5.QtWidgets import QDockWidget, QWidget, QSizePolicy
+from PyQt5.QtGui import QImage, QPainter, QPen, QColor
+from PyQt5.QtCore import Qt, QRectF, QPointF
+
+import logging
+logger = logging.getLogger(__name__)
+
+OVERVIEW_MARGIN = 50  # Folga (cena) em volta do conteúdo
+VIEWPORT_COLOR = QColor(220, 50, 50)
+
+
+class OverviewWidget(QWidget):
+    """Miniatura da cena inteira com o retângulo da área visível do canvas.
+
+    A miniatura fica num QImage em baixa resolução. Em vez de redesenhar
+    tudo a cada mudança, o widget assina as regiões alteradas do
+    GeometryDispatcher e redesenha só esses trechos; a imagem inteira só é
+    refeita quando o conteúdo sai da área coberta ou o widget muda de
+    tamanho. Clicar ou arrastar move a viewport do canvas.
+    """
+
+    def __init__(self, canvas, parent=None):
+        super().__init__(parent)
+        self.canvas = canvas
+        self.scene = canvas.scene
+        self._image = None
+        self._world = QRectF()  # Área da cena coberta pela imagem
+        self._scale = 1.0
+        self._offset = QPointF()
+        self.setMinimumSize(160, 120)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setCursor(Qt.PointingHandCursor)
+
+        self.scene.dispatcher.subscribe_regions(self.on_regions_changed)
+        for bar in (canvas.horizontalScrollBar(), canvas.verticalScrollBar()):
+            bar.valueChanged.connect(self.update)
+            bar.rangeChanged.connect(self.update)
+
+    # Miniatura
+
+    def rebuild(self):
+        """Redesenha a miniatura inteira"""
+        world = self.scene.itemsBoundingRect()
+        if world.isEmpty():
+            world = QRectF(self.scene.sceneRect())
+        world.adjust(-OVERVIEW_MARGIN, -OVERVIEW_MARGIN, OVERVIEW_MARGIN, OVERVIEW_MARGIN)
+        self._world = world
+        self._scale = min(self.width() / world.width(), self.height() / world.height())
+        width = max(1, int(world.width() * self._scale))
+        height = max(1, int(world.height() * self._scale))
+        self._offset = QPointF((self.width() - width) / 2, (self.height() - height) / 2)
+
+        self._image = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+        self._image.fill(Qt.white)
+        painter = QPainter(self._image)
+        painter.setRenderHint(QPainter.Antialiasing)
+        self.scene.render_content(painter, QRectF(self._image.rect()), world)
+        painter.end()
+        self.update()
+
+    def on_regions_changed(self, regions):
+        if self._image is None:
+            return
+        if any(not self._world.contains(region) for region in regions):
+            self.rebuild()  # Conteúdo cresceu além da área coberta
+            return
+        painter = QPainter(self._image)
+        painter.setRenderHint(QPainter.Antialiasing)
+        bounds = self._image.rect()
+        for region in regions:
+            # Pixels inteiros (com 1px de folga para o antialiasing) e o trecho de cena equivalente
+            target = self._to_image(region).toAlignedRect().adjusted(-1, -1, 1, 1) & bounds
+            if target.isEmpty():
+                continue
+            painter.fillRect(target, Qt.white)
+            self.scene.render_content(painter, QRectF(target), self._to_scene(QRectF(target)))
+        painter.end()
+        self.update()
+
+    def _to_image(self, rect):
+        return QRectF((rect.x() - self._world.x()) * self._scale,
+                      (rect.y() - self._world.y()) * self._scale,
+                      rect.width() * self._scale, rect.height() * self._scale)
+
+    def _to_scene(self, rect):
+        return QRectF(self._world.x() + rect.x() / self._scale,
+                      self._world.y() + rect.y() / self._scale,
+                      rect.width() / self._scale, rect.height() / self._scale)
+
+    # Interação
+
+    def widget_to_scene(self, pos):
+        return QPointF(self._world.x() + (pos.x() - self._offset.x()) / self._scale,
+                       self._world.y() + (pos.y() - self._offset.y()) / self._scale)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton and self._image is not None:
+            self.canvas.center_on(self.widget_to_scene(event.pos()))
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton and self._image is not None:
+            self.canvas.center_on(self.widget_to_scene(event.pos()))
+        super().mouseMoveEvent(event)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.rebuild()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.palette().window())
+        if self._image is None:
+            return
+        painter.drawImage(self._offset, self._image)
+
+        visible = self.canvas.mapToScene(self.canvas.viewport().rect()).boundingRect()
+        rect = self._to_image(visible).translated(self._offset)
+        painter.setPen(QPen(VIEWPORT_COLOR, 2))
+        painter.setBrush(Qt.NoBrush)
+        painter.drawRect(rect)
+
+
+class OverviewPanel(QDockWidget):
+    def __init__(self, canvas):
+        super().__init__("Visão Geral")
+        self.setFeatures(QDockWidget.DockWidgetFloatable |
+                         QDockWidget.DockWidgetMovable)
+        self.overview = OverviewWidget(canvas)
+        self.setWidget(self.overview)
@@ -0,0 +1,3 @@
+from .store import DiagramRepository
+
+__all__ = ['DiagramRepository']
@@ -0,0 +1,72 @@
+from sqlalchemy import (MetaData, Table, Column, Integer, Float, String, Text, ForeignKey,
+                        Index, UniqueConstraint, DDL, event)
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Vários diagramas num só arquivo SQLite. Cada elemento tem uma chave
+# inteira (pk) que também é a linha do seu retângulo na R*Tree
+# element_bounds; gatilhos mantêm a árvore em dia com x, y, largura e
+# altura, então nenhuma escrita precisa lembrar dela.
+metadata = MetaData()
+
+diagrams = Table(
+    'diagrams', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String, nullable=False, unique=True),
+    Column('modified', Float, nullable=False),
+)
+
+elements = Table(
+    'elements', metadata,
+    Column('pk', Integer, primary_key=True),
+    Column('diagram_id', Integer, ForeignKey('diagrams.id', ondelete='CASCADE'), nullable=False),
+    Column('element_id', String, nullable=False),
+    Column('type', String, nullable=False),
+    Column('x', Float, nullable=False),       # Centro, como BPMNElement.pos()
+    Column('y', Float, nullable=False),
+    Column('width', Float, nullable=False),
+    Column('height', Float, nullable=False),
+    Column('name', Text, nullable=False, default=""),
+    Column('description', Text, nullable=False, default=""),
+    UniqueConstraint('diagram_id', 'element_id'),
+    Index('ix_elements_type', 'type', 'diagram_id'),
+    Index('ix_elements_name', 'name'),
+)
+
+connections = Table(
+    'connections', metadata,
+    Column('pk', Integer, primary_key=True),
+    Column('diagram_id', Integer, ForeignKey('diagrams.id', ondelete='CASCADE'), nullable=False),
+    Column('connection_id', String, nullable=False),
+    Column('source_id', String, nullable=False),
+    Column('target_id', String, nullable=False),
+    UniqueConstraint('diagram_id', 'connection_id'),
+    Index('ix_connections_source', 'diagram_id', 'source_id'),
+    Index('ix_connections_target', 'diagram_id', 'target_id'),
+)
+
+actions = Table(
+    'actions', metadata,
+    Column('element_pk', Integer, ForeignKey('elements.pk', ondelete='CASCADE'),
+           primary_key=True),
+    Column('name', String, primary_key=True),
+    Column('value', Text, nullable=False),  # JSON
+    Index('ix_actions_name', 'name'),
+)
+
+_RTREE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS element_bounds "
+    "USING rtree(pk, min_x, max_x, min_y, max_y)",
+    "CREATE TRIGGER IF NOT EXISTS element_bounds_insert AFTER INSERT ON elements BEGIN "
+    "INSERT INTO element_bounds VALUES (new.pk, new.x - new.width / 2, new.x + new.width / 2, "
+    "new.y - new.height / 2, new.y + new.height / 2); END",
+    "CREATE TRIGGER IF NOT EXISTS element_bounds_update "
+    "AFTER UPDATE OF x, y, width, height ON elements BEGIN "
+    "UPDATE element_bounds SET min_x = new.x - new.width / 2, max_x = new.x + new.width / 2, "
+    "min_y = new.y - new.height / 2, max_y = new.y + new.height / 2 WHERE pk = new.pk; END",
+    "CREATE TRIGGER IF NOT EXISTS element_bounds_delete AFTER DELETE ON elements BEGIN "
+    "DELETE FROM element_bounds WHERE pk = old.pk; END",
+]
+for _statement in _RTREE:
+    event.listen(elements, 'after_create', DDL(_statement))
@@ -0,0 +1,328 @@
+import json
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, select, insert, update, delete, bindparam, text, and_
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..models.geometry import default_size
+from ..utils.exceptions import DocumentFormatError
+from .schema import metadata, diagrams, elements, connections, actions
+
+import logging
+logger = logging.getLogger(__name__)
+
+_ELEMENT_FIELDS = ('type', 'x', 'y', 'width', 'height', 'name', 'description')
+
+
+def _on_connect(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")   # Leitores não bloqueiam a gravação
+    cursor.execute("PRAGMA synchronous=NORMAL")  # Com WAL, seguro contra quedas do processo
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def _element_row(record):
+    width, height = record.get('size') or default_size(record['type'])
+    x, y = record['pos']
+    return (record['type'], float(x), float(y), float(width), float(height),
+            record['name'] or "", record.get('description') or "")
+
+
+def _encode_actions(record):
+    return {name: json.dumps(value, ensure_ascii=False)
+            for name, value in (record.get('actions') or {}).items()}
+
+
+class DiagramRepository:
+    """Repositório de diagramas em SQLite (WAL), sobre SQLAlchemy Core.
+
+    Guarda vários documentos (no formato de formats/document.py) por
+    nome. `save_document` compara com o que já está no banco e só grava
+    as linhas que mudaram; `load_region` lê só os elementos cujo
+    retângulo toca uma área (R*Tree), para abrir um diagrama aos
+    pedaços; `find_elements` consulta todos os diagramas de uma vez.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.engine = create_engine(f"sqlite:///{self.path}")
+        event.listen(self.engine, 'connect', _on_connect)
+        metadata.create_all(self.engine)
+
+    def close(self):
+        self.engine.dispose()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Diagramas
+
+    def diagram_names(self):
+        with self.engine.connect() as db:
+            return list(db.scalars(select(diagrams.c.name).order_by(diagrams.c.name)))
+
+    def _diagram_id(self, db, name, create=False):
+        diagram_id = db.scalar(select(diagrams.c.id).where(diagrams.c.name == name))
+        if diagram_id is None:
+            if not create:
+                raise KeyError(name)
+            diagram_id = db.execute(insert(diagrams).values(name=name, modified=time.time())
+                                    ).inserted_primary_key[0]
+        return diagram_id
+
+    def delete_diagram(self, name):
+        with self.engine.begin() as db:
+            db.execute(delete(diagrams).where(diagrams.c.name == name))
+
+    # Gravação
+
+    def save_document(self, name, document):
+        """Grava o documento como o diagrama `name`, tocando só nas linhas alteradas.
+
+        Devolve a contagem de linhas inseridas, atualizadas e removidas.
+        """
+        counts = {'inserted': 0, 'updated': 0, 'deleted': 0}
+        try:
+            with self.engine.begin() as db:
+                diagram_id = self._diagram_id(db, name, create=True)
+                self._save_elements(db, diagram_id, document.get('elements', []), counts)
+                self._save_connections(db, diagram_id, document.get('connections', []), counts)
+                if any(counts.values()):
+                    db.execute(update(diagrams).where(diagrams.c.id == diagram_id)
+                               .values(modified=time.time()))
+        except KeyError as e:
+            raise DocumentFormatError(f"Registro sem o campo {e}") from e
+        return counts
+
+    def _save_elements(self, db, diagram_id, records, counts):
+        # fetchall de tuplas: bem mais barato que iterar linha a linha
+        stored = {row[0]: (row[1], tuple(row[2:]))
+                  for row in db.execute(select(elements.c.element_id, elements.c.pk,
+                                               *(elements.c[field] for field in _ELEMENT_FIELDS))
+                                        .where(elements.c.diagram_id == diagram_id)).all()}
+        stored_actions = {}
+        for pk, action, value in db.execute(
+                select(actions.c.element_pk, actions.c.name, actions.c.value)
+                .join(elements, elements.c.pk == actions.c.element_pk)
+                .where(elements.c.diagram_id == diagram_id)):
+            stored_actions.setdefault(pk, {})[action] = value
+
+        new_rows, changed_rows, action_rows, changed_actions = [], [], [], []
+        seen = set()
+        for record in records:
+            element_id = record['id']
+            seen.add(element_id)
+            row = _element_row(record)
+            encoded = _encode_actions(record)
+            previous = stored.get(element_id)
+            if previous is None:
+                new_rows.append(dict(zip(_ELEMENT_FIELDS, row), diagram_id=diagram_id,
+                                     element_id=element_id))
+                if encoded:
+                    action_rows.append((element_id, encoded))
+                continue
+            pk, old_row = previous
+            if old_row != row:
+                changed_rows.append(dict(zip(('b_' + f for f in _ELEMENT_FIELDS), row), b_pk=pk))
+            if stored_actions.get(pk, {}) != encoded:
+                changed_actions.append(pk)
+                action_rows.append((pk, encoded))
+
+        removed = [pk for element_id, (pk, _) in stored.items() if element_id not in seen]
+        if removed:
+            # As ações saem em cascata e a R*Tree pelo gatilho
+            db.execute(delete(elements).where(elements.c.pk == bindparam('b_pk')),
+                       [{'b_pk': pk} for pk in removed])
+        if changed_rows:
+            db.execute(update(elements).where(elements.c.pk == bindparam('b_pk'))
+                       .values({field: bindparam('b_' + field) for field in _ELEMENT_FIELDS}),
+                       changed_rows)
+        if new_rows:
+            db.execute(insert(elements), new_rows)
+        if changed_actions:
+            db.execute(delete(actions).where(actions.c.element_pk == bindparam('b_pk')),
+                       [{'b_pk': pk} for pk in changed_actions])
+        if action_rows:
+            pks = dict(db.execute(select(elements.c.element_id, elements.c.pk)
+                                  .where(elements.c.diagram_id == diagram_id))
+                       .all()) if new_rows else {}
+            db.execute(insert(actions), [
+                {'element_pk': pks.get(key, key), 'name': action, 'value': value}
+                for key, encoded in action_rows for action, value in encoded.items()])
+        counts['inserted'] += len(new_rows)
+        counts['updated'] += len(changed_rows) + len(changed_actions)
+        counts['deleted'] += len(removed)
+
+    def _save_connections(self, db, diagram_id, records, counts):
+        stored = {connection_id: (pk, source_id, target_id)
+                  for connection_id, pk, source_id, target_id in db.execute(
+                      select(connections.c.connection_id, connections.c.pk,
+                             connections.c.source_id, connections.c.target_id)
+                      .where(connections.c.diagram_id == diagram_id)).all()}
+        new_rows, changed_rows = [], []
+        seen = set()
+        for record in records:
+            seen.add(record['id'])
+            previous = stored.get(record['id'])
+            if previous is None:
+                new_rows.append({'diagram_id': diagram_id, 'connection_id': record['id'],
+                                 'source_id': record['source_id'],
+                                 'target_id': record['target_id']})
+            elif previous[1:] != (record['source_id'], record['target_id']):
+                changed_rows.append({'b_pk': previous[0], 'b_source': record['source_id'],
+                                     'b_target': record['target_id']})
+        removed = [{'b_pk': pk} for connection_id, (pk, _, _) in stored.items()
+                   if connection_id not in seen]
+        if removed:
+            db.execute(delete(connections).where(connections.c.pk == bindparam('b_pk')), removed)
+        if changed_rows:
+            db.execute(update(connections).where(connections.c.pk == bindparam('b_pk'))
+                       .values(source_id=bindparam('b_source'), target_id=bindparam('b_target')),
+                       changed_rows)
+        if new_rows:
+            db.execute(insert(connections), new_rows)
+        counts['inserted'] += len(new_rows)
+        counts['updated'] += len(changed_rows)
+        counts['deleted'] += len(removed)
+
+    # Leitura
+
+    def _element_records(self, db, query):
+        """Registros de elemento a partir de uma consulta que devolve linhas de `elements`"""
+        records = {}
+        by_pk = {}
+        for row in db.execute(query):
+            record = {
+                'id': row.element_id,
+                'type': row.type,
+                'pos': (row.x, row.y),
+                'name': row.name,
+                'connections': [],
+                'description': row.description,
+                'actions': {},
+            }
+            if (row.width, row.height) != default_size(row.type):
+                record['size'] = (row.width, row.height)
+            records[row.element_id] = record
+            by_pk[row.pk] = record
+        return records, by_pk
+
+    def _attach_actions(self, db, diagram_id, by_pk):
+        if not by_pk:
+            return
+        for pk, action, value in db.execute(
+                select(actions.c.element_pk, actions.c.name, actions.c.value)
+                .join(elements, elements.c.pk == actions.c.element_pk)
+                .where(elements.c.diagram_id == diagram_id)):
+            record = by_pk.get(pk)
+            if record is not None:
+                record['actions'][action] = json.loads(value)
+
+    @staticmethod
+    def _connection_record(row):
+        return {'id': row.connection_id, 'source_id': row.source_id, 'target_id': row.target_id}
+
+    def load_document(self, name):
+        with self.engine.connect() as db:
+            diagram_id = self._diagram_id(db, name)
+            records, by_pk = self._element_records(
+                db, select(elements).where(elements.c.diagram_id == diagram_id)
+                .order_by(elements.c.pk))
+            self._attach_actions(db, diagram_id, by_pk)
+            document_connections = []
+            for row in db.execute(select(connections)
+                                  .where(connections.c.diagram_id == diagram_id)
+                                  .order_by(connections.c.pk)):
+                document_connections.append(self._connection_record(row))
+                for element_id in (row.source_id, row.target_id):
+                    if element_id in records:
+                        records[element_id]['connections'].append(row.connection_id)
+        return {'elements': list(records.values()), 'connections': document_connections}
+
+    def load_region(self, name, rect, loaded=()):
+        """Elementos cujo retângulo toca `rect` (QRectF ou (x0, y0, x1, y1)) e
+        as conexões que eles completam.
+
+        `loaded` são os ids já abertos (de regiões anteriores): eles não
+        voltam, mas as conexões entre eles e os elementos novos sim.
+        """
+        if hasattr(rect, 'left'):
+            rect = (rect.left(), rect.top(), rect.right(), rect.bottom())
+        x0, y0, x1, y1 = rect
+        loaded = set(loaded)
+        with self.engine.connect() as db:
+            diagram_id = self._diagram_id(db, name)
+            in_region = text("SELECT pk FROM element_bounds WHERE max_x >= :x0 AND min_x <= :x1 "
+                             "AND max_y >= :y0 AND min_y <= :y1").bindparams(x0=x0, y0=y0,
+                                                                            x1=x1, y1=y1)
+            records, by_pk = self._element_records(
+                db, select(elements).where(and_(elements.c.diagram_id == diagram_id,
+                                                elements.c.pk.in_(in_region)))
+                .order_by(elements.c.pk))
+            for element_id in loaded:
+                records.pop(element_id, None)
+            by_pk = {pk: record for pk, record in by_pk.items() if record['id'] in records}
+            self._attach_region_actions(db, by_pk)
+
+            known = loaded | set(records)
+            region_connections = {}
+            for column in (connections.c.source_id, connections.c.target_id):
+                for batch in _batches(list(records)):
+                    for row in db.execute(select(connections).where(and_(
+                            connections.c.diagram_id == diagram_id, column.in_(batch)))):
+                        if row.source_id in known and row.target_id in known:
+                            region_connections[row.pk] = self._connection_record(row)
+                        for element_id in (row.source_id, row.target_id):
+                            record = records.get(element_id)
+                            if record is not None and row.connection_id not in record['connections']:
+                                record['connections'].append(row.connection_id)
+        return {'elements': list(records.values()),
+                'connections': [region_connections[pk] for pk in sorted(region_connections)]}
+
+    def _attach_region_actions(self, db, by_pk):
+        for batch in _batches(list(by_pk)):
+            for pk, action, value in db.execute(
+                    select(actions.c.element_pk, actions.c.name, actions.c.value)
+                    .where(actions.c.element_pk.in_(batch))):
+                by_pk[pk]['actions'][action] = json.loads(value)
+
+    # Consultas entre diagramas
+
+    def find_elements(self, type=None, name=None, action=None, diagram=None):
+        """(diagrama, id, nome) dos elementos que atendem a todos os filtros dados.
+
+        `name` aceita curingas do LIKE (ex.: '%Aprovar%'); `action` é o
+        nome de uma ação do elemento (ex.: 'Enviar Email').
+        """
+        query = (select(diagrams.c.name.label('diagram'), elements.c.element_id, elements.c.name)
+                 .join(diagrams, diagrams.c.id == elements.c.diagram_id))
+        if type is not None:
+            query = query.where(elements.c.type == type)
+        if name is not None:
+            query = query.where(elements.c.name.like(name))
+        if diagram is not None:
+            query = query.where(diagrams.c.name == diagram)
+        if action is not None:
+            query = query.where(elements.c.pk.in_(
+                select(actions.c.element_pk).where(actions.c.name == action)))
+        query = query.order_by(diagrams.c.name, elements.c.pk)
+        try:
+            with self.engine.connect() as db:
+                return [tuple(row) for row in db.execute(query)]
+        except SQLAlchemyError as e:
+            logger.warning(f"Consulta ao repositório falhou: {e}")
+            raise
+
+
+# Limite de parâmetros por comando do SQLite (SQLITE_MAX_VARIABLE_NUMBER)
+_BATCH = 900
+
+
+def _batches(values):
+    for start in range(0, len(values), _BATCH):
+        yield values[start:start + _BATCH]
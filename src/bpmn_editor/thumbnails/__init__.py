@@ -0,0 +1,6 @@
+from .cache import ThumbnailCache, content_key
+from .render import render_thumbnail, THUMBNAIL_SIZE
+from .service import ThumbnailService
+
+__all__ = ['ThumbnailCache', 'ThumbnailService', 'render_thumbnail', 'content_key',
+           'THUMBNAIL_SIZE']
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+from PyQt5.QtGui import QImage
+
+import logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+HASH_CHUNK = 1024 * 1024
+INDEX_NAME = 'index.json'
+
+
+def default_cache_dir():
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'bpmn_editor' / 'thumbnails'
+
+
+def content_key(path):
+    """SHA-256 do conteúdo do arquivo (lido em blocos)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ThumbnailCache:
+    """Prévias PNG em disco, endereçadas pelo hash do conteúdo do arquivo.
+
+    Arquivos iguais (cópias, renomeações) compartilham a mesma prévia e
+    uma edição gera uma chave nova. O mtime de cada PNG marca o último
+    uso; quando o total passa de `max_bytes`, as menos usadas saem
+    primeiro (LRU). Para listar diretórios sem reler cada arquivo, um
+    índice (caminho, tamanho, mtime) -> chave é mantido em index.json.
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = Path(directory) if directory else default_cache_dir()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = self._load_index()
+        self._index_dirty = False
+
+    def _load_index(self):
+        try:
+            with open(self.directory / INDEX_NAME, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def flush(self):
+        """Grava o índice de chaves, se mudou"""
+        with self._lock:
+            if not self._index_dirty:
+                return
+            tmp = self.directory / f"{INDEX_NAME}.{threading.get_ident()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._index, f)
+            os.replace(tmp, self.directory / INDEX_NAME)
+            self._index_dirty = False
+
+    def key_for(self, path, cached_only=False):
+        """Chave do arquivo; com cached_only=True não lê o conteúdo (None se desconhecida)"""
+        path = Path(path)
+        stat = path.stat()
+        name = str(path.resolve())
+        entry = self._index.get(name)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+        if cached_only:
+            return None
+        key = content_key(path)
+        with self._lock:
+            self._index[name] = [stat.st_size, stat.st_mtime_ns, key]
+            self._index_dirty = True
+        return key
+
+    def path_for(self, key):
+        return self.directory / f"{key}.png"
+
+    def lookup(self, key):
+        """Prévia da chave, ou None; marca o uso para o LRU"""
+        path = self.path_for(key)
+        image = QImage(str(path))
+        if image.isNull():
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return image
+
+    def get(self, path):
+        """Prévia do arquivo se já estiver no cache (não lê o arquivo nem desenha)"""
+        try:
+            key = self.key_for(path, cached_only=True)
+        except OSError:
+            return None
+        return self.lookup(key) if key else None
+
+    def put(self, key, image):
+        path = self.path_for(key)
+        tmp = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        if not image.save(str(tmp), 'PNG'):
+            raise OSError(f"Falha ao gravar a prévia {path}")
+        os.replace(tmp, path)  # Leitores nunca veem um PNG pela metade
+        self.evict()
+        self.flush()
+        return path
+
+    def size(self):
+        return sum(entry.stat().st_size for entry in self.directory.glob('*.png'))
+
+    def evict(self):
+        """Remove as prévias menos usadas até caber em max_bytes, e as
+        entradas do índice que apontavam para elas"""
+        with self._lock:
+            entries = []
+            for entry in self.directory.glob('*.png'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry))
+            total = sum(size for _, size, _ in entries)
+            entries.sort()
+            evicted = set()
+            for _, size, entry in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    entry.unlink()
+                except OSError:
+                    continue
+                total -= size
+                evicted.add(entry.stem)
+            if evicted:
+                self._index = {name: entry for name, entry in self._index.items()
+                               if entry[2] not in evicted}
+                self._index_dirty = True
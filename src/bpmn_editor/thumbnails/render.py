@@ -0,0 +1,65 @@
+from PyQt5.QtCore import Qt, QRectF, QLineF
+from PyQt5.QtGui import QImage, QPainter, QPen, QBrush, QColor
+
+from ..models.geometry import element_geometry, default_size
+from ..models.styles import THEMES, DEFAULT_THEME
+
+import logging
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = 256  # Lado maior da prévia, em pixels
+THUMBNAIL_MARGIN = 8
+
+
+def _element_rect(record):
+    width, height = default_size(record['type'])
+    x, y = record['pos']
+    return QRectF(x - width / 2, y - height / 2, width, height)
+
+
+def render_thumbnail(document, size=THUMBNAIL_SIZE, theme_name=DEFAULT_THEME):
+    """Prévia do documento desenhada direto dos registros, sem QGraphicsScene.
+
+    Equivale ao nível de detalhe 'minimal' do editor (formas cheias,
+    conexões retas, sem textos) e usa apenas QImage/QPainter, então pode
+    rodar fora da thread da interface.
+    """
+    theme = THEMES[theme_name]
+    rects = {record['id']: _element_rect(record) for record in document.get('elements', [])}
+
+    bounds = QRectF()
+    for rect in rects.values():
+        bounds = bounds.united(rect)
+    if bounds.isEmpty():
+        bounds = QRectF(0, 0, size, size)
+    scale = (size - 2 * THUMBNAIL_MARGIN) / max(bounds.width(), bounds.height())
+    width = max(1, round(bounds.width() * scale) + 2 * THUMBNAIL_MARGIN)
+    height = max(1, round(bounds.height() * scale) + 2 * THUMBNAIL_MARGIN)
+
+    image = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+    image.fill(Qt.white)
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.translate(THUMBNAIL_MARGIN, THUMBNAIL_MARGIN)
+    painter.scale(scale, scale)
+    painter.translate(-bounds.topLeft())
+
+    painter.setPen(QPen(QColor(theme['connection']), 0))  # Cosmética: 1px em qualquer escala
+    lines = []
+    for record in document.get('connections', []):
+        source = rects.get(record['source_id'])
+        target = rects.get(record['target_id'])
+        if source is not None and target is not None:
+            lines.append(QLineF(source.center(), target.center()))
+    painter.drawLines(lines)
+
+    colors = theme['element_colors']
+    painter.setPen(QPen(QColor(theme['outline']), 0))
+    for record in document.get('elements', []):
+        rect = rects[record['id']]
+        painter.setBrush(QBrush(QColor(colors.get(record['type'], theme['fallback_color']))))
+        geometry = element_geometry(record['type'], QRectF(-rect.width() / 2, -rect.height() / 2,
+                                                           rect.width(), rect.height()))
+        painter.drawPath(geometry.outline.translated(rect.center()))
+    painter.end()
+    return image
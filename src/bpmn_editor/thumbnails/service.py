@@ -0,0 +1,96 @@
+from pathlib import Path
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QImage
+
+from .cache import ThumbnailCache
+from .render import render_thumbnail
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class ThumbnailSignals(QObject):
+    """Sinais emitidos pelos jobs (entregues na thread da interface)"""
+    ready = pyqtSignal(str, QImage)   # caminho, prévia
+    failed = pyqtSignal(str, str)     # caminho, mensagem
+    finished = pyqtSignal(str)        # caminho (sempre, com ou sem prévia)
+
+
+class ThumbnailJob(QRunnable):
+    """Gera a prévia de um arquivo (ou de um documento recém-salvo)"""
+
+    def __init__(self, service, path, document=None):
+        super().__init__()
+        self.service = service
+        self.path = str(path)
+        self.document = document
+
+    def run(self):
+        cache = self.service.cache
+        try:
+            key = cache.key_for(self.path)
+            image = None if self.document is not None else cache.lookup(key)
+            if image is None:
+                document = self.document
+                if document is None:
+                    from ..formats import load_document
+                    document = load_document(self.path)
+                image = render_thumbnail(document)
+                cache.put(key, image)
+            self.service.signals.ready.emit(self.path, image)
+        except Exception as e:
+            logger.warning(f"Prévia de {self.path} falhou: {e}")
+            self.service.signals.failed.emit(self.path, str(e))
+        finally:
+            self.service.signals.finished.emit(self.path)
+
+
+class ThumbnailService(QObject):
+    """Ponto de entrada das prévias para a interface.
+
+    `thumbnail` responde na hora com o que estiver no cache e agenda a
+    geração do que faltar num QThreadPool próprio; `file_saved` gera a
+    prévia de um arquivo que acabou de ser gravado.
+    """
+
+    def __init__(self, cache=None, max_threads=1, parent=None):
+        super().__init__(parent)
+        self.cache = cache or ThumbnailCache()
+        self.signals = ThumbnailSignals()
+        self.signals.finished.connect(self._on_finished)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)  # Em segundo plano, sem disputar a UI
+        self._pending = set()
+
+    def thumbnail(self, path):
+        """Prévia em cache (QImage) ou None; sem prévia, agenda a geração"""
+        image = self.cache.get(path)
+        if image is None:
+            self.request(path)
+        return image
+
+    def request(self, path):
+        path = str(path)
+        if path in self._pending:
+            return
+        self._pending.add(path)
+        self.pool.start(ThumbnailJob(self, path))
+
+    def prefetch(self, directory, pattern='*.bpmn'):
+        """Agenda as prévias que faltam para os arquivos do diretório"""
+        for path in sorted(Path(directory).glob(pattern)):
+            if self.cache.get(path) is None:
+                self.request(path)
+
+    def file_saved(self, path, document):
+        """Gera a prévia de um arquivo recém-gravado a partir do documento em memória"""
+        path = str(path)
+        self._pending.add(path)
+        self.pool.start(ThumbnailJob(self, path, document))
+
+    def wait(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
+
+    def _on_finished(self, path):
+        self._pending.discard(path)
@@ -3,4 +3,7 @@ import sys
 
 def excepthook(exc_type, exc_value, exc_traceback):
     traceback.print_exception(exc_type, exc_value, exc_traceback)
-sys.excepthook = excepthook
\ No newline at end of file
+sys.excepthook = excepthook
+
+class DocumentFormatError(ValueError):
+    """Arquivo de diagrama ilegível ou num formato não suportado"""
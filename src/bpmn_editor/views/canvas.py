@@ -2,31 +2,103 @@ import sys
 from PyQt5.QtWidgets import (QGraphicsView, QGraphicsScene, QAction, QMenu, QGraphicsLineItem, 
                              QMessageBox, QShortcut, QSplitter)
 from PyQt5.QtGui import (QPainter, QCursor, QPen,QKeySequence, QMouseEvent, QTransform)
-from PyQt5.QtCore import (Qt, QEvent, QPoint, QPointF, QRectF, QLineF, QObject, pyqtSignal)
+from PyQt5.QtCore import (Qt, QEvent, QPoint, QPointF, QRectF, QLineF, QObject, QTimer, pyqtSignal)
 
-from ..models.grid import GridScene  # Dois pontos sobem um nível
+from ..models.grid import GridScene, DEFAULT_INDEX_MODE, DEFAULT_REPAINT_MODE  # Dois pontos sobem um nível
 from ..models.elements import BPMNElement, BPMNConnection
 from ..dialogs.property_dialog import PropertyDialog
+from .diff_overlay import DiffOverlay
 
+from contextlib import contextmanager
 from weakref import ref
 import logging
 logger = logging.getLogger(__name__)
 
 print(sys.path)  # Deve incluir o caminho do projeto
 
+# Modos de zoom:
+#   'immediate' -> cada passo redesenha a cena na nova escala
+#   'smooth'    -> durante o gesto a última imagem da viewport é escalada;
+#                  a cena só é redesenhada após ZOOM_SETTLE_MS sem novos passos.
+#                  A imagem é copiada do que já está na janela, sem redesenhar
+ZOOM_MODES = ('immediate', 'smooth')
+DEFAULT_ZOOM_MODE = 'smooth'
+ZOOM_SETTLE_MS = 150
+
 from PyQt5.QtCore import QObject, pyqtSignal
 
 class CanvasSignals(QObject):
     """Sinais customizados do canvas"""
     selectionChanged = pyqtSignal(list)  # Sinal para mudança de seleção
+    elementsMoved = pyqtSignal(list)     # Elementos movidos, um aviso por lote
     # Se necessário, adicionarei outros sinais (ex: elementAdded, connectionCreated)
 
+class BulkInsert:
+    """Transação de inserção em massa (ver BPMNCanvas.bulk_insert).
+
+    Elementos e conexões entram na cena sem caminho calculado, sem
+    cruzamentos, sem índice BSP do Qt e sem repintar; `commit` calcula
+    cada caminho e os cruzamentos uma única vez.
+    """
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.scene = canvas.scene
+        self.elements = []
+        self.connections = []
+
+    def add_element(self, element_type, pos, name=None, element_id=None,
+                    description=None, actions=None, size=None):
+        element = BPMNElement(element_type, pos)
+        if size is not None:
+            width, height = size
+            element.rect = QRectF(-width / 2, -height / 2, width, height)
+        if element_id is not None:
+            element.unique_id = element_id  # Preservar o ID original
+            element.setData(0, element_id)
+        if name is not None:
+            element.name = name
+        if description is not None:
+            element.description = description
+        if actions is not None:
+            element.actions = dict(actions)
+        if self.canvas.editor_ref:
+            element.set_editor_reference(self.canvas.editor_ref)
+        self.scene.addItem(element)
+        self.elements.append(element)
+        return element
+
+    def add_connection(self, source, target, connection_id=None):
+        if source is None or target is None or source is target:
+            return None
+        for connection in source.connections:
+            if connection.source is source and connection.target is target:
+                return None
+        connection = BPMNConnection(source, target, defer_path=True)
+        connection.setZValue(-1)  # Conexões ficam abaixo dos elementos
+        if connection_id is not None:
+            connection.unique_id = connection_id
+            connection.setData(0, connection_id)
+        self.scene.addItem(connection)
+        self.connections.append(connection)
+        return connection
+
+    def commit(self):
+        dispatcher = self.scene.dispatcher
+        # Só os caminhos novos: as conexões que já estavam na cena não mudaram
+        dispatcher.update_connections(self.connections)
+        dispatcher.end()
+        self.canvas.elements.extend(self.elements)
+        self.canvas.connections.extend(self.connections)
+
+
 class BPMNCanvas(QGraphicsView):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, index_mode=DEFAULT_INDEX_MODE,
+                 repaint_mode=DEFAULT_REPAINT_MODE, zoom_mode=DEFAULT_ZOOM_MODE):
         super().__init__(parent)
         
         # Criar uma nova instância de GridScene
-        self.scene = GridScene()
+        self.scene = GridScene(index_mode=index_mode)
         self.setScene(self.scene)
         
         # Configurações
@@ -51,9 +123,20 @@ class BPMNCanvas(QGraphicsView):
         self.setMinimumSize(400, 300)      
         self.editor_ref = None  # Inicializar atributo
 
-        self.setViewportUpdateMode(QGraphicsView.FullViewportUpdate)
+        self.set_repaint_mode(repaint_mode)  # FullViewportUpdate no modo 'full'
+
+        # Zoom suave: imagem da viewport no início do gesto e a área de cena que ela mostra
+        self.zoom_mode = None
+        self.set_zoom_mode(zoom_mode)
+        self._zoom_snapshot = None
+        self._zoom_snapshot_rect = QRectF()
+        self._zoom_timer = QTimer(self)
+        self._zoom_timer.setSingleShot(True)
+        self._zoom_timer.setInterval(ZOOM_SETTLE_MS)
+        self._zoom_timer.timeout.connect(self.finish_zoom)
     
         self.drag_start_position = QPoint()
+        self.diff_overlay = None  # Comparação com outra revisão (show_diff)
 
         self.connection_source = None
         self.temp_connection = None  
@@ -87,7 +170,7 @@ class BPMNCanvas(QGraphicsView):
 
         # Nova configuração de performance
         self.setCacheMode(QGraphicsView.CacheBackground)
-        self.scene.setItemIndexMethod(QGraphicsScene.NoIndex)
+        # Índice espacial definido por documento (ver set_index_mode)
 
         # 2. Configurações adicionais
         self.setRenderHint(QPainter.Antialiasing)
@@ -99,39 +182,160 @@ class BPMNCanvas(QGraphicsView):
 
         print("Elementos na cena:", self.scene.items())  # Deve mostrar os elementos adicionados
 
+    def set_repaint_mode(self, mode):
+        """'full' repinta a viewport inteira; 'dirty' só as regiões alteradas"""
+        self.scene.set_repaint_mode(mode)
+        if mode == 'full':
+            self.setViewportUpdateMode(QGraphicsView.FullViewportUpdate)
+        else:
+            self.setViewportUpdateMode(QGraphicsView.MinimalViewportUpdate)
+
+    @contextmanager
+    def bulk_insert(self, fit_scene=True, rebuild_index=True):
+        """Insere muitos itens de uma vez: `with canvas.bulk_insert() as bulk:`
+
+        Enquanto a transação está aberta os sinais do canvas, os
+        cruzamentos, o índice BSP e a repintura ficam suspensos e os
+        movimentos se acumulam no dispatcher. Ao sair, caminhos e
+        cruzamentos são calculados uma vez, o índice é reconstruído e
+        (com fit_scene) a área rolável passa a cobrir o conteúdo.
+
+        Reconstruir a BSP custa O(itens na cena); para lotes pequenos numa
+        cena grande, rebuild_index=False insere no índice item a item.
+        """
+        scene = self.scene
+        bulk = BulkInsert(self)
+        signals_blocked = self.signals.blockSignals(True)
+        self.viewport().setUpdatesEnabled(False)
+        index_method = scene.itemIndexMethod()
+        if rebuild_index:
+            scene.setItemIndexMethod(QGraphicsScene.NoIndex)
+        crossings_suspended = scene.crossings.suspended
+        scene.crossings.suspend()
+        scene.dispatcher.begin()
+        try:
+            yield bulk
+        finally:
+            try:
+                bulk.commit()
+            finally:
+                if not crossings_suspended:
+                    scene.crossings.resume()
+                if rebuild_index:
+                    scene.setItemIndexMethod(index_method)
+                    if index_method == QGraphicsScene.BspTreeIndex:
+                        scene.setBspTreeDepth(scene.bsp_depth)
+                self.viewport().setUpdatesEnabled(True)
+                self.signals.blockSignals(signals_blocked)
+                if fit_scene:
+                    self.setSceneRect(QRectF(self.viewport().rect()).united(scene.content_rect))
+                self.viewport().update()
+
+    def set_zoom_mode(self, mode):
+        if mode not in ZOOM_MODES:
+            raise ValueError(f"Modo de zoom inválido: {mode}")
+        self.zoom_mode = mode
+
+    def zoom_by(self, factor):
+        """Aplica um passo de zoom (roda do mouse, atalhos Zoom +/-)"""
+        if self.zoom_mode == 'immediate':
+            self.scale(factor, factor)
+            # Escalar já repinta a viewport; forçar a cena só no modo 'full'
+            self.scene.request_full_repaint()
+            return
+        if self._zoom_snapshot is None:
+            # Início do gesto: guarda o que está na tela
+            self._zoom_snapshot = self._last_frame()
+            self._zoom_snapshot_rect = self.mapToScene(self.viewport().rect()).boundingRect()
+        self.scale(factor, factor)
+        self._zoom_timer.start()  # Cada passo adia o redesenho final
+
+    def _last_frame(self):
+        """Último quadro da viewport, copiado da janela já desenhada.
+
+        viewport().grab() redesenharia a cena inteira (dezenas de ms em
+        mapas grandes); só é usado onde a plataforma não entrega os pixels
+        da janela (ex.: Wayland) ou com a viewport fora da tela.
+        """
+        viewport = self.viewport()
+        window = viewport.window()
+        handle = window.windowHandle()
+        if viewport.isVisible() and handle is not None and handle.screen() is not None:
+            origin = viewport.mapTo(window, QPoint(0, 0))
+            frame = handle.screen().grabWindow(window.winId(), origin.x(), origin.y(),
+                                               viewport.width(), viewport.height())
+            if not frame.isNull() and frame.size() == viewport.size() * frame.devicePixelRatio():
+                return frame
+        return viewport.grab()
+
+    def finish_zoom(self):
+        """Fim do gesto: volta a desenhar a cena, em qualidade total"""
+        self._zoom_timer.stop()
+        if self._zoom_snapshot is None:
+            return
+        self._zoom_snapshot = None
+        self.scene.request_full_repaint()
+        self.viewport().update()
+
+    @property
+    def zooming(self):
+        return self._zoom_snapshot is not None
+
+    def paintEvent(self, event):
+        if self._zoom_snapshot is None:
+            super().paintEvent(event)
+            return
+        # Durante o gesto só a imagem guardada é desenhada, na escala atual
+        painter = QPainter(self.viewport())
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        painter.fillRect(event.rect(), self.palette().base())  # Bordas que a imagem não cobre
+        target = QRectF(self.mapFromScene(self._zoom_snapshot_rect).boundingRect())
+        painter.drawPixmap(target, self._zoom_snapshot, QRectF(self._zoom_snapshot.rect()))
+        painter.end()
+
+    def show_diff(self, diff, parent, child):
+        """Mostra as mudanças de um DocumentDiff sobre o diagrama (troca a anterior)"""
+        self.clear_diff()
+        self.diff_overlay = DiffOverlay(diff, parent, child)
+        self.scene.addItem(self.diff_overlay)
+        return self.diff_overlay
+
+    def clear_diff(self):
+        overlay, self.diff_overlay = self.diff_overlay, None
+        if overlay is None:
+            return
+        try:
+            if overlay.scene() is self.scene:
+                self.scene.removeItem(overlay)
+        except RuntimeError:
+            pass  # Já apagado por scene.clear()
+
+    def set_index_mode(self, mode, bsp_depth=None):
+        """Troca o índice espacial do documento ('none', 'bsp' ou 'grid')"""
+        self.scene.set_index_mode(mode, bsp_depth)
+
     def update_connections(self):
-        """Atualiza todas as conexões cruzadas"""
+        """Reconstrói todos os cruzamentos (reconstrução global, use com parcimônia)
+
+        No dia a dia os cruzamentos são mantidos incrementalmente pelo
+        CrossingEngine da cena sempre que o caminho de uma conexão muda.
+        """
         # Obter todas as conexões da cena
         self.connections = [item for item in self.scene.items() if isinstance(item, BPMNConnection)]
-        
-        # Atualizar conexões cruzadas
-        for connection in self.connections:
-            # Encontrar todas as conexões que cruzam com a atual
-            crossing = [c for c in self.connections 
-                       if c != connection and 
-                       c.line().intersects(connection.line())]
-            connection.crossing_connections = crossing
-            
-            # Atualizar visual se houver cruzamentos
-            if crossing:
-                connection.update_position()
+        self.scene.crossings.rebuild(self.connections)
 
     def on_element_selected(self, element):
         dialog = PropertyDialog(element, self)  # 👈 Diálogo modal
         dialog.exec_()
 
     def setup_connections(self):
-        """Conecta sinais de movimento dos elementos"""
-        for element in self.elements:
-            element.moved.connect(self.on_element_moved)  # ← Conexão do sinal
-
-    def on_element_moved(self):
-        """Atualiza todas as conexões do elemento movido"""
-        sender_element = self.sender()  # Obtém o elemento que emitiu o sinal
-        for connection in sender_element.connections:
-            connection.update_path()
-        # self.canvas.update_connections() 
-        self.update_connections()  # ← Garantir atualização
+        """Assina as mudanças de geometria da cena (um aviso por lote)"""
+        self.scene.dispatcher.subscribe(self.on_elements_moved)
+
+    def on_elements_moved(self, elements, connections):
+        """Caminhos e cruzamentos já foram atualizados pelo dispatcher;
+        apenas repassa o lote para os painéis"""
+        self.signals.elementsMoved.emit(elements)
 
     def add_element(self, element_type: str, pos: QPointF):
         valid_types = ['start', 'task', 'gateway']
@@ -159,24 +363,25 @@ class BPMNCanvas(QGraphicsView):
         return element
 
     def load_elements(self, data):
-        # Fase 1: Criar elementos
-        elements_map = {}
-        for elem_data in data['elements']:
-            element = self.add_element(
-                elem_data['type'], 
-                QPointF(elem_data['x'], elem_data['y'])
-            )
-            element.name = elem_data['name']
-            elements_map[elem_data['id']] = element
-        
-        # Fase 2: Criar conexões
-        for conn_data in data['connections']:
-            try:
-                start = elements_map[conn_data['start_id']]
-                end = elements_map[conn_data['end_id']]
-                self.create_connection(start, end)  # ← Usar método correto
-            except KeyError as e:
-                print(f"Erro na conexão: elemento {e} não encontrado")
+        with self.bulk_insert() as bulk:
+            # Fase 1: Criar elementos
+            elements_map = {}
+            for elem_data in data['elements']:
+                element = bulk.add_element(
+                    elem_data['type'], 
+                    QPointF(elem_data['x'], elem_data['y']),
+                    name=elem_data['name']
+                )
+                elements_map[elem_data['id']] = element
+            
+            # Fase 2: Criar conexões
+            for conn_data in data['connections']:
+                try:
+                    start = elements_map[conn_data['start_id']]
+                    end = elements_map[conn_data['end_id']]
+                    bulk.add_connection(start, end)
+                except KeyError as e:
+                    print(f"Erro na conexão: elemento {e} não encontrado")
 
     def dragEnterEvent(self, event):
         if event.mimeData().hasFormat("application/x-bpmn-element"):
@@ -212,13 +417,9 @@ class BPMNCanvas(QGraphicsView):
             self.scene.addItem(connection)
             connection.setZValue(-1)  # Conexões ficam abaixo dos elementos
             
-            # Atualizar visual
+            # Atualizar visual (os cruzamentos são recalculados pela cena)
             connection.update_position()
-            connection.update_path()
-            
-            # Atualizar conexões cruzadas
-            self.connections = [item for item in self.scene.items() if isinstance(item, BPMNConnection)]
-            self.update_connections()
+            self.connections.append(connection)
             
             return connection
             
@@ -233,7 +434,7 @@ class BPMNCanvas(QGraphicsView):
 
         if self.mode == "connection" and event.button() == Qt.LeftButton:
             scene_pos = self.mapToScene(event.pos())
-            item = self.scene.itemAt(scene_pos, self.transform())
+            item = self.scene.item_at(scene_pos, self.transform())
             
             if isinstance(item, BPMNElement):
                 if not self.connection_source:
@@ -249,12 +450,7 @@ class BPMNCanvas(QGraphicsView):
                 else:
                     # Finalizar conexão
                     if item != self.connection_source:
-                        connection = self.create_connection(self.connection_source, item)
-                        if connection:
-                            self.connection_source.connections.append(connection)
-                            item.connections.append(connection)
-                            self.connections.append(connection)
-                            self.update_connections()
+                        self.create_connection(self.connection_source, item)
                     
                     # Limpar estado
                     if self.temp_connection:
@@ -280,15 +476,10 @@ class BPMNCanvas(QGraphicsView):
     def mouseReleaseEvent(self, event):
         if self.mode == "connection" and self.temp_connection and event.button() == Qt.LeftButton:
             scene_pos = self.mapToScene(event.pos())
-            item = self.scene.itemAt(scene_pos, self.transform())
+            item = self.scene.item_at(scene_pos, self.transform())
             
             if isinstance(item, BPMNElement) and item != self.connection_source:
-                connection = self.create_connection(self.connection_source, item)
-                if connection:
-                    self.connection_source.connections.append(connection)
-                    item.connections.append(connection)
-                    self.connections.append(connection)
-                    self.update_connections()
+                self.create_connection(self.connection_source, item)
             
             # Limpar estado
             if self.temp_connection:
@@ -325,7 +516,7 @@ class BPMNCanvas(QGraphicsView):
 
     def contextMenuEvent(self, event):
         scene_pos = self.mapToScene(event.pos())
-        items = self.scene.items(scene_pos)
+        items = self.scene.items_at(scene_pos)
         menu = QMenu()
 
         # Ação para remover seleção múltipla
@@ -385,7 +576,7 @@ class BPMNCanvas(QGraphicsView):
 
     def connection_mouse_press(self, event):
         if event.button() == Qt.LeftButton:
-            item = self.itemAt(event.pos())
+            item = self.scene.item_at(self.mapToScene(event.pos()), self.transform())
             if isinstance(item, BPMNElement) and item != self.connection_source:
                 self.create_connection(self.connection_source, item)
         self.cleanup_connection_mode()
@@ -592,15 +783,26 @@ class BPMNCanvas(QGraphicsView):
         if event.modifiers() & Qt.ControlModifier:
             zoom_factor = 1.25
             if event.angleDelta().y() > 0:
-                self.scale(zoom_factor, zoom_factor)
+                self.zoom_by(zoom_factor)
             else:
-                self.scale(1/zoom_factor, 1/zoom_factor)
-            self.scene.update()
+                self.zoom_by(1/zoom_factor)
 
     def resizeEvent(self, event):
-        self.setSceneRect(QRectF(self.viewport().rect()))  # Atualizar área visível
+        # Área rolável: a viewport mais todo o conteúdo do diagrama. O
+        # retângulo do conteúdo é mantido pela cena a cada reindexação;
+        # itemsBoundingRect() varreria todos os itens a cada redimensionamento
+        self.setSceneRect(QRectF(self.viewport().rect()).united(self.scene.content_rect))
         super().resizeEvent(event)
 
+    def center_on(self, pos):
+        """Centraliza a viewport em `pos` (cena), estendendo a área rolável se preciso"""
+        visible = self.mapToScene(self.viewport().rect()).boundingRect()
+        target = QRectF(visible)
+        target.moveCenter(pos)
+        if not self.sceneRect().contains(target):
+            self.setSceneRect(self.sceneRect().united(target))
+        self.centerOn(pos)
+
     def setMode(self, mode):
         """
         Define o modo de operação do canvas
@@ -0,0 +1,133 @@
+from PyQt5.QtWidgets import QGraphicsItem
+from PyQt5.QtGui import QColor, QPen, QBrush, QPainterPath
+from PyQt5.QtCore import Qt, QRectF, QPointF, QLineF
+
+from ..models.geometry import default_size
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Cor de cada categoria do DocumentDiff; removidos e a posição antiga dos
+# movidos são desenhados tracejados, onde estavam na revisão mãe
+DIFF_COLORS = {
+    'added': '#2E7D32',
+    'removed': '#C62828',
+    'moved': '#EF6C00',
+    'renamed': '#1565C0',
+    'actions_changed': '#6A1B9A',
+    'rewired': '#EF6C00',
+}
+OVERLAY_Z = 1000   # Acima de elementos e conexões
+MARGIN = 6         # Folga entre o contorno do elemento e a marca
+BADGE_RADIUS = 5   # Marca de ações alteradas, no canto do elemento
+
+
+def _element_rect(record):
+    width, height = record.get('size') or default_size(record['type'])
+    x, y = record['pos']
+    return QRectF(x - width / 2 - MARGIN, y - height / 2 - MARGIN,
+                  width + 2 * MARGIN, height + 2 * MARGIN)
+
+
+def _center(record):
+    return QPointF(*record['pos'])
+
+
+class DiffOverlay(QGraphicsItem):
+    """Marcas de um DocumentDiff sobre o canvas (ver BPMNCanvas.show_diff).
+
+    As marcas são montadas uma vez, com as posições de `parent` (o que
+    saiu) e de `child` (o resto); o paint só desenha as que caem na área
+    exposta. O item não é selecionável nem recebe cliques.
+    """
+
+    def __init__(self, diff, parent, child):
+        super().__init__()
+        self.diff = diff
+        self.setZValue(OVERLAY_Z)
+        self.setAcceptedMouseButtons(Qt.NoButton)
+        self.setAcceptHoverEvents(False)
+        # exposedRect só vem preenchido com esta flag
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+        self._pens = {}
+        for category, color in DIFF_COLORS.items():
+            pen = QPen(QColor(color), 2)
+            pen.setCosmetic(True)  # Mesma espessura em qualquer zoom
+            self._pens[category] = pen
+        self._marks = []   # (categoria, 'rect' | 'line' | 'badge', geometria, tracejado, limites)
+        self._bounds = QRectF()
+        self._build(diff, parent, child)
+
+    def _add(self, category, shape, geometry, dashed=False):
+        bounds = (geometry if shape == 'rect' else
+                  QRectF(geometry.p1(), geometry.p2()).normalized() if shape == 'line' else
+                  QRectF(geometry.x() - BADGE_RADIUS, geometry.y() - BADGE_RADIUS,
+                         2 * BADGE_RADIUS, 2 * BADGE_RADIUS))
+        bounds = bounds.adjusted(-2, -2, 2, 2)  # Caneta; e retas horizontais não têm altura
+        self._marks.append((category, shape, geometry, dashed, bounds))
+        self._bounds = self._bounds.united(bounds)
+
+    def _build(self, diff, parent, child):
+        old = {record['id']: record for record in parent.get('elements', [])}
+        new = {record['id']: record for record in child.get('elements', [])}
+        old_connections = {record['id']: record for record in parent.get('connections', [])}
+        new_connections = {record['id']: record for record in child.get('connections', [])}
+
+        def connection_line(record, elements):
+            source, target = elements.get(record['source_id']), elements.get(record['target_id'])
+            if source is not None and target is not None:
+                return QLineF(_center(source), _center(target))
+            return None
+
+        for item_id in diff.added:
+            if item_id in new:
+                self._add('added', 'rect', _element_rect(new[item_id]))
+            elif item_id in new_connections:
+                line = connection_line(new_connections[item_id], new)
+                if line is not None:
+                    self._add('added', 'line', line)
+        for item_id in diff.removed:
+            if item_id in old:
+                self._add('removed', 'rect', _element_rect(old[item_id]), dashed=True)
+            elif item_id in old_connections:
+                line = connection_line(old_connections[item_id], old)
+                if line is not None:
+                    self._add('removed', 'line', line, dashed=True)
+        for item_id in diff.moved:
+            self._add('moved', 'rect', _element_rect(old[item_id]), dashed=True)
+            self._add('moved', 'line', QLineF(_center(old[item_id]), _center(new[item_id])))
+            self._add('moved', 'rect', _element_rect(new[item_id]))
+        for item_id in diff.renamed:
+            self._add('renamed', 'rect', _element_rect(new[item_id]).adjusted(-3, -3, 3, 3))
+        for item_id in diff.actions_changed:
+            self._add('actions_changed', 'badge', _element_rect(new[item_id]).topRight())
+        for item_id in diff.rewired:
+            line = connection_line(new_connections[item_id], new)
+            if line is not None:
+                self._add('rewired', 'line', line)
+
+    def boundingRect(self):
+        return self._bounds
+
+    def shape(self):
+        # Sem forma: itemAt e a seleção por área atravessam o overlay
+        return QPainterPath()
+
+    def paint(self, painter, option, widget=None):
+        exposed = option.exposedRect if option is not None else self._bounds
+        painter.setBrush(Qt.NoBrush)
+        for category, shape, geometry, dashed, bounds in self._marks:
+            if not exposed.intersects(bounds):
+                continue
+            pen = QPen(self._pens[category])
+            if dashed:
+                pen.setStyle(Qt.DashLine)
+            painter.setPen(pen)
+            if shape == 'rect':
+                painter.drawRect(geometry)
+            elif shape == 'line':
+                painter.drawLine(geometry)
+            else:
+                painter.setBrush(QBrush(pen.color()))
+                painter.drawEllipse(geometry, BADGE_RADIUS, BADGE_RADIUS)
+                painter.setBrush(Qt.NoBrush)
@@ -0,0 +1,79 @@
+import pytest
+from PyQt5.QtCore import QPointF, QRectF
+from bpmn_editor.models.elements import BPMNElement
+from bpmn_editor.views.canvas import BPMNCanvas
+from bpmn_editor.panels.overview_panel import OverviewWidget
+
+def test_smooth_zoom_defers_scene_render(qapp):
+    canvas = BPMNCanvas(zoom_mode='smooth')
+    canvas.scene.addItem(BPMNElement('task', QPointF(0, 0)))
+    canvas.resize(400, 300)
+    canvas.zoom_by(1.25)
+    canvas.zoom_by(1.25)
+    assert canvas.zooming
+    assert canvas.transform().m11() == pytest.approx(1.5625)
+
+    canvas.finish_zoom()
+    assert not canvas.zooming
+
+def test_smooth_zoom_starts_from_the_last_painted_frame(qapp, monkeypatch):
+    canvas = BPMNCanvas(zoom_mode='smooth')
+    for i in range(20):
+        canvas.scene.addItem(BPMNElement('task', QPointF(i * 150, (i % 4) * 120)))
+    canvas.resize(400, 300)
+    canvas.show()
+    qapp.processEvents()
+    canvas.viewport().repaint()
+    painted = canvas.viewport().grab().toImage()
+
+    def grab():
+        raise AssertionError("o início do gesto não deve redesenhar a cena")
+    monkeypatch.setattr(canvas.viewport(), 'grab', grab)
+    canvas.zoom_by(1.25)
+    assert canvas.zooming
+    assert canvas._zoom_snapshot.toImage().convertToFormat(painted.format()) == painted
+    canvas.finish_zoom()
+
+def test_overview_patches_only_moved_regions(qapp):
+    canvas = BPMNCanvas()
+    a = BPMNElement('task', QPointF(0, 0))
+    b = BPMNElement('task', QPointF(600, 400))
+    canvas.scene.addItem(a)
+    canvas.scene.addItem(b)
+
+    overview = OverviewWidget(canvas)
+    overview.resize(200, 150)
+    overview.rebuild()
+    world = QRectF(overview._world)
+
+    received = []
+    canvas.scene.dispatcher.subscribe_regions(received.append)
+    rebuilds = []
+    overview.rebuild = lambda: rebuilds.append(True)
+
+    a.setPos(a.pos() + QPointF(50, 20))
+    canvas.scene.dispatcher.flush_regions()
+
+    # Região antiga e nova do elemento, dentro da área já desenhada: só remendo
+    assert received and all(world.contains(region) for region in received[0])
+    assert rebuilds == []
+
+    # Sair da área coberta obriga a redesenhar tudo
+    b.setPos(QPointF(5000, 5000))
+    canvas.scene.dispatcher.flush_regions()
+    assert rebuilds == [True]
+
+def test_resize_covers_content_without_scanning_items(qapp, monkeypatch):
+    canvas = BPMNCanvas()
+    element = BPMNElement('task', QPointF(0, 0))
+    canvas.scene.addItem(element)
+    element.setPos(QPointF(3000, 2000))
+
+    scans = []
+    monkeypatch.setattr(canvas.scene, 'itemsBoundingRect', lambda: scans.append(True) or QRectF())
+    canvas.resize(500, 400)
+    canvas.show()
+    qapp.processEvents()
+    assert scans == []
+    assert canvas.sceneRect().contains(element.sceneBoundingRect())
+    assert canvas.sceneRect().contains(QRectF(canvas.viewport().rect()))
@@ -1,14 +1,7 @@
 import pytest
 from PyQt5.QtCore import QPointF
-from PyQt5.QtWidgets import QApplication
 from bpmn_editor.models.elements import BPMNElement, BPMNConnection
 
-@pytest.fixture(scope="session")
-def qapp():
-    app = QApplication([])
-    yield app
-    app.quit()
-
 def test_connection_creation(qapp):  # adicione o fixture qapp como parâmetro
     # Criando elementos com QPointF em vez de tuplas
     element1 = BPMNElement(element_type='task', pos=QPointF(0, 0))
@@ -19,3 +12,126 @@ def test_connection_creation(qapp):  # adicione o fixture qapp como parâmetro
     connection = BPMNConnection(element1, element2)
     assert connection.start_element() == element1
     assert connection.end_element() == element2
+
+def _connect(scene, source, target):
+    connection = BPMNConnection(source, target)
+    scene.addItem(connection)
+    return connection
+
+def test_crossings_are_symmetric_and_incremental(qapp):
+    from bpmn_editor.models.grid import GridScene
+
+    scene = GridScene()
+    a = BPMNElement('task', QPointF(0, 0))
+    b = BPMNElement('task', QPointF(400, 400))
+    c = BPMNElement('task', QPointF(0, 400))
+    d = BPMNElement('task', QPointF(400, 0))
+    for element in (a, b, c, d):
+        scene.addItem(element)
+
+    ab = _connect(scene, a, b)
+    cd = _connect(scene, c, d)
+    assert ab.crossing_connections == [cd]
+    assert cd.crossing_connections == [ab]
+
+    # Afastar um elemento desfaz o cruzamento dos dois lados
+    d.setPos(QPointF(0, 800))
+    assert ab.crossing_connections == []
+    assert cd.crossing_connections == []
+
+    d.setPos(QPointF(400, 0))
+    assert cd in ab.crossing_connections
+
+    scene.removeItem(cd)
+    assert ab.crossing_connections == []
+
+def test_crossing_points_are_cached_per_pair(qapp):
+    from bpmn_editor.models.grid import GridScene
+
+    scene = GridScene()
+    a = BPMNElement('task', QPointF(0, 0))
+    b = BPMNElement('task', QPointF(400, 400))
+    c = BPMNElement('task', QPointF(0, 400))
+    d = BPMNElement('task', QPointF(400, 0))
+    for element in (a, b, c, d):
+        scene.addItem(element)
+    ab = _connect(scene, a, b)
+    cd = _connect(scene, c, d)
+
+    points = ab.crossing_points()
+    assert len(points) == 1
+    assert points is ab.crossing_points()  # Sem recálculo entre repaints
+    assert [(p.x(), p.y()) for p in cd.crossing_points()] == [(p.x(), p.y()) for p in points]
+
+    d.setPos(QPointF(0, 800))
+    assert ab.crossing_points() == []
+
+def test_drag_updates_are_coalesced_per_frame(qapp):
+    from bpmn_editor.models.grid import GridScene
+
+    scene = GridScene()
+    a = BPMNElement('task', QPointF(0, 0))
+    b = BPMNElement('task', QPointF(400, 0))
+    for element in (a, b):
+        scene.addItem(element)
+    connection = _connect(scene, a, b)
+    path = connection.path()
+
+    dispatcher = scene.dispatcher
+    dispatcher.begin()
+    a.moveBy(0, 50)
+    b.moveBy(0, 50)
+    assert connection.path() == path  # Ainda aguardando o quadro
+    dispatcher.end()
+    assert connection.path().elementAt(0).y == path.elementAt(0).y + 50
+
+def test_dispatcher_tracks_adjacency_and_notifies_once_per_batch(qapp):
+    from bpmn_editor.models.grid import GridScene
+
+    scene = GridScene()
+    a = BPMNElement('task', QPointF(0, 0))
+    b = BPMNElement('task', QPointF(400, 0))
+    for element in (a, b):
+        scene.addItem(element)
+    connection = _connect(scene, a, b)
+    dispatcher = scene.dispatcher
+    assert dispatcher.connections_of(a) == [connection]
+
+    batches = []
+    dispatcher.subscribe(lambda elements, connections: batches.append((elements, connections)))
+    dispatcher.begin()
+    a.moveBy(0, 10)
+    b.moveBy(0, 10)
+    a.moveBy(0, 10)
+    dispatcher.end()
+    assert batches == [([a, b], [connection])]
+
+    scene.removeItem(connection)
+    assert dispatcher.connections_of(a) == []
+
+
+def test_bulk_insert_computes_paths_and_crossings_at_commit(qapp, monkeypatch):
+    from bpmn_editor.views.canvas import BPMNCanvas
+
+    canvas = BPMNCanvas()
+    computed = []
+    update_position = BPMNConnection.update_position
+    monkeypatch.setattr(BPMNConnection, 'update_position',
+                        lambda self: (computed.append(self), update_position(self))[1])
+    with canvas.bulk_insert() as bulk:
+        a = bulk.add_element('task', QPointF(0, 0), element_id='a')
+        b = bulk.add_element('task', QPointF(400, 400), element_id='b')
+        c = bulk.add_element('task', QPointF(0, 400), element_id='c')
+        d = bulk.add_element('task', QPointF(400, 0), element_id='d')
+        ab = bulk.add_connection(a, b, 'ab')
+        cd = bulk.add_connection(c, d, 'cd')
+        assert bulk.add_connection(a, b) is None  # Duplicada
+        # Nada calculado enquanto a transação está aberta
+        assert ab.path().isEmpty() and computed == []
+        assert canvas.scene.crossings.suspended
+
+    assert not canvas.scene.crossings.suspended
+    assert sorted(computed, key=id) == sorted([ab, cd], key=id)  # Cada caminho uma vez
+    assert not ab.path().isEmpty()
+    assert ab.crossing_connections == [cd] and cd.crossing_connections == [ab]
+    assert canvas.elements == [a, b, c, d] and canvas.connections == [ab, cd]
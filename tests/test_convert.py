@@ -0,0 +1,39 @@
+import json
+import pickle
+
+from bpmn_editor.convert.cli import main
+from bpmn_editor.formats import detect_format, load_document
+
+DOCUMENT = {
+    'elements': [
+        {'id': 'a', 'type': 'start', 'pos': (0.0, 0.0), 'name': 'Início', 'connections': ['ab']},
+        {'id': 'b', 'type': 'task', 'pos': (200.0, 120.0), 'name': 'Tarefa', 'connections': ['ab']},
+    ],
+    'connections': [{'id': 'ab', 'source_id': 'a', 'target_id': 'b'}],
+}
+
+def _write(path, document):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as f:
+        pickle.dump(document, f)
+    return path
+
+def test_cli_converts_tree_in_parallel_and_reports_json(tmp_path, capsys):
+    source = tmp_path / 'src'
+    _write(source / 'a.bpmn', DOCUMENT)
+    _write(source / 'sub' / 'b.bpmn', DOCUMENT)
+    dangling = dict(DOCUMENT, connections=[{'id': 'ax', 'source_id': 'a', 'target_id': 'x'}])
+    _write(source / 'sub' / 'invalid.bpmn', dangling)
+    (source / 'broken.bpmn').write_bytes(b'nada')
+
+    code = main([str(source), '-r', '--to', 'xml', '-o', str(tmp_path / 'out'), '-j', '2', '--json'])
+    summary = json.loads(capsys.readouterr().out)
+    assert code == 1
+    assert summary['counts'] == {'ok': 2, 'invalid': 1, 'error': 1}
+    by_name = {r['path'].rsplit('/', 1)[-1]: r for r in summary['files']}
+    assert by_name['invalid.bpmn']['problems'] == ["Conexão ax: target_id x não existe"]
+    assert not (tmp_path / 'out' / 'sub' / 'invalid.bpmn').exists()
+
+    converted = tmp_path / 'out' / 'sub' / 'b.bpmn'
+    assert detect_format(converted) == 'xml'
+    assert [r['id'] for r in load_document(converted)['elements']] == ['a', 'b']
@@ -0,0 +1,135 @@
+import locale
+
+import pytest
+
+from PyQt5.QtCore import QPointF
+
+
+@pytest.fixture
+def editor_class(qapp, tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))  # Diário sem nome isolado
+    monkeypatch.setattr(locale, 'setlocale', lambda *args, **kwargs: None)
+    from bpmn_editor.main import BPMNEditor
+    return BPMNEditor
+
+
+def _elements(editor):
+    from bpmn_editor.models.elements import BPMNElement
+    return [item for item in editor.canvas.scene.items() if isinstance(item, BPMNElement)]
+
+
+def test_cleared_diagram_is_not_recovered(editor_class, tmp_path):
+    from bpmn_editor.formats import save_document
+    from bpmn_editor.formats.journal import journal_path
+    from bpmn_editor.models.elements import BPMNElement
+
+    editor = editor_class()
+    editor.canvas.scene.addItem(BPMNElement('task', QPointF(0, 0)))
+    editor.recorder.flush()
+    editor.new_diagram()
+    assert len(editor.recorder.journal) == 0
+    editor.recorder.stop()  # Queda: o diário fica como está
+    assert _elements(editor_class()) == []
+
+    # Abrir um documento sem editá-lo não cria o diário ao lado dele
+    path = save_document({'elements': [], 'connections': []}, tmp_path / 'doc.bpmn')
+    editor = editor_class()
+    editor.open_document(str(path))
+    assert not journal_path(path).exists()
+    editor.close()  # Nada a salvar: fecha sem perguntar
+    assert not journal_path(path).exists()
+
+
+def test_save_as_keeps_the_old_journal_until_the_file_is_written(editor_class, qapp, tmp_path,
+                                                                  monkeypatch):
+    from bpmn_editor import main
+    from bpmn_editor.formats import GZIP_MAGIC, load_document
+    from bpmn_editor.formats.journal import EditJournal, journal_path, untitled_journal_path
+    from bpmn_editor.models.elements import BPMNElement
+
+    monkeypatch.setattr(main.QMessageBox, 'critical', lambda *args: None)
+    editor = editor_class()
+    editor.canvas.scene.addItem(BPMNElement('task', QPointF(0, 0)))
+    editor.recorder.flush()
+
+    def save(path, **options):
+        editor.save_in_background(path, **options)
+        editor.saver.wait()
+        qapp.processEvents()
+
+    save(tmp_path / 'missing' / 'doc.bpmn')  # Falha: o diário sem nome ainda recupera tudo
+    assert len(EditJournal(untitled_journal_path()).operations()) == 1
+
+    path = tmp_path / 'doc.bpmn'
+    save(path, compress=True)
+    assert path.read_bytes()[:2] == GZIP_MAGIC
+    assert len(load_document(path)['elements']) == 1
+    assert not untitled_journal_path().exists()
+    assert editor.current_file == str(path)
+    assert EditJournal(journal_path(path)).operations() == []
+
+    # O autosave incorpora as edições e mantém a compressão escolhida
+    _elements(editor)[0].setPos(QPointF(300, 300))
+    editor.recorder.flush()
+    editor.autoSave()
+    editor.recorder.wait()
+    assert path.read_bytes()[:2] == GZIP_MAGIC
+    assert load_document(path)['elements'][0]['pos'] == (300.0, 300.0)
+
+
+FOREIGN_XML = b'''<?xml version="1.0" encoding="UTF-8"?>
+<bpmn:definitions xmlns:bpmn="http://www.omg.org/spec/BPMN/20100524/MODEL"
+    xmlns:bpmndi="http://www.omg.org/spec/BPMN/20100524/DI"
+    xmlns:dc="http://www.omg.org/spec/DD/20100524/DC" id="Defs" targetNamespace="urn:x">
+  <bpmn:process id="P">
+    <bpmn:laneSet id="LS"><bpmn:lane id="L" name="Raia"/></bpmn:laneSet>
+    <bpmn:startEvent id="S"/>
+    <bpmn:parallelGateway id="G"/>
+    <bpmn:endEvent id="E"/>
+    <bpmn:sequenceFlow id="F1" sourceRef="S" targetRef="G"/>
+    <bpmn:sequenceFlow id="F2" sourceRef="G" targetRef="E"/>
+  </bpmn:process>
+  <bpmndi:BPMNDiagram id="D"><bpmndi:BPMNPlane id="PL" bpmnElement="P">
+    <bpmndi:BPMNShape id="S_di" bpmnElement="S"><dc:Bounds x="0" y="0" width="50" height="50"/></bpmndi:BPMNShape>
+    <bpmndi:BPMNShape id="G_di" bpmnElement="G"><dc:Bounds x="200" y="0" width="100" height="70"/></bpmndi:BPMNShape>
+    <bpmndi:BPMNShape id="E_di" bpmnElement="E"><dc:Bounds x="400" y="0" width="50" height="50"/></bpmndi:BPMNShape>
+  </bpmndi:BPMNPlane></bpmndi:BPMNDiagram>
+</bpmn:definitions>
+'''
+
+
+def test_imported_xml_is_never_rewritten(editor_class, qapp, tmp_path):
+    from bpmn_editor.formats.journal import EditJournal, journal_path
+    from bpmn_editor.utils.exceptions import DocumentFormatError
+
+    path = tmp_path / 'outra_ferramenta.bpmn'
+    path.write_bytes(FOREIGN_XML)
+    editor = editor_class()
+    editor.open_document(str(path))
+    assert editor.current_file is None
+    assert len(_elements(editor)) == 3
+
+    _elements(editor)[0].setPos(QPointF(700, 700))
+    editor.recorder.flush()
+    editor.autoSave()
+    editor.recorder.wait()
+    assert path.read_bytes() == FOREIGN_XML
+    assert not journal_path(path).exists()
+
+    # Exportar também não troca o documento atual nem move o diário
+    exported = tmp_path / 'exportado.bpmn'
+    editor.save_in_background(exported, 'xml')
+    editor.saver.wait()
+    qapp.processEvents()
+    assert exported.exists() and editor.current_file is None
+    assert not journal_path(exported).exists()
+    editor.recorder.stop()  # Queda: o diário sem nome traz a importação e a edição
+    assert len(_elements(editor_class())) == 3
+
+    # Mesmo com um diário ao lado, a compactação não regrava o XML
+    journal = EditJournal(journal_path(path))
+    journal.append({'op': 'move', 'id': 'S', 'pos': (1, 1)})
+    with pytest.raises(DocumentFormatError):
+        journal.compact(path)
+    journal.close(remove=True)
+    assert path.read_bytes() == FOREIGN_XML
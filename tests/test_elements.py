@@ -0,0 +1,88 @@
+import pytest
+from PyQt5.QtCore import Qt, QPointF, QRectF
+from bpmn_editor.models.elements import BPMNElement
+from bpmn_editor.models.grid import GridScene
+
+def test_geometry_is_cached_until_type_or_rect_changes(qapp):
+    element = BPMNElement('task', QPointF(0, 0))
+    geometry = element.geometry()
+    assert element.geometry() is geometry
+
+    # shape() devolve uma cópia: alterá-la não mexe na geometria compartilhada
+    shape = element.shape()
+    shape.addRect(QRectF(500, 500, 10, 10))
+    assert element.shape() == geometry.outline
+    assert BPMNElement('task', QPointF(0, 0)).shape() == geometry.outline
+
+    element.element_type = 'gateway'
+    assert element.geometry() is not geometry
+    assert element.geometry().kind == 'diamond'
+
+    diamond = element.geometry()
+    element.rect = QRectF(-20, -20, 40, 40)
+    assert element.geometry() is not diamond
+    assert element.shape().boundingRect() == QRectF(-20, -20, 40, 40)
+
+def test_bounding_rect_covers_shape_label_and_handles(qapp):
+    for element_type in ('start', 'task', 'gateway'):
+        element = BPMNElement(element_type, QPointF(0, 0))
+        geometry = element.geometry()
+        bounds = element.boundingRect()
+        assert bounds.contains(element.shape().boundingRect())
+        assert bounds.contains(geometry.label_rect)
+        for point in element.connectionPoints():
+            assert bounds.contains(QRectF(point.x() - 5, point.y() - 5, 10, 10))
+
+def test_resize_reindexes_element(qapp):
+    scene = GridScene(index_mode='grid')
+    element = BPMNElement('task', QPointF(0, 0))
+    scene.addItem(element)
+
+    element.rect = QRectF(-300, -30, 600, 60)
+    assert element in scene.items_at(QPointF(250, 0))
+
+def test_label_is_prepared_once_per_name_and_zoom_bucket(qapp):
+    from bpmn_editor.models.labels import LabelCache
+
+    element = BPMNElement('task', QPointF(0, 0))
+    element.name = "Aprovar solicitação de compra de materiais"
+    font = element.style().font
+    rect = element.geometry().label_rect
+
+    lines = element._label.lines(element.name, font, rect, 1.0)
+    assert element._label.lines(element.name, font, rect, 1.1) is lines
+    assert element._label.lines(element.name, font, rect, 4.0) is not lines
+    assert lines[0][1].text().endswith("…")
+
+    element.name = "Outro nome"
+    assert element._label.lines(element.name, font, rect, 1.0) is not lines
+
+    wrapped = LabelCache().lines("um dois três quatro cinco seis", font,
+                                 QRectF(0, 0, 60, 100), 1.0, mode='wrap')
+    assert len(wrapped) > 1
+
+def test_wrap_mode_grows_the_label_area(qapp):
+    scene = GridScene(index_mode='grid')
+    element = BPMNElement('task', QPointF(0, 0))
+    element.name = "Aprovar solicitação de compra de materiais"
+    scene.addItem(element)
+    geometry = element.geometry()
+    font = element.style().font
+
+    scene.set_label_mode('wrap')
+    assert element.boundingRect().contains(geometry.wrapped_label_rect)
+    below = geometry.wrapped_label_rect.adjusted(0, 30, 0, 0)  # Fora do rótulo de uma linha
+    assert element in scene.items_in_area(below, Qt.IntersectsItemBoundingRect)
+    lines = element._label.lines(element.name, font, geometry.wrapped_label_rect, 1.0, 'wrap')
+    assert len(lines) > 1
+
+    scene.set_label_mode('elide')
+    assert element.boundingRect() == geometry.bounding_rect
+
+
+def test_invalid_lod_thresholds_are_not_applied(qapp):
+    scene = GridScene()
+    before = dict(scene.lod_thresholds)
+    with pytest.raises(ValueError):
+        scene.set_lod_thresholds(shapes=before['labels'] + 1)
+    assert scene.lod_thresholds == before
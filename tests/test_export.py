@@ -0,0 +1,52 @@
+import pickle
+
+import pytest
+
+from PyQt5.QtGui import QImage
+from bpmn_editor.export import export_batch
+from bpmn_editor.export.renderer import render_png
+from bpmn_editor.formats import load_document, DocumentFormatError
+from bpmn_editor.formats.scene_builder import build_scene
+
+DOCUMENT = {
+    'elements': [
+        {'id': 'a', 'type': 'start', 'pos': (0.0, 0.0), 'name': 'Início', 'connections': ['ab']},
+        {'id': 'b', 'type': 'task', 'pos': (200.0, 120.0), 'name': 'Tarefa', 'connections': ['ab']},
+    ],
+    'connections': [{'id': 'ab', 'source_id': 'a', 'target_id': 'b'}],
+}
+
+def _write(path, document):
+    with open(path, 'wb') as f:
+        pickle.dump(document, f)
+    return path
+
+def test_banded_png_matches_single_pass(qapp, tmp_path):
+    scene, elements, connections = build_scene(DOCUMENT)
+    assert set(elements) == {'a', 'b'} and len(connections) == 1
+
+    single = tmp_path / 'single.png'
+    banded = tmp_path / 'banded.png'
+    size = render_png(scene, single)
+    assert render_png(scene, banded, band_pixels=size[0] * 7) == size
+
+    a, b = QImage(str(single)), QImage(str(banded))
+    assert (a.width(), a.height()) == (b.width(), b.height()) == size
+    # Antialiasing pode variar 1 nível de cor entre faixas, nada além disso
+    worst = max(abs(((a.pixel(x, y) >> shift) & 0xff) - ((b.pixel(x, y) >> shift) & 0xff))
+                for y in range(a.height()) for x in range(a.width()) for shift in (0, 8, 16))
+    assert worst <= 2
+
+def test_pickle_loader_rejects_code(tmp_path):
+    path = _write(tmp_path / 'evil.bpmn', {'elements': [QImage], 'connections': []})
+    with pytest.raises(DocumentFormatError):
+        load_document(path)
+
+def test_batch_reports_each_file(qapp, tmp_path):
+    good = _write(tmp_path / 'good.bpmn', DOCUMENT)
+    bad = tmp_path / 'bad.bpmn'
+    bad.write_bytes(b'nada')
+    results = {r['path']: r for r in export_batch([good, bad], tmp_path / 'out', 'svg', jobs=1)}
+    assert results[str(good)]['status'] == 'ok'
+    assert (tmp_path / 'out' / 'good.svg').exists()
+    assert results[str(bad)]['status'] == 'error'
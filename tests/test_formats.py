@@ -0,0 +1,300 @@
+import pickle
+
+import pytest
+
+from bpmn_editor.formats import (load_document, save_document, detect_format, iter_records,
+                                 migrate_file, DocumentFormatError)
+
+DOCUMENT = {
+    'elements': [
+        {'id': 'a', 'type': 'start', 'pos': (0.0, 0.0), 'name': 'Início', 'connections': ['ab'],
+         'description': "", 'actions': {}},
+        {'id': 'b', 'type': 'task', 'pos': (200.0, 120.0), 'name': 'Tarefa', 'connections': ['ab'],
+         'description': "Revisar", 'actions': {'Enviar Email': 'rh'}},
+    ],
+    'connections': [{'id': 'ab', 'source_id': 'a', 'target_id': 'b'}],
+}
+
+def test_ndjson_round_trip_is_one_record_per_line(tmp_path):
+    path = save_document(DOCUMENT, tmp_path / 'doc.bpmn')
+    assert detect_format(path) == 'ndjson'
+    assert len(path.read_bytes().splitlines()) == 1 + 2 + 1  # Cabeçalho, elementos, conexão
+    assert load_document(path) == DOCUMENT
+    assert [kind for kind, _ in iter_records(path)] == ['element', 'element', 'connection']
+
+def test_pickled_files_are_migrated(tmp_path):
+    path = tmp_path / 'old.bpmn'
+    # save() antigo: só elementos, sem descrição nem ações
+    legacy = {'elements': [{'id': 'a', 'type': 'task', 'pos': (1.0, 2.0), 'name': 'A',
+                            'connections': []}]}
+    with open(path, 'wb') as f:
+        pickle.dump(legacy, f)
+
+    migrate_file(path)
+    assert detect_format(path) == 'ndjson'
+    document = load_document(path)
+    assert document['connections'] == []
+    assert document['elements'][0]['description'] == "" and document['elements'][0]['actions'] == {}
+
+def test_newer_schema_is_rejected(tmp_path):
+    path = tmp_path / 'future.bpmn'
+    path.write_bytes(b'{"format":"bpmn-ndjson","version":99}\n')
+    with pytest.raises(DocumentFormatError):
+        load_document(path)
+
+def test_binary_round_trip_and_lazy_text(qapp, tmp_path):
+    from bpmn_editor.formats import BinaryDocument
+    from bpmn_editor.formats.scene_builder import build_lazy_scene
+
+    path = save_document(DOCUMENT, tmp_path / 'doc.bpmn', 'binary')
+    assert detect_format(path) == 'binary'
+    assert load_document(path) == DOCUMENT
+
+    with BinaryDocument(path) as binary:
+        scene, elements, connections = build_lazy_scene(binary)
+        b = elements['b']
+        assert b.pos().x() == 200.0 and len(connections) == 1
+        assert b._text_source is not None  # Nada decodificado ainda
+        assert b.description == "Revisar" and b.name == 'Tarefa'
+        assert b._text_source is None
+
+def test_journal_replays_edits_and_compacts(qapp, tmp_path):
+    from PyQt5.QtCore import QPointF
+    from bpmn_editor.formats.journal import (EditJournal, JournalRecorder, apply_operations,
+                                             journal_path)
+    from bpmn_editor.formats.scene_builder import build_scene
+    from bpmn_editor.models.elements import BPMNElement, BPMNConnection
+
+    path = save_document(DOCUMENT, tmp_path / 'doc.bpmn')
+    scene, elements, connections = build_scene(load_document(path))
+    recorder = JournalRecorder(scene)
+    recorder.start(EditJournal(journal_path(path)), path)
+
+    c = BPMNElement('task', QPointF(400, 0))
+    scene.addItem(c)
+    c.name = 'Nova'
+    scene.addItem(BPMNConnection(elements['b'], c))
+    elements['a'].setPos(QPointF(10, 20))
+    scene.removeItem(connections[0])
+    recorder.flush()
+
+    # Queda: um novo processo só tem o documento antigo e o diário
+    operations = EditJournal(journal_path(path)).operations()
+    assert [op['op'] for op in operations] == ['add', 'rename', 'connect', 'move', 'delete']
+    recovered = apply_operations(load_document(path), operations)
+    assert {r['id']: r['pos'] for r in recovered['elements']}['a'] == (10.0, 20.0)
+    assert [r['source_id'] for r in recovered['connections']] == ['b']
+
+    assert recorder.compact() and recorder.wait(5000)
+    assert len(recorder.journal) == 0
+    assert load_document(path) == recovered
+    recorder.stop(remove=True)
+    assert not journal_path(path).exists()
+
+    # O arquivo só é criado na primeira gravação; uma marca anterior a ela vale igual
+    journal = EditJournal(journal_path(path))
+    end = journal.mark()
+    assert not journal_path(path).exists()
+    journal.append({'op': 'rename', 'id': 'a', 'name': 'Depois'})
+    journal.flush()
+    journal.discard_until(end)
+    assert journal.operations() == [{'op': 'rename', 'id': 'a', 'name': 'Depois'}]
+    journal.close(remove=True)
+
+    # Marca de um salvamento, compactação no meio, edição depois do instantâneo:
+    # descartar até a marca não leva a edição nova junto
+    journal = EditJournal(journal_path(path))
+    journal.append({'op': 'move', 'id': 'a', 'pos': (1, 2)})
+    mark = journal.mark()
+    assert journal.compact(path) == 1
+    journal.append({'op': 'rename', 'id': 'a', 'name': 'Nova'})
+    journal.flush()
+    journal.discard_until(mark)
+    assert journal.operations() == [{'op': 'rename', 'id': 'a', 'name': 'Nova'}]
+    journal.close(remove=True)
+
+    recorder.start(EditJournal(journal_path(path)), path)
+    recorder.hold_compaction()  # Salvamento em curso
+    assert not recorder.compact()
+    recorder.release_compaction()
+    assert recorder.compact() and recorder.wait(5000)
+    recorder.stop(remove=True)
+
+def test_save_pipeline_coalesces_and_compresses(qapp, tmp_path):
+    from bpmn_editor.formats.save_pipeline import SavePipeline
+
+    path = tmp_path / 'doc.bpmn'
+    pipeline = SavePipeline()
+    finished = []
+    pipeline.signals.finished.connect(lambda p, ms: finished.append(p))
+    snapshots = []
+
+    def snapshot():
+        snapshots.append(len(snapshots))
+        return DOCUMENT
+
+    assert pipeline.save(path, snapshot, compress=True)
+    # Enquanto o primeiro grava, os pedidos seguintes se fundem num só
+    assert not pipeline.save(path, snapshot, compress=True)
+    assert not pipeline.save(path, snapshot, compress=True)
+    while pipeline.busy:
+        pipeline.wait()
+        qapp.processEvents()
+
+    assert snapshots == [0, 1] and len(finished) == 2
+    assert path.read_bytes()[:2] == b'\x1f\x8b'
+    assert detect_format(path) == 'ndjson' and load_document(path) == DOCUMENT
+    assert not list(tmp_path.glob('*.tmp'))
+
+BPMN_IO_SAMPLE = b'''<?xml version="1.0" encoding="UTF-8"?>
+<bpmn:definitions xmlns:bpmn="http://www.omg.org/spec/BPMN/20100524/MODEL"
+    xmlns:bpmndi="http://www.omg.org/spec/BPMN/20100524/DI"
+    xmlns:dc="http://www.omg.org/spec/DD/20100524/DC"
+    xmlns:di="http://www.omg.org/spec/DD/20100524/DI" id="Definitions_1">
+  <bpmn:process id="Process_1">
+    <bpmn:laneSet id="LaneSet_1"><bpmn:lane id="Lane_1"/></bpmn:laneSet>
+    <bpmn:startEvent id="S"><bpmn:outgoing>F1</bpmn:outgoing></bpmn:startEvent>
+    <bpmn:userTask id="T" name="Aprovar">
+      <bpmn:documentation>Gerente aprova</bpmn:documentation>
+    </bpmn:userTask>
+    <bpmn:subProcess id="P" name="Sub">
+      <bpmn:parallelGateway id="G"/>
+    </bpmn:subProcess>
+    <bpmn:endEvent id="E"/>
+    <bpmn:dataObject id="D"/>
+    <bpmn:sequenceFlow id="F1" sourceRef="S" targetRef="T"/>
+    <bpmn:sequenceFlow id="F2" sourceRef="T" targetRef="E"/>
+    <bpmn:association id="A" sourceRef="D" targetRef="T"/>
+  </bpmn:process>
+  <bpmndi:BPMNDiagram id="BPMNDiagram_1">
+    <bpmndi:BPMNPlane id="BPMNPlane_1" bpmnElement="Process_1">
+      <bpmndi:BPMNShape id="S_di" bpmnElement="S"><dc:Bounds x="0" y="0" width="50" height="50"/></bpmndi:BPMNShape>
+      <bpmndi:BPMNShape id="T_di" bpmnElement="T"><dc:Bounds x="100" y="0" width="100" height="80"/></bpmndi:BPMNShape>
+      <bpmndi:BPMNShape id="G_di" bpmnElement="G"><dc:Bounds x="300" y="0" width="100" height="70"/></bpmndi:BPMNShape>
+      <bpmndi:BPMNShape id="E_di" bpmnElement="E"><dc:Bounds x="400" y="0" width="50" height="50"/></bpmndi:BPMNShape>
+      <bpmndi:BPMNEdge id="F1_di" bpmnElement="F1"><di:waypoint x="50" y="25"/><di:waypoint x="100" y="40"/></bpmndi:BPMNEdge>
+    </bpmndi:BPMNPlane>
+  </bpmndi:BPMNDiagram>
+</bpmn:definitions>
+'''
+
+def test_bpmn_xml_import_maps_flow_nodes(tmp_path):
+    path = tmp_path / 'tool.bpmn'
+    path.write_bytes(BPMN_IO_SAMPLE)
+    assert detect_format(path) == 'xml'
+    document = load_document(path)
+    elements = {record['id']: record for record in document['elements']}
+    assert {i: r['type'] for i, r in elements.items()} == {
+        'S': 'start', 'T': 'task', 'P': 'task', 'G': 'gateway', 'E': 'start'}
+    assert elements['S']['pos'] == (25.0, 25.0) and elements['S']['connections'] == ['F1']
+    assert elements['T']['size'] == (100.0, 80.0) and elements['T']['description'] == "Gerente aprova"
+    assert elements['P']['pos'] == (0.0, 0.0)  # Sem forma no diagrama
+    assert [(r['source_id'], r['target_id']) for r in document['connections']] == [('S', 'T'), ('T', 'E')]
+
+def test_bpmn_xml_round_trip(tmp_path):
+    path = save_document(DOCUMENT, tmp_path / 'doc.bpmn', 'xml')
+    assert detect_format(path) == 'xml'
+    document = load_document(path)
+    # incoming/outgoing não são gravados: a lista de conexões do elemento se perde
+    strip = lambda records: [{k: v for k, v in r.items() if k != 'connections'} for r in records]
+    assert strip(document['elements']) == strip(DOCUMENT['elements'])
+    assert document['connections'] == DOCUMENT['connections']
+
+    # Coordenadas grandes não perdem dígitos no XML
+    far = {'elements': [{'id': 'far', 'type': 'task', 'pos': (1234567.5, 150123.25), 'name': 'Longe'}],
+           'connections': []}
+    path = save_document(far, tmp_path / 'far.bpmn', 'xml')
+    assert load_document(path)['elements'][0]['pos'] == (1234567.5, 150123.25)
+
+    # Ids do editor (uuid4().hex) que começam com dígito não são xsd:ID válidos
+    import re, uuid
+    ids = ['0' + uuid.uuid4().hex[1:], 'a' + uuid.uuid4().hex[1:], '9' + uuid.uuid4().hex[1:]]
+    document = {
+        'elements': [{'id': ids[0], 'type': 'start', 'pos': (0.0, 0.0), 'name': 'A'},
+                     {'id': ids[1], 'type': 'task', 'pos': (200.0, 0.0), 'name': 'B'}],
+        'connections': [{'id': ids[2], 'source_id': ids[0], 'target_id': ids[1]}],
+    }
+    path = save_document(document, tmp_path / 'uuid.bpmn', 'xml')
+    text = path.read_text(encoding='utf-8')
+    for attribute in re.findall(r'(?:id|bpmnElement|sourceRef|targetRef)="([^"]*)"', text):
+        assert re.match(r'[A-Za-z_]', attribute), attribute
+    loaded = load_document(path)
+    assert [r['id'] for r in loaded['elements']] == ids[:2]
+    flows = [(r['id'], r['source_id'], r['target_id']) for r in loaded['connections']]
+    assert flows == [(ids[2], ids[0], ids[1])]
+
+def test_progressive_loader_builds_visible_first_and_keeps_edits(qapp, tmp_path):
+    import gc
+    from PyQt5.QtCore import QPointF
+    from bpmn_editor.views.canvas import BPMNCanvas
+    from bpmn_editor.models.elements import BPMNElement, BPMNConnection
+    from bpmn_editor.formats.journal import EditJournal, JournalRecorder
+    from bpmn_editor.formats.progressive_loader import ProgressiveLoader
+
+    count = 3000
+    document = {
+        'elements': [{'id': f"e{i}", 'type': 'task', 'pos': (i * 150.0, 0.0), 'name': f"T{i}"}
+                     for i in range(count)],
+        'connections': [{'id': f"c{i}", 'source_id': f"e{i}", 'target_id': f"e{i + 1}"}
+                        for i in range(count - 1)],
+    }
+    canvas = BPMNCanvas()
+    canvas.resize(400, 300)
+    recorder = JournalRecorder(canvas.scene)
+    recorder.start(EditJournal(tmp_path / 'doc.journal'))
+    loader = ProgressiveLoader(canvas, recorder)
+    loader.load(document)
+
+    elements = lambda: [i for i in canvas.scene.items() if isinstance(i, BPMNElement)]
+    connections = lambda: [i for i in canvas.scene.items() if isinstance(i, BPMNConnection)]
+    built = {element.unique_id: element for element in elements()}
+    assert loader.loading and 0 < len(built) < 50
+    assert gc.isenabled()  # Só fica desligado dentro de cada fatia
+
+    # Remover um elemento na borda do que já existe: a conexão para o vizinho ainda
+    # não criado não pode aparecer depois
+    edge = max(built, key=lambda element_id: int(element_id[1:]))
+    canvas.scene.removeItem(built[edge])
+    loader.finish()
+
+    assert not loader.loading
+    assert gc.get_freeze_count() == 0
+    assert len(elements()) == count - 1
+    # Só a conexão para o vizinho que ainda não existia deixa de ser criada
+    assert len(connections()) == count - 2
+    assert not any(connection.source.unique_id == edge for connection in connections())
+    assert all(not connection.path().isEmpty() for connection in connections())
+    recorder.stop()
+    assert EditJournal(tmp_path / 'doc.journal').operations() == [{'op': 'delete', 'id': edge}]
+
+def test_revision_diff_and_delta_round_trip(qapp, tmp_path):
+    import copy
+    from bpmn_editor.formats import save_revision, load_revision
+    from bpmn_editor.formats.revisions import diff_documents
+    from bpmn_editor.views.canvas import BPMNCanvas
+
+    child = copy.deepcopy(DOCUMENT)
+    a, b = child['elements']
+    a['pos'] = (40.0, 0.0)
+    b['name'], b['actions'] = 'Tarefa revisada', {'Enviar Email': 'ti'}
+    b['connections'].append('bc')
+    child['elements'].append({'id': 'c', 'type': 'task', 'pos': (400.0, 120.0), 'name': 'Nova',
+                              'connections': ['bc'], 'description': "", 'actions': {}})
+    child['connections'] = [{'id': 'bc', 'source_id': 'b', 'target_id': 'c'}]
+
+    diff = diff_documents(DOCUMENT, child)
+    assert diff.added == ['c', 'bc'] and diff.removed == ['ab']
+    assert diff.moved == ['a'] and diff.renamed == ['b'] and diff.actions_changed == ['b']
+
+    delta = save_revision(DOCUMENT, child, tmp_path / 'rev.bpmndelta')
+    assert [c['fields'] for c in delta['elements']['changed']][0] == {'pos': (40.0, 0.0)}
+    assert load_revision(DOCUMENT, tmp_path / 'rev.bpmndelta') == child
+    with pytest.raises(DocumentFormatError):
+        load_revision(child, tmp_path / 'rev.bpmndelta')  # Outra revisão mãe
+
+    canvas = BPMNCanvas()
+    overlay = canvas.show_diff(diff, DOCUMENT, child)
+    assert overlay.scene() is canvas.scene
+    assert canvas.scene.itemAt(40.0, 0.0, canvas.transform()) is not overlay  # Não intercepta cliques
+    canvas.scene.clear()
+    canvas.clear_diff()  # O overlay já foi apagado com a cena
@@ -0,0 +1,21 @@
+import pytest
+from PyQt5.QtCore import QRectF
+from PyQt5.QtGui import QImage, QPainter
+
+from bpmn_editor.models.grid_renderer import GridRenderer, MIN_TILE_SCALE, MAX_TILE_SCALE
+
+
+@pytest.mark.parametrize("scale, tiled", [(MIN_TILE_SCALE / 4, True), (1, True),
+                                          (MAX_TILE_SCALE * 2, False)])
+def test_tiles_cover_zoomed_out_views_only(qapp, monkeypatch, scale, tiled):
+    renderer = GridRenderer()
+    lines = []
+    monkeypatch.setattr(renderer, 'draw_lines', lambda *args: lines.append(args))
+    image = QImage(200, 200, QImage.Format_ARGB32_Premultiplied)
+    painter = QPainter(image)
+    painter.scale(scale, scale)
+    renderer.draw(painter, QRectF(0, 0, 200 / scale, 200 / scale), 20, 100)
+    painter.end()
+
+    assert bool(renderer._tiles) == tiled
+    assert bool(lines) != tiled
@@ -0,0 +1,40 @@
+import copy
+
+from bpmn_editor.repository import DiagramRepository
+
+DOCUMENT = {
+    'elements': [
+        {'id': 'a', 'type': 'start', 'pos': (0.0, 0.0), 'name': 'Início', 'connections': ['ab'],
+         'description': "", 'actions': {}},
+        {'id': 'b', 'type': 'task', 'pos': (200.0, 120.0), 'name': 'Tarefa', 'connections': ['ab', 'bc'],
+         'description': "Revisar", 'actions': {'Enviar Email': 'rh'}},
+        {'id': 'c', 'type': 'task', 'pos': (5000.0, 5000.0), 'name': 'Longe', 'connections': ['bc'],
+         'description': "", 'actions': {}, 'size': (300.0, 90.0)},
+    ],
+    'connections': [{'id': 'ab', 'source_id': 'a', 'target_id': 'b'},
+                    {'id': 'bc', 'source_id': 'b', 'target_id': 'c'}],
+}
+
+def test_repository_saves_changed_rows_and_queries_regions(tmp_path):
+    with DiagramRepository(tmp_path / 'diagramas.db') as repository:
+        assert repository.save_document('vendas', DOCUMENT)['inserted'] == 5
+        assert repository.load_document('vendas') == DOCUMENT
+
+        # Só o elemento movido é regravado
+        moved = copy.deepcopy(DOCUMENT)
+        moved['elements'][0]['pos'] = (10.0, 0.0)
+        assert repository.save_document('vendas', moved) == {'inserted': 0, 'updated': 1, 'deleted': 0}
+        assert repository.save_document('vendas', moved) == {'inserted': 0, 'updated': 0, 'deleted': 0}
+
+        # Região por região: a conexão bc só vem quando as duas pontas estão abertas
+        first = repository.load_region('vendas', (-100, -100, 400, 400))
+        assert [e['id'] for e in first['elements']] == ['a', 'b']
+        assert [c['id'] for c in first['connections']] == ['ab']
+        second = repository.load_region('vendas', (4800, 4800, 5200, 5200), loaded={'a', 'b'})
+        assert [e['id'] for e in second['elements']] == ['c']
+        assert [c['id'] for c in second['connections']] == ['bc']
+
+        repository.save_document('compras', {'elements': [dict(DOCUMENT['elements'][1], id='x')],
+                                             'connections': []})
+        assert repository.find_elements(type='task', action='Enviar Email') == [
+            ('compras', 'x', 'Tarefa'), ('vendas', 'b', 'Tarefa')]
@@ -0,0 +1,76 @@
+import pytest
+from PyQt5.QtCore import QPointF, QRectF, Qt
+from bpmn_editor.models.grid import GridScene
+from bpmn_editor.models.elements import BPMNElement
+from bpmn_editor.models.spatial_index import UniformGridIndex
+
+def test_grid_index_insert_move_remove():
+    index = UniformGridIndex(cell_size=100)
+    index.insert('a', QRectF(10, 10, 50, 50))
+    index.insert('b', QRectF(250, 250, 300, 40))
+
+    assert index.items_at(QPointF(20, 20)) == ['a']
+    assert index.items_in_rect(QRectF(400, 200, 10, 100)) == ['b']
+
+    index.update('a', QRectF(1000, 1000, 50, 50))
+    assert index.items_at(QPointF(20, 20)) == []
+    assert index.items_at(QPointF(1020, 1020)) == ['a']
+
+    index.remove('b')
+    assert 'b' not in index
+    assert len(index) == 1
+
+@pytest.mark.parametrize("mode", ["none", "bsp", "grid"])
+def test_scene_queries_follow_moves(qapp, mode):
+    scene = GridScene(index_mode=mode)
+    element = BPMNElement('task', QPointF(0, 0))
+    scene.addItem(element)
+    center = element.sceneBoundingRect().center()
+    assert scene.item_at(center) is element
+
+    element.setPos(QPointF(5000, 5000))
+    center = element.sceneBoundingRect().center()
+    assert scene.item_at(center) is element
+    assert element in scene.items_in_area(QRectF(4900, 4900, 300, 300), Qt.IntersectsItemShape)
+
+    scene.removeItem(element)
+    assert scene.item_at(center) is None
+
+def test_switching_mode_reindexes_existing_items(qapp):
+    scene = GridScene(index_mode='none')
+    element = BPMNElement('task', QPointF(300, 300))
+    scene.addItem(element)
+
+    scene.set_index_mode('grid')
+    assert element in scene.grid_index
+    assert scene.items_at(element.sceneBoundingRect().center()) == [element]
+
+    scene.set_index_mode('grid')  # Selecionar o mesmo modo não esvazia o índice
+    assert element in scene.grid_index
+    assert scene.items_at(element.sceneBoundingRect().center()) == [element]
+
+    with pytest.raises(ValueError):
+        scene.set_index_mode('quadtree')
+
+def test_overlapping_items_keep_qt_stacking_order(qapp):
+    scene = GridScene(index_mode='grid')
+    elements = [BPMNElement('task', QPointF(i * 10, i * 10)) for i in range(4)]
+    for element in elements:
+        scene.addItem(element)
+    elements[1].setZValue(5)
+    point = elements[0].sceneBoundingRect().center() + QPointF(10, 10)
+    area = QRectF(point, point + QPointF(5, 5))
+
+    expected = scene.items(point)
+    assert scene.items_at(point) == expected
+    assert scene.items_at(point)[:2] == [elements[1], elements[3]]
+    assert scene.item_at(point) is elements[1]
+    assert scene.items_in_area(area) == scene.items(area)
+
+    elements[3].setPos(QPointF(100, 100))  # Mover não muda o empilhamento
+    elements[3].setPos(QPointF(30, 30))
+    assert scene.items_at(point) == expected
+
+    scene.set_index_mode('none')
+    scene.set_index_mode('grid')
+    assert scene.items_at(point) == expected
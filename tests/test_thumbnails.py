@@ -0,0 +1,58 @@
+import os
+import pickle
+
+from PyQt5.QtGui import QImage
+from bpmn_editor.thumbnails import ThumbnailCache, ThumbnailService, render_thumbnail
+
+DOCUMENT = {
+    'elements': [
+        {'id': 'a', 'type': 'start', 'pos': (0.0, 0.0), 'name': 'Início', 'connections': []},
+        {'id': 'b', 'type': 'gateway', 'pos': (400.0, 100.0), 'name': 'Decisão', 'connections': []},
+    ],
+    'connections': [{'id': 'ab', 'source_id': 'a', 'target_id': 'b'}],
+}
+
+def test_cache_is_keyed_by_content_and_evicts_least_recently_used(qapp, tmp_path):
+    image = render_thumbnail(DOCUMENT)
+    assert max(image.width(), image.height()) == 256
+
+    cache = ThumbnailCache(tmp_path / 'cache', max_bytes=10 ** 9)
+    first = tmp_path / 'a.bpmn'
+    copy = tmp_path / 'b.bpmn'
+    first.write_bytes(b'um')
+    copy.write_bytes(b'um')
+    key = cache.key_for(first)
+    assert cache.key_for(copy) == key  # Mesmo conteúdo, mesma prévia
+    cache.put(key, image)
+    assert cache.get(copy) is not None
+
+    small = QImage(4, 4, QImage.Format_ARGB32)
+    cache.put('velha', small)
+    cache.put('nova', small)
+    os.utime(cache.path_for('velha'), (1, 1))
+    cache.max_bytes = cache.size() - 1
+    cache.evict()
+    assert not cache.path_for('velha').exists()
+    assert cache.path_for('nova').exists()
+
+    # A prévia removida também sai do índice gravado
+    os.utime(cache.path_for(key), (1, 1))
+    cache.max_bytes = cache.size() - 1
+    cache.evict()
+    cache.flush()
+    assert not cache.path_for(key).exists()
+    assert ThumbnailCache(tmp_path / 'cache').key_for(first, cached_only=True) is None
+
+def test_service_generates_missing_thumbnails_in_background(qapp, tmp_path):
+    path = tmp_path / 'antigo.bpmn'
+    with open(path, 'wb') as f:
+        pickle.dump(DOCUMENT, f)
+    service = ThumbnailService(ThumbnailCache(tmp_path / 'cache'))
+    ready = []
+    service.signals.ready.connect(lambda p, image: ready.append(p))
+
+    assert service.thumbnail(path) is None
+    assert service.wait(5000)
+    qapp.processEvents()
+    assert ready == [str(path)]
+    assert service.thumbnail(path) is not None